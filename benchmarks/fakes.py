@@ -0,0 +1,371 @@
+# Discord stand-ins used by the benchmark suite and the load test harness.
+# They only implement what the cogs touch. Every call that would hit the
+# Discord (or CoC) REST API goes through RestRecorder, which counts it per
+# flow and can add a simulated round trip; storage comes from
+# utils.storage_backends.
+
+import asyncio
+import contextvars
+import datetime
+import itertools
+import random
+from collections import Counter, defaultdict
+
+import discord
+
+# Flow the current task belongs to; set by the load test for each simulated user
+current_flow = contextvars.ContextVar("current_flow", default="setup")
+
+_snowflakes = itertools.count(10**17)
+
+def snowflake():
+    return next(_snowflakes)
+
+# --- REST ---
+
+class RestRecorder:
+    def __init__(self, latency=0.0, jitter=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = defaultdict(Counter) # flow -> route -> count
+
+    async def request(self, method, route):
+        self.calls[current_flow.get()][f"{method} {route}"] += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.random() * self.jitter)
+
+    def total(self, flow):
+        return sum(self.calls[flow].values())
+
+class FakeCocPlayer:
+    def __init__(self, tag, name, town_hall):
+        self.tag = tag
+        self.name = name
+        self.town_hall = town_hall
+        self.town_hall_weapon = None
+        self.exp_level = 200
+        self.trophies = 5000
+        self.war_stars = 1000
+        self.heroes = []
+        self.pets = []
+
+class FakeCocClient:
+    """Replaces coc.Client inside utils.coc_api.coc_api; unknown tags resolve to a TH16 player."""
+
+    def __init__(self, rest):
+        self.rest = rest
+        self.players = {}
+
+    def add_player(self, tag, name, town_hall):
+        self.players[tag] = FakeCocPlayer(tag, name, town_hall)
+
+    async def get_player(self, tag):
+        tag = "#" + tag.strip("#").upper()
+        await self.rest.request("GET", "coc /players/{tag}")
+        return self.players.get(tag) or FakeCocPlayer(tag, f"Player {tag}", 16)
+
+    async def get_clan(self, tag):
+        await self.rest.request("GET", "coc /clans/{tag}")
+        return None
+
+    async def close(self):
+        pass
+
+# --- Users and guilds ---
+
+class FakeRole:
+    def __init__(self, id=None):
+        self.id = id or snowflake()
+
+class FakeUser:
+    def __init__(self, bot, id=None, name=None, is_bot=False, roles=()):
+        self._bot = bot
+        self.id = id or snowflake()
+        self.name = name or f"user{self.id}"
+        self.display_name = self.name
+        self.bot = is_bot
+        self.roles = list(roles)
+
+    @property
+    def mention(self):
+        return f"<@{self.id}>"
+
+    async def send(self, content=None, **kwargs):
+        await self._bot.rest.request("POST", "/channels/{dm_channel_id}/messages")
+
+class FakeGuild:
+    def __init__(self, bot, id=None):
+        self._bot = bot
+        self.id = id or snowflake()
+        self.name = "Benchmark Guild"
+        self.icon = None
+        self.channels = {}
+        self.threads = {}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id) or self.threads.get(channel_id)
+
+    def get_thread(self, thread_id):
+        return self.threads.get(thread_id)
+
+    def get_member(self, user_id):
+        # The bot runs without a member cache (utils/member_cache.py)
+        return None
+
+    async def fetch_member(self, user_id):
+        await self._bot.rest.request("GET", "/guilds/{guild_id}/members/{user_id}")
+        return FakeUser(self._bot, id=user_id)
+
+# --- Messages and channels ---
+
+class FakeAttachment:
+    def __init__(self, url):
+        self.url = url
+
+class FakeMessage:
+    def __init__(self, channel, author, content=None, embeds=None, view=None, attachments=None, ephemeral=False):
+        self.id = snowflake()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.embeds = list(embeds or [])
+        self.view = view
+        self.attachments = list(attachments or [])
+        self.ephemeral = ephemeral
+        self.deleted = False
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+
+    async def edit(self, content=None, embed=None, embeds=None, view=discord.utils.MISSING, **kwargs):
+        await self.channel._bot.rest.request("PATCH", "/channels/{channel_id}/messages/{message_id}")
+        self._apply_edit(content, embed, embeds, view)
+        self.channel.edits += 1
+        return self
+
+    def _apply_edit(self, content=None, embed=None, embeds=None, view=discord.utils.MISSING):
+        if content is not None: self.content = content
+        if embed is not None: self.embeds = [embed]
+        if embeds is not None: self.embeds = list(embeds)
+        if view is not discord.utils.MISSING: self.view = view
+
+    async def delete(self, delay=None):
+        await self.channel._bot.rest.request("DELETE", "/channels/{channel_id}/messages/{message_id}")
+        self.deleted = True
+
+    async def add_reaction(self, emoji):
+        await self.channel._bot.rest.request("PUT", "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me")
+
+class FakeTextChannel:
+    def __init__(self, bot, guild, name="channel", category_id=None, overwrites=None):
+        self._bot = bot
+        self.guild = guild
+        self.id = snowflake()
+        self.name = name
+        self.category_id = category_id
+        self.overwrites = overwrites or {}
+        self.messages = {}
+        self.sent = 0
+        self.edits = 0
+        self.threads = []
+
+    @property
+    def mention(self):
+        return f"<#{self.id}>"
+
+    def _add(self, message):
+        self.messages[message.id] = message
+        return message
+
+    async def send(self, content=None, *, embed=None, embeds=None, view=None, delete_after=None, **kwargs):
+        await self._bot.rest.request("POST", "/channels/{channel_id}/messages")
+        self.sent += 1
+        return self._add(FakeMessage(self, self._bot.user, content, embeds or ([embed] if embed else []), view))
+
+    async def fetch_message(self, message_id):
+        await self._bot.rest.request("GET", "/channels/{channel_id}/messages/{message_id}")
+        if message_id not in self.messages:
+            raise discord.NotFound(_FakeHTTPResponse(404), "Unknown Message")
+        return self.messages[message_id]
+
+    async def history(self, limit=100, after=None):
+        await self._bot.rest.request("GET", "/channels/{channel_id}/messages")
+        found = [m for m in self.messages.values() if not m.ephemeral and (after is None or m.created_at > after)]
+        for m in found[:limit]:
+            yield m
+
+    async def create_thread(self, name, type=None, auto_archive_duration=None, **kwargs):
+        await self._bot.rest.request("POST", "/channels/{channel_id}/threads")
+        thread = FakeThread(self, name)
+        self.threads.append(thread)
+        self.guild.threads[thread.id] = thread
+        return thread
+
+    def last_view(self, view_type):
+        """The newest message in this channel carrying a view of view_type."""
+        for message in reversed(list(self.messages.values())):
+            if isinstance(message.view, view_type):
+                return message
+        return None
+
+class FakeThread(FakeTextChannel):
+    def __init__(self, parent, name):
+        super().__init__(parent._bot, parent.guild, name)
+        self.parent = parent
+
+class _FakeHTTPResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "Not Found"
+
+# --- Interactions ---
+
+class _FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+        self.modal = None
+
+    def is_done(self):
+        return self._done
+
+    async def _respond(self):
+        if self._done:
+            raise discord.InteractionResponded(self._interaction)
+        self._done = True
+        await self._interaction.client.rest.request("POST", "/interactions/{interaction_id}/{token}/callback")
+
+    async def defer(self, **kwargs):
+        await self._respond()
+
+    async def send_message(self, content=None, *, embed=None, embeds=None, view=None, ephemeral=False, **kwargs):
+        await self._respond()
+        channel = self._interaction.channel
+        if channel is not None:
+            channel._add(FakeMessage(channel, self._interaction.client.user, content, embeds or ([embed] if embed else []), view, ephemeral=ephemeral))
+
+    async def edit_message(self, content=None, *, embed=None, embeds=None, view=discord.utils.MISSING, **kwargs):
+        await self._respond()
+        if self._interaction.message is not None:
+            self._interaction.message._apply_edit(content, embed, embeds, view)
+
+    async def send_modal(self, modal):
+        await self._respond()
+        self.modal = modal
+
+class _FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, *, embed=None, embeds=None, view=None, ephemeral=False, **kwargs):
+        await self._interaction.client.rest.request("POST", "/webhooks/{application_id}/{token}")
+        channel = self._interaction.channel
+        if channel is None:
+            return None
+        return channel._add(FakeMessage(channel, self._interaction.client.user, content, embeds or ([embed] if embed else []), view, ephemeral=ephemeral))
+
+class FakeInteraction:
+    def __init__(self, bot, user=None, channel=None, message=None, user_id=1272176835769405552):
+        self.id = snowflake()
+        self.client = bot
+        self.user = user or FakeUser(bot, id=user_id, name="bench")
+        self.channel = channel
+        self.guild = channel.guild if channel is not None else bot.guild
+        self.guild_id = self.guild.id
+        self.channel_id = channel.id if channel is not None else None
+        self.message = message
+        self.data = {}
+        self.response = _FakeResponse(self)
+        self.followup = _FakeFollowup(self)
+
+# --- Bot ---
+
+class FakeBot:
+    def __init__(self, rest=None):
+        self.rest = rest or RestRecorder()
+        self.user = FakeUser(self, name="Blackspire", is_bot=True)
+        self.guild = FakeGuild(self)
+        self.shard_id = None # unsharded, like a plain discord.Client
+        self.shard_count = None
+        self.cogs = {}
+        self._waiters = defaultdict(list) # event -> [(future, check)]
+        self._waiters_changed = None
+
+    def create_channel(self, name="channel", **kwargs):
+        channel = FakeTextChannel(self, self.guild, name, **kwargs)
+        self.guild.channels[channel.id] = channel
+        return channel
+
+    def get_channel(self, channel_id):
+        return self.guild.get_channel(channel_id)
+
+    def add_cog(self, cog):
+        self.cogs[type(cog).__name__] = cog
+        return cog
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+    def add_view(self, view, message_id=None):
+        pass
+
+    def add_dynamic_items(self, *items):
+        pass
+
+    def get_user(self, user_id):
+        return None
+
+    async def fetch_user(self, user_id):
+        await self.rest.request("GET", "/users/{user_id}")
+        return FakeUser(self, id=user_id)
+
+    async def wait_for(self, event, *, check=None, timeout=None):
+        future = asyncio.get_running_loop().create_future()
+        waiter = (future, check)
+        self._waiters[event].append(waiter)
+        async with self._condition():
+            self._waiters_changed.notify_all()
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            if waiter in self._waiters[event]:
+                self._waiters[event].remove(waiter)
+
+    def has_waiter(self, event, *args):
+        return any(not f.done() and (check is None or check(*args)) for f, check in self._waiters[event])
+
+    def _condition(self):
+        if self._waiters_changed is None:
+            self._waiters_changed = asyncio.Condition()
+        return self._waiters_changed
+
+    async def until_waiting(self, event, *args):
+        """Returns once some wait_for(event) would accept args."""
+        async with self._condition():
+            await self._waiters_changed.wait_for(lambda: self.has_waiter(event, *args))
+
+    async def dispatch(self, event, *args):
+        for future, check in list(self._waiters[event]):
+            if not future.done() and (check is None or check(*args)):
+                future.set_result(args[0] if len(args) == 1 else args)
+        for cog in list(self.cogs.values()):
+            for name, listener in cog.get_listeners():
+                if name == f"on_{event}":
+                    await listener(*args)
+
+    async def receive_message(self, channel, author, content="", attachments=None):
+        """A user message arriving over the gateway; no REST call involved."""
+        message = channel._add(FakeMessage(channel, author, content, attachments=attachments))
+        await self.dispatch("message", message)
+        return message
+
+# --- Driving components ---
+
+async def click(view, item, interaction, values=None):
+    """Runs a button or select the way discord.py dispatches a component interaction."""
+    interaction.data = {"custom_id": item.custom_id, "component_type": item.type.value, "values": list(values or [])}
+    await view._scheduled_task(item, interaction)
+
+async def submit(modal, interaction, values):
+    """Submits a modal; values maps TextInput -> text."""
+    components = [{"type": 4, "custom_id": item.custom_id, "value": text} for item, text in values.items()]
+    await modal._scheduled_task(interaction, components, {})
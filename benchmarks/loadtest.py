@@ -0,0 +1,448 @@
+# Load test for the user facing flows.
+#
+#   python -m benchmarks.loadtest --users 2000 --rest-latency 0.05 --output load.json
+#
+# Simulated users go through the ticket interview, the counting channel and
+# the BUC / BSN registration and result entry flows concurrently. Everything
+# runs against fake Discord objects (benchmarks.fakes) and the in-memory store,
+# with REST and CoC calls recorded and optionally delayed. Reports latency
+# percentiles per flow for single interactions and whole flows, plus the REST
+# calls each flow made.
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import logging
+import platform
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+from utils.mongo_manager import mongo_manager
+from utils.settings_service import settings_service
+from utils.coc_api import coc_api
+from utils.storage_backends import MemoryBackend, TimedDatabase
+from utils.ticket_sessions import ticket_sessions
+from utils.logging_config import setup_logging
+from utils import runtime
+from benchmarks import synthetic
+from benchmarks.fakes import (
+    FakeAttachment, FakeBot, FakeCocClient, FakeInteraction, FakeMessage, FakeRole, FakeUser,
+    RestRecorder, click, current_flow, submit
+)
+
+ticket_module = importlib.import_module("cogs.tickets.ticket_system")
+counting_module = importlib.import_module("cogs.counting.counting")
+buc_module = importlib.import_module("cogs.BUC CUP.buc_system")
+bsn_module = importlib.import_module("cogs.bsn_cup.bsn_cup_system")
+
+FLOWS = ("ticket", "counting", "buc", "bsn")
+CLANS = 8
+COUNTS_PER_USER = 3
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_ms": _ms(percentile(values, 50)),
+        "p95_ms": _ms(percentile(values, 95)),
+        "p99_ms": _ms(percentile(values, 99)),
+        "max_ms": _ms(values[-1] if values else None),
+    }
+
+def _ms(value):
+    return None if value is None else round(value * 1000, 3)
+
+class _ErrorCounter(logging.Handler):
+    """Counts exceptions discord.py's View/Modal.on_error would log, per flow."""
+
+    def __init__(self, errors, samples):
+        super().__init__(logging.ERROR)
+        self.errors = errors
+        self.samples = samples
+
+    def emit(self, record):
+        flow = current_flow.get()
+        self.errors[flow] += 1
+        if len(self.samples[flow]) < 5:
+            self.samples[flow].append(record.getMessage() + (f": {record.exc_info[1]!r}" if record.exc_info else ""))
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.rest = RestRecorder(args.rest_latency, args.rest_jitter)
+        self.bot = FakeBot(self.rest)
+        self.interactions = defaultdict(list) # flow -> seconds per interaction
+        self.durations = defaultdict(list) # flow -> seconds per simulated user
+        self.completed = Counter()
+        self.errors = Counter()
+        self.error_samples = defaultdict(list)
+        self.rejected = Counter() # messages the cogs refused, e.g. a wrong count
+
+    # --- Setup ---
+
+    async def setup(self):
+        backend = MemoryBackend()
+        mongo_manager.use_backend(backend)
+        settings_service.invalidate()
+        db = await backend.connect()
+        await backend.ensure_indexes(db)
+        mongo_manager.db = TimedDatabase(db) # as MongoManager.connect() would
+
+        coc_api.client = FakeCocClient(RestRecorder(self.args.coc_latency))
+        coc_api.client.rest.calls = self.rest.calls # CoC calls show up next to the Discord ones
+        coc_api._is_logged_in = True
+
+        self.ticket_cog = self.bot.add_cog(ticket_module.TicketSystemCog(self.bot))
+        self.bot.add_cog(counting_module.CountingCog(self.bot))
+        self.bot.add_cog(buc_module.BUCSystem(self.bot))
+        self.bot.add_cog(bsn_module.BSNCupSystem(self.bot))
+
+        users = {flow: 0 for flow in FLOWS}
+        for i in range(self.args.users):
+            users[self.pick_flow()] += 1
+        self.plan = users
+
+        await self.setup_tickets()
+        await self.setup_counting()
+        await self.setup_buc(users["buc"])
+        await self.setup_bsn(users["bsn"])
+        self.admin = FakeUser(self.bot, id=bsn_module.OWNER_ID, name="admin")
+
+    def pick_flow(self):
+        weights = [self.args.mix.get(flow, 0) for flow in FLOWS]
+        return self.rng.choices(FLOWS, weights)[0]
+
+    async def _post_settings(self, keys):
+        settings = {}
+        for key in keys:
+            channel = self.bot.create_channel(key)
+            settings[f"{key}_channel_id"] = channel.id
+            settings[f"{key}_message_id"] = (await channel.send(content=key)).id
+        return settings
+
+    async def setup_tickets(self):
+        self.clans = []
+        for i in range(CLANS):
+            clan = {
+                "clan_tag": f"#CLAN{i}", "name": f"Clan {i}", "type": "Regular" if i % 2 == 0 else "Cruise",
+                "min_th": 10, "visible": True, "war_league": "Champion League I", "capital_hall": "10",
+                "leader_id": 5 * 10**16 + i, "leadership_role_id": 6 * 10**16 + i
+            }
+            await mongo_manager.save_clan(clan)
+            self.clans.append(clan)
+
+    async def setup_counting(self):
+        self.counting_channel = self.bot.create_channel("counting")
+        await mongo_manager.set_counting_channel(self.bot.guild.id, self.counting_channel.id)
+
+    async def setup_buc(self, users):
+        # One open Round 1 match per simulated BUC user for result entry
+        teams = synthetic.buc_teams(self.rng, max(2, users), 5)
+        for t in teams:
+            await mongo_manager.save_buc_team(t)
+        self.buc_matches = synthetic.buc_matches(self.rng, teams, users, completed_ratio=0)
+        for m in self.buc_matches:
+            await mongo_manager.save_buc_match(m)
+        await settings_service.update("buc", **await self._post_settings(
+            ("leaderboard", "leaderboard_mobile", "player_stats", "player_stats_mobile", "bracket")))
+
+    async def setup_bsn(self, users):
+        teams = synthetic.bsn_teams(self.rng, max(2, users))
+        for t in teams:
+            t["eliminated"] = False
+            await mongo_manager.save_bsn_team(t)
+        self.bsn_matches = synthetic.bsn_matches(self.rng, teams, users, completed_ratio=0)
+        for m in self.bsn_matches:
+            await mongo_manager.save_bsn_match(m)
+        self.approval_channel = self.bot.create_channel("bsn-approvals")
+        settings = await self._post_settings(("team_stats", "team_stats_mobile", "bracket", "player_stats", "player_stats_mobile"))
+        settings["approval_channel_id"] = self.approval_channel.id
+        settings["negotiation_channel_id"] = self.bot.create_channel("negotiation").id
+        await settings_service.update("bsn", **settings)
+
+    # --- Driving ---
+
+    async def timed(self, coro):
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.interactions[current_flow.get()].append(time.perf_counter() - start)
+
+    async def think(self):
+        if self.args.think:
+            await asyncio.sleep(self.rng.expovariate(1 / self.args.think))
+
+    async def interact(self, user, message, item, values=None):
+        """Clicks item (attribute name or child index) on the view attached to message."""
+        await self.think()
+        view = message.view
+        if view is None:
+            raise RuntimeError(f"Message in #{message.channel.name} has no view")
+        component = view.children[item] if isinstance(item, int) else getattr(view, item)
+        interaction = FakeInteraction(self.bot, user, message.channel, message)
+        await self.timed(click(view, component, interaction, values))
+        return interaction
+
+    async def fill_modal(self, user, channel, modal, texts):
+        await self.think()
+        interaction = FakeInteraction(self.bot, user, channel)
+        await self.timed(submit(modal, interaction, dict(zip(modal.children, texts))))
+        return interaction
+
+    def latest(self, channel, view_type):
+        message = channel.last_view(view_type)
+        if message is None:
+            raise RuntimeError(f"No {view_type.__name__} in #{channel.name}")
+        return message
+
+    def match_picker(self, channel):
+        # enter_result answers with an ad hoc View holding a single "Select Match" menu
+        for message in reversed(list(channel.messages.values())):
+            if message.view is not None and message.view.children and getattr(message.view.children[0], "placeholder", None) == "Select Match":
+                return message
+        raise RuntimeError(f"No match picker in #{channel.name}")
+
+    async def run_user(self, flow, index):
+        current_flow.set(flow)
+        if self.args.ramp:
+            await asyncio.sleep(self.rng.random() * self.args.ramp)
+        start = time.perf_counter()
+        try:
+            await getattr(self, f"{flow}_flow")(index)
+            self.completed[flow] += 1
+        except Exception as e:
+            self.errors[flow] += 1
+            if len(self.error_samples[flow]) < 5:
+                self.error_samples[flow].append(repr(e))
+        self.durations[flow].append(time.perf_counter() - start)
+
+    # --- Flows ---
+
+    async def ticket_flow(self, index):
+        t = ticket_module
+        user = FakeUser(self.bot, name=f"applicant{index}")
+        channel = self.bot.create_channel(f"ticket-{index}", category_id=t.TICKET_CATEGORY_ID, overwrites={user: None})
+        await self.timed(self.ticket_cog.start_interview(channel))
+
+        await self.interact(user, self.latest(channel, t.ContinentView), "select_continent", ["Europe"])
+        await self.interact(user, self.latest(channel, t.ConfirmContinentView), "confirm")
+        await self.interact(user, self.latest(channel, t.AgeView), "select_age", ["17-25"])
+        accounts = self.rng.randint(1, 2)
+        await self.interact(user, self.latest(channel, t.AccountCountView), "select_count", [str(accounts)])
+
+        for a in range(accounts):
+            inter = await self.interact(user, self.latest(channel, t.PlayerTagView), "enter_tag")
+            task = asyncio.create_task(self.fill_modal(user, channel, inter.response.modal, [f"#P{index}X{a}"]))
+            # The modal waits for a screenshot upload before moving on
+            probe = FakeMessage(channel, user, attachments=[FakeAttachment("probe")])
+            waiting = asyncio.create_task(self.bot.until_waiting("message", probe))
+            await asyncio.wait({task, waiting}, return_when=asyncio.FIRST_COMPLETED)
+            waiting.cancel()
+            if not task.done():
+                await self.bot.receive_message(channel, user, attachments=[FakeAttachment(f"https://cdn.example/{index}/{a}.png")])
+            await task
+
+        while True:
+            message = channel.last_view(t.QuestionDoneView)
+            if message is None:
+                break
+            await self.think()
+            await self.bot.receive_message(channel, user, f"Answer from {user.name}")
+            await self.interact(user, message, "done")
+
+        for a in range(accounts):
+            await self.interact(user, self.latest(channel, t.ClanTypeSelectionView), "select_type", ["Regular"])
+            selection = self.latest(channel, t.ClanSelectionView)
+            await self.interact(user, selection, "select_clan", [selection.view.select_clan.options[0].value])
+
+        thread = channel.threads[0]
+        approval = self.latest(thread, t.ApprovalView)
+        clan = next(c for c in self.clans if c["clan_tag"] == ticket_sessions.get(channel.id)["accounts"][0]["selected_clan_tag"])
+        leader = FakeUser(self.bot, id=clan["leader_id"], name=f"leader{clan['leader_id']}", roles=[FakeRole(clan["leadership_role_id"])])
+        await self.interact(leader, approval, 0) # accept_0
+
+    async def counting_flow(self, index):
+        user = FakeUser(self.bot, name=f"counter{index}")
+        for _ in range(COUNTS_PER_USER):
+            await self.think()
+            # Post the number after the last accepted one, as a member reading the
+            # channel would; users posting at the same moment still collide
+            state = await mongo_manager.get_counting_channel(self.bot.guild.id)
+            message = await self.timed(self.bot.receive_message(self.counting_channel, user, str(state["current_count"] + 1)))
+            if message.deleted:
+                self.rejected[current_flow.get()] += 1
+            await asyncio.sleep(0) # let someone else count in between
+
+    async def buc_flow(self, index):
+        b = buc_module
+        user = FakeUser(self.bot, name=f"captain{index}")
+        channel = self.bot.create_channel(f"buc-{index}")
+
+        panel = await channel.send(view=b.RegistrationView())
+        inter = await self.interact(user, panel, "register_team")
+        tags = [f"#B{index}X{p}" for p in range(5)]
+        await self.fill_modal(user, channel, inter.response.modal, [f"Load Team {index}", tags[0], ", ".join(tags)])
+
+        # Admin enters this user's match result: pick match, stats for both teams, finalize
+        match = self.buc_matches[index % len(self.buc_matches)]
+        dashboard = await channel.send(view=b.ManageMatchesView())
+        await self.interact(self.admin, dashboard, "enter_result")
+        await self.interact(self.admin, self.match_picker(channel), 0, [match["id"]])
+        submission = self.latest(channel, b.MatchSubmissionView)
+        for button in (0, 1): # team1 / team2 stats
+            inter = await self.interact(self.admin, submission, button)
+            modal = inter.response.modal
+            await self.fill_modal(self.admin, channel, modal, [f"{self.rng.randint(0, 3)}, {self.rng.randint(40, 100)}" for _ in modal.children])
+        await self.interact(self.admin, submission, 2) # finalize
+
+    async def bsn_flow(self, index):
+        b = bsn_module
+        user = FakeUser(self.bot, name=f"bsn_captain{index}")
+        channel = self.bot.create_channel(f"bsn-{index}")
+        tags = [f"#N{index}X{th}" for th in (18, 17, 16)]
+        for tag, th in zip(tags, (18, 17, 16)):
+            coc_api.client.add_player(tag, f"BSN {index} TH{th}", th)
+
+        panel = await channel.send(view=b.BSNRegistrationView())
+        inter = await self.interact(user, panel, "register_team")
+        team_name = f"BSN Load Team {index}"
+        await self.fill_modal(user, channel, inter.response.modal, [team_name, tags[0], *tags])
+
+        application = next(m for m in reversed(list(self.approval_channel.messages.values()))
+                           if m.embeds and m.embeds[0].fields and m.embeds[0].fields[0].value == team_name)
+        await self.interact(self.admin, application, "approve")
+
+        match = self.bsn_matches[index % len(self.bsn_matches)]
+        dashboard = await channel.send(view=b.BSNManageMatchesView())
+        await self.interact(self.admin, dashboard, "enter_result")
+        await self.interact(self.admin, self.match_picker(channel), 0, [match["id"]])
+        entry = self.latest(channel, b.BSNResultEntryView)
+        for button in (0, 1): # team1 / team2 stats
+            inter = await self.interact(self.admin, entry, button)
+            await self.fill_modal(self.admin, channel, inter.response.modal, [f"{self.rng.randint(0, 3)} {self.rng.randint(40, 100)}" for _ in range(3)])
+
+    # --- Run ---
+
+    async def run(self):
+        await self.setup()
+        if self.args.tuned_runtime:
+            runtime.freeze_gc()
+        tasks = [self.run_user(flow, i) for flow, count in self.plan.items() for i in range(count)]
+        self.rng.shuffle(tasks)
+        self.rest.calls.clear() # drop setup traffic
+        start = time.perf_counter()
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+    def report(self, elapsed):
+        flows = {}
+        for flow in FLOWS:
+            if not self.plan.get(flow):
+                continue
+            users = self.plan[flow]
+            flows[flow] = {
+                "users": users,
+                "completed": self.completed[flow],
+                "errors": self.errors[flow],
+                "error_samples": self.error_samples[flow],
+                "rejected_messages": self.rejected[flow],
+                "interaction_latency": summarize(self.interactions[flow]),
+                "flow_duration": summarize(self.durations[flow]),
+                "rest_calls": self.rest.total(flow),
+                "rest_calls_per_user": round(self.rest.total(flow) / users, 2),
+                "rest_routes": dict(self.rest.calls[flow].most_common()),
+            }
+        return {
+            "meta": {
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "seed": self.args.seed,
+                "users": self.args.users,
+                "rest_latency": self.args.rest_latency,
+                "coc_latency": self.args.coc_latency,
+                "elapsed_s": round(elapsed, 3),
+                "loop": type(asyncio.get_running_loop()).__module__.partition(".")[0],
+                "tuned_runtime": self.args.tuned_runtime,
+                "events_per_s": round(sum(len(v) for v in self.interactions.values()) / elapsed, 1) if elapsed else 0.0,
+            },
+            "flows": flows,
+        }
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        flow, _, weight = part.partition("=")
+        if flow not in FLOWS:
+            raise argparse.ArgumentTypeError(f"Unknown flow '{flow}', expected one of {', '.join(FLOWS)}")
+        mix[flow] = float(weight or 1)
+    return mix
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Drive simulated users through the bot's flows.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("ticket=1,counting=2,buc=1,bsn=1"), help="Flow weights, e.g. ticket=1,counting=2")
+    parser.add_argument("--rest-latency", type=float, default=0.0, help="Seconds added to every Discord REST call")
+    parser.add_argument("--rest-jitter", type=float, default=0.0, help="Extra random seconds (0..jitter) per REST call")
+    parser.add_argument("--coc-latency", type=float, default=0.0, help="Seconds added to every CoC API call")
+    parser.add_argument("--think", type=float, default=0.0, help="Mean user think time between steps, seconds")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Spread user start times over this many seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--verbose", action="store_true", help="Keep the cogs' own log output")
+    parser.add_argument("--tuned-runtime", action="store_true", help="Run on the tuned loop / executor / GC settings (utils/runtime.py)")
+    return parser.parse_args(argv)
+
+async def main(argv=None):
+    args = parse_args(argv)
+    random.seed(args.seed)
+    if args.tuned_runtime:
+        runtime.configure_executor(asyncio.get_running_loop())
+
+    test = LoadTest(args)
+    errors_logger = logging.getLogger("discord.ui")
+    errors_logger.addHandler(_ErrorCounter(test.errors, test.error_samples))
+    errors_logger.propagate = args.verbose
+    if args.verbose:
+        setup_logging()
+    else:
+        for name in ("cogs", "utils"):
+            logging.getLogger(name).addHandler(logging.NullHandler())
+            logging.getLogger(name).propagate = False
+
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        elapsed = await test.run()
+    report = test.report(elapsed)
+
+    for flow, r in report["flows"].items():
+        lat = r["interaction_latency"]
+        print(f"{flow:<9} users {r['users']:>6}  ok {r['completed']:>6}  errors {r['errors']:>4}  "
+              f"p50 {lat['p50_ms']:>9} ms  p95 {lat['p95_ms']:>9} ms  p99 {lat['p99_ms']:>9} ms  "
+              f"rest/user {r['rest_calls_per_user']:>7}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+    return 0
+
+if __name__ == "__main__":
+    if runtime.tuned_runtime_enabled():
+        runtime.install()
+    sys.exit(asyncio.run(main()))
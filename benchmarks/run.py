@@ -0,0 +1,236 @@
+# Offline benchmarks for the tournament compute paths.
+#
+#   python -m benchmarks.run --scenarios small,medium --output bench.json
+#   python -m benchmarks.run --baseline bench.json   # exit code 1 on regression
+#
+# Every path runs against a fresh in-memory database and fake Discord objects,
+# so nothing here talks to Mongo, Discord or the CoC API.
+
+import argparse
+import asyncio
+import datetime
+import importlib
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from utils.mongo_manager import mongo_manager
+from utils.settings_service import settings_service
+from utils.storage_backends import MemoryBackend
+from benchmarks import synthetic
+from benchmarks.fakes import FakeBot, FakeInteraction
+
+buc_module = importlib.import_module("cogs.BUC CUP.buc_system")
+bsn_module = importlib.import_module("cogs.bsn_cup.bsn_cup_system")
+
+ARGS = None
+
+# --- Setup ---
+
+async def _fresh_context(seed):
+    backend = MemoryBackend()
+    mongo_manager.use_backend(backend)
+    settings_service.invalidate()
+    # Skip connect() so its log line doesn't end up in the JSON on stdout
+    db = mongo_manager.db = await backend.connect()
+    await backend.ensure_indexes(db)
+    random.seed(seed) # gen_se shuffles with the global RNG
+    return {"db": db, "bot": FakeBot(), "rng": synthetic.seed_rng(seed)}
+
+async def _post(bot, title):
+    channel = bot.create_channel(title)
+    msg = await channel.send(content=title)
+    return channel.id, msg.id
+
+async def setup_buc(scenario, seed, with_matches=True):
+    ctx = await _fresh_context(seed)
+    bot, rng = ctx["bot"], ctx["rng"]
+    teams = synthetic.buc_teams(rng, scenario["teams"], scenario["players"])
+    for t in teams:
+        await mongo_manager.save_buc_team(t)
+    if with_matches:
+        for m in synthetic.buc_matches(rng, teams, scenario["matches"]):
+            await mongo_manager.save_buc_match(m)
+
+    settings = {}
+    for key in ("leaderboard", "leaderboard_mobile", "player_stats", "player_stats_mobile"):
+        settings[f"{key}_channel_id"], settings[f"{key}_message_id"] = await _post(bot, key)
+    await settings_service.update("buc", **settings)
+
+    ctx["cog"] = bot.add_cog(buc_module.BUCSystem(bot))
+    ctx["teams"] = teams
+    return ctx
+
+async def setup_bsn(scenario, seed, with_matches=True):
+    ctx = await _fresh_context(seed)
+    bot, rng = ctx["bot"], ctx["rng"]
+    teams = synthetic.bsn_teams(rng, scenario["teams"])
+    if not with_matches:
+        for t in teams:
+            t["eliminated"] = False
+    for t in teams:
+        await mongo_manager.save_bsn_team(t)
+    matches = synthetic.bsn_matches(rng, teams, scenario["matches"]) if with_matches else []
+    for m in matches:
+        await mongo_manager.save_bsn_match(m)
+
+    settings = {"negotiation_channel_id": bot.create_channel("negotiation").id}
+    for key in ("team_stats", "team_stats_mobile", "bracket"):
+        settings[f"{key}_channel_id"], settings[f"{key}_message_id"] = await _post(bot, key)
+    await settings_service.update("bsn", **settings)
+
+    ctx["cog"] = bot.add_cog(bsn_module.BSNCupSystem(bot))
+    ctx["teams"] = teams
+    ctx["matches"] = matches
+    return ctx
+
+# --- Paths ---
+
+async def setup_generate_r1(scenario, seed):
+    limited = dict(scenario, teams=min(scenario["teams"], ARGS.r1_max_teams))
+    return await setup_buc(limited, seed, with_matches=False)
+
+async def setup_leaderboard_embed(scenario, seed):
+    ctx = await setup_buc(scenario, seed, with_matches=False)
+    ctx["sorted_teams"] = synthetic.buc_sorted_teams(ctx["rng"], ctx["teams"])
+    return ctx
+
+async def setup_team_stats_embed(scenario, seed):
+    ctx = await setup_bsn(scenario, seed)
+    ctx["sorted_teams"] = synthetic.bsn_sorted_teams(ctx["matches"], ctx["teams"])
+    return ctx
+
+async def run_update_leaderboard(ctx):
+    await ctx["cog"].update_leaderboard()
+
+async def run_update_player_stats(ctx):
+    await ctx["cog"].update_player_stats()
+
+async def run_leaderboard_embed(ctx):
+    ctx["cog"]._generate_leaderboard_embed(ctx["sorted_teams"], mobile=False)
+    ctx["cog"]._generate_leaderboard_embed(ctx["sorted_teams"], mobile=True)
+
+async def run_team_stats_embed(ctx):
+    ctx["cog"]._generate_team_stats_embed(ctx["sorted_teams"], ctx["teams"], mobile=False)
+    ctx["cog"]._generate_team_stats_embed(ctx["sorted_teams"], ctx["teams"], mobile=True)
+
+async def run_generate_r1(ctx):
+    view = buc_module.ManageMatchesView()
+    await view.generate_r1.callback(FakeInteraction(ctx["bot"]))
+
+async def run_gen_se(ctx):
+    view = bsn_module.BSNManageMatchesView()
+    await view.gen_se.callback(FakeInteraction(ctx["bot"]))
+
+async def setup_gen_se(scenario, seed):
+    return await setup_bsn(scenario, seed, with_matches=False)
+
+PATHS = {
+    "buc.update_leaderboard": (setup_buc, run_update_leaderboard),
+    "buc.update_player_stats": (setup_buc, run_update_player_stats),
+    "buc._generate_leaderboard_embed": (setup_leaderboard_embed, run_leaderboard_embed),
+    "buc.generate_r1": (setup_generate_r1, run_generate_r1),
+    "bsn._generate_team_stats_embed": (setup_team_stats_embed, run_team_stats_embed),
+    "bsn.gen_se": (setup_gen_se, run_gen_se),
+}
+
+# --- Measurement ---
+
+async def measure(path, scenario_name, scenario, repeats, seed):
+    setup, run = PATHS[path]
+    timings = []
+    for i in range(repeats):
+        ctx = await setup(scenario, seed + i)
+        start = time.perf_counter()
+        await run(ctx)
+        timings.append(time.perf_counter() - start)
+
+    # Separate pass for allocations so tracing overhead stays out of the timings
+    ctx = await setup(scenario, seed)
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    await run(ctx)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "path": path,
+        "scenario": scenario_name,
+        **scenario,
+        "repeats": repeats,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "max_s": max(timings),
+        "peak_alloc_kib": round((peak - base) / 1024, 1),
+        "retained_alloc_kib": round((current - base) / 1024, 1),
+    }
+
+def compare(results, baseline, threshold):
+    previous = {(r["path"], r["scenario"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = previous.get((r["path"], r["scenario"]))
+        if not old or old["median_s"] <= 0:
+            continue
+        change = r["median_s"] / old["median_s"] - 1
+        r["change_vs_baseline"] = round(change, 4)
+        if change > threshold:
+            regressions.append(r)
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark tournament compute paths offline.")
+    parser.add_argument("--scenarios", default="small,medium,large", help=f"Comma separated, from: {', '.join(synthetic.SCENARIOS)}")
+    parser.add_argument("--paths", default=",".join(PATHS), help="Comma separated path names")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--r1-max-teams", type=int, default=256, help="generate_r1 is quadratic in teams; cap it")
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--baseline", help="Previous JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed median slowdown before failing")
+    return parser.parse_args(argv)
+
+async def main(argv=None):
+    global ARGS
+    ARGS = parse_args(argv)
+
+    results = []
+    for scenario_name in ARGS.scenarios.split(","):
+        scenario = synthetic.SCENARIOS[scenario_name]
+        for path in ARGS.paths.split(","):
+            r = await measure(path, scenario_name, scenario, ARGS.repeats, ARGS.seed)
+            results.append(r)
+            print(f"{path:<34} {scenario_name:<7} median {r['median_s'] * 1000:>10.2f} ms  peak {r['peak_alloc_kib']:>10.1f} KiB", file=sys.stderr)
+
+    regressions = []
+    if ARGS.baseline:
+        with open(ARGS.baseline) as f:
+            regressions = compare(results, json.load(f), ARGS.threshold)
+        for r in regressions:
+            print(f"REGRESSION: {r['path']} [{r['scenario']}] +{r['change_vs_baseline'] * 100:.1f}%", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": ARGS.seed,
+            "repeats": ARGS.repeats,
+        },
+        "results": results,
+    }
+    if ARGS.output:
+        with open(ARGS.output, "w") as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
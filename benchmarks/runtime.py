@@ -0,0 +1,94 @@
+# Event throughput of the stock asyncio runtime against the tuned one.
+#
+#   python -m benchmarks.runtime --users 2000 --repeat 3 --output runtime.json
+#
+# Runs the load test (benchmarks.loadtest) in a fresh process per runtime and
+# repetition, since the loop policy and gc.freeze() are process wide:
+#   default        stock asyncio loop and GC settings
+#   tuned-asyncio  executor size and GC tuning, asyncio loop (UVLOOP=0)
+#   tuned          the same on uvloop, if it is installed
+# and reports events (interactions and messages) per second, the median
+# interaction p99 and the wall time per variant.
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+
+VARIANTS = {
+    "default": ([], {}),
+    "tuned-asyncio": (["--tuned-runtime"], {"UVLOOP": "0"}),
+    "tuned": (["--tuned-runtime"], {}),
+}
+
+def run_loadtest(args, extra_args, extra_env):
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        output = f.name
+    try:
+        cmd = [sys.executable, "-m", "benchmarks.loadtest", "--users", str(args.users), "--seed", str(args.seed),
+               "--output", output, *extra_args]
+        subprocess.run(cmd, env={**os.environ, **extra_env}, check=True, stderr=subprocess.DEVNULL)
+        with open(output) as f:
+            return json.load(f)
+    finally:
+        os.unlink(output)
+
+def summarize_runs(reports):
+    p99s = [max(flow["interaction_latency"]["p99_ms"] for flow in r["flows"].values()) for r in reports]
+    return {
+        "loop": reports[0]["meta"]["loop"],
+        "events_per_s": round(statistics.median(r["meta"]["events_per_s"] for r in reports), 1),
+        "p99_ms": round(statistics.median(p99s), 3),
+        "elapsed_s": round(statistics.median(r["meta"]["elapsed_s"] for r in reports), 3),
+        "errors": sum(flow["errors"] for r in reports for flow in r["flows"].values()),
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare event throughput of the default and tuned runtimes.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--variants", default=",".join(VARIANTS), help="Comma separated subset of " + ", ".join(VARIANTS))
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {}
+    for name in args.variants.split(","):
+        extra_args, extra_env = VARIANTS[name]
+        results[name] = summarize_runs([run_loadtest(args, extra_args, extra_env) for _ in range(args.repeat)])
+        if name == "tuned" and results[name]["loop"] != "uvloop":
+            print("uvloop is not installed; 'tuned' ran on asyncio", file=sys.stderr)
+
+    baseline = results.get("default")
+    for name, r in results.items():
+        speedup = f"{r['events_per_s'] / baseline['events_per_s']:.2f}x" if baseline and baseline["events_per_s"] else "-"
+        print(f"{name:<14} loop {r['loop']:<8} events/s {r['events_per_s']:>10}  {speedup:>6}  "
+              f"p99 {r['p99_ms']:>9} ms  elapsed {r['elapsed_s']:>7} s  errors {r['errors']}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "users": args.users,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "variants": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# Synthetic tournament data shaped like the documents the cup cogs store.
+
+import random
+
+SCENARIOS = {
+    "small": {"teams": 8, "matches": 28, "players": 5},
+    "medium": {"teams": 64, "matches": 512, "players": 5},
+    "large": {"teams": 256, "matches": 4096, "players": 5},
+    "xl": {"teams": 1024, "matches": 16384, "players": 5},
+}
+
+def _tag(rng):
+    return "#" + "".join(rng.choice("0289PYLQGRJCUV") for _ in range(9))
+
+def _pairings(rng, team_names, count):
+    pairs = []
+    while len(pairs) < count:
+        t1, t2 = rng.sample(team_names, 2)
+        pairs.append((t1, t2))
+    return pairs
+
+# --- BUC ---
+
+def buc_teams(rng, teams, players):
+    result = []
+    for i in range(teams):
+        roster = [{"tag": _tag(rng), "name": f"Player {i}-{p}"} for p in range(players)]
+        team = {
+            "name": f"BUC Team {i:04d}",
+            "captain_tag": roster[0]["tag"],
+            "captain_name": roster[0]["name"],
+            "players": roster,
+            "captain_discord_id": 10**17 + i
+        }
+        if rng.random() < 0.1:
+            team["penalty_points"] = rng.randint(1, 2)
+        result.append(team)
+    return result
+
+def buc_matches(rng, teams, count, completed_ratio=0.8):
+    names = [t["name"] for t in teams]
+    rosters = {t["name"]: t["players"] for t in teams}
+    result = []
+    for i, (t1, t2) in enumerate(_pairings(rng, names, count)):
+        match = {
+            "id": f"R1_D{i // 8 + 1}_M{i % 8 + 1}_{i}",
+            "label": f"Day {i // 8 + 1} - Match {i % 8 + 1}",
+            "day": i // 8 + 1,
+            "team1": t1,
+            "team2": t2,
+            "round": 1,
+            "completed": False,
+            "winner": None,
+            "score1": 0, "score2": 0, "percent1": 0.0, "percent2": 0.0,
+            "team1_stats": [], "team2_stats": []
+        }
+        if rng.random() < completed_ratio:
+            for key, team in (("team1_stats", t1), ("team2_stats", t2)):
+                match[key] = [
+                    {"tag": p["tag"], "name": p["name"], "stars": rng.randint(0, 3), "percent": float(rng.randint(0, 100))}
+                    for p in rosters[team]
+                ]
+            s1 = sum(p["stars"] for p in match["team1_stats"])
+            s2 = sum(p["stars"] for p in match["team2_stats"])
+            p1 = sum(p["percent"] for p in match["team1_stats"]) / 5.0
+            p2 = sum(p["percent"] for p in match["team2_stats"]) / 5.0
+            winner = t1 if (s1, p1) > (s2, p2) else t2 if (s2, p2) > (s1, p1) else "Tie"
+            match.update({"score1": s1, "score2": s2, "percent1": p1, "percent2": p2, "winner": winner, "completed": True})
+        result.append(match)
+    return result
+
+# --- BSN ---
+
+def bsn_teams(rng, teams):
+    result = []
+    for i in range(teams):
+        roster = [{"tag": _tag(rng), "name": f"BSN Player {i}-{th}", "th": th} for th in (18, 17, 16)]
+        result.append({
+            "name": f"BSN Team {i:04d}",
+            "captain_tag": roster[0]["tag"],
+            "captain_name": roster[0]["name"],
+            "players": roster,
+            "captain_discord_id": 10**17 + i,
+            "status": "active",
+            "eliminated": rng.random() < 0.25
+        })
+    return result
+
+def bsn_matches(rng, teams, count, completed_ratio=0.8):
+    names = [t["name"] for t in teams]
+    result = []
+    for i, (t1, t2) in enumerate(_pairings(rng, names, count)):
+        match = {
+            "id": f"R1_M{i + 1}",
+            "label": f"Round 1 - Match {i + 1}",
+            "team1": t1,
+            "team2": t2,
+            "round": 1,
+            "completed": False,
+            "winner": None
+        }
+        if rng.random() < completed_ratio:
+            for side in ("team1", "team2"):
+                details = [{"stars": rng.randint(0, 3), "perc": float(rng.randint(0, 100))} for _ in range(3)]
+                match[f"{side}_details"] = details
+                match[f"{side}_total_stars"] = sum(d["stars"] for d in details)
+                match[f"{side}_total_perc"] = sum(d["perc"] for d in details)
+            s1, s2 = match["team1_total_stars"], match["team2_total_stars"]
+            p1, p2 = match["team1_total_perc"], match["team2_total_perc"]
+            match["winner"] = t1 if (s1, p1) > (s2, p2) else t2 if (s2, p2) > (s1, p1) else "Draw"
+            match["completed"] = True
+        result.append(match)
+    return result
+
+def bsn_sorted_teams(matches, teams):
+    # Same aggregation BSNCupSystem.update_team_stats feeds into _generate_team_stats_embed
+    stats = {t["name"]: {"wins": 0, "losses": 0, "draws": 0, "played": 0, "total_stars": 0, "total_perc": 0.0} for t in teams}
+    for m in matches:
+        if not m["completed"]: continue
+        for side in ("team1", "team2"):
+            if m[side] in stats:
+                stats[m[side]]["total_stars"] += m.get(f"{side}_total_stars", 0)
+                stats[m[side]]["total_perc"] += m.get(f"{side}_total_perc", 0.0)
+        if m["winner"] in stats:
+            stats[m["winner"]]["wins"] += 1
+    return sorted(stats.items(), key=lambda x: (x[1]["wins"], x[1]["total_stars"], x[1]["total_perc"]), reverse=True)
+
+def buc_sorted_teams(rng, teams):
+    rows = []
+    for t in teams:
+        played = rng.randint(0, 7)
+        wins = rng.randint(0, played)
+        rows.append((t["name"], {
+            "points": wins * 2, "stars": rng.randint(0, 15 * played), "total_percent": rng.random() * 100 * played,
+            "played": played, "wins": wins, "losses": played - wins, "ties": 0
+        }))
+    return sorted(rows, key=lambda x: (x[1]["points"], x[1]["stars"], x[1]["total_percent"]), reverse=True)
+
+def seed_rng(seed):
+    return random.Random(seed)
@@ -1,23 +1,35 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.mongo_manager import mongo_manager
+from utils.mongo_manager import mongo_manager, VersionConflict
 from utils.coc_api import coc_api
+from utils.buc_odds import results_fingerprint, simulate_r1_odds
+from utils.tracked_document import TrackedDocument
+from utils.settings_service import settings_service
+import asyncio
 import datetime
 import itertools
+import logging
+
+log = logging.getLogger(__name__)
 
 class BUCSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self._odds_cache = None # (fingerprint, odds)
 
     async def cog_load(self):
-        print("BUC System Cog Loaded")
-        self.bot.add_view(RegistrationView())
-        self.bot.add_view(DashboardView())
-        self.bot.add_view(ManageTeamsView())
-        self.bot.add_view(ManageMatchesView())
-        self.bot.add_view(MatchupsView())
-        self.bot.add_view(TeamListView())
+        log.info("BUC System Cog Loaded")
+        self._views = [RegistrationView(), DashboardView(), ManageTeamsView(), ManageMatchesView(), MatchupsView(), TeamListView()]
+        for view in self._views:
+            self.bot.add_view(view)
+        self.bot.add_dynamic_items(BUCResultButton)
+
+    async def cog_unload(self):
+        # Persistent views outlive the cog unless stopped (e.g. when lazy_cogs unloads it)
+        for view in self._views:
+            view.stop()
+        self.bot.remove_dynamic_items(BUCResultButton)
 
     async def ensure_team_player_names(self, team):
         """Helper to ensure all players in a team have names fetched."""
@@ -58,12 +70,12 @@ class BUCSystem(commands.Cog):
 
     # --- Helper: Update Leaderboard ---
     async def update_leaderboard(self):
-        settings = await mongo_manager.get_buc_settings()
-        if not settings or "leaderboard_channel_id" not in settings or "leaderboard_message_id" not in settings:
+        settings = await settings_service.get("buc")
+        posted = settings.posted_message("leaderboard")
+        if not posted:
             return
 
-        channel_id = settings["leaderboard_channel_id"]
-        message_id = settings["leaderboard_message_id"]
+        channel_id, message_id = posted
         channel = self.bot.get_channel(channel_id)
         if not channel:
             return
@@ -122,26 +134,28 @@ class BUCSystem(commands.Cog):
         sorted_teams = sorted(team_stats.items(), key=lambda x: (x[1]["points"], x[1]["stars"], x[1]["total_percent"]), reverse=True)
 
         # --- Update PC Leaderboard ---
-        if "leaderboard_channel_id" in settings and "leaderboard_message_id" in settings:
+        posted = settings.posted_message("leaderboard")
+        if posted:
             try:
-                channel = self.bot.get_channel(settings["leaderboard_channel_id"])
+                channel = self.bot.get_channel(posted[0])
                 if channel:
-                    msg = await channel.fetch_message(settings["leaderboard_message_id"])
+                    msg = await channel.fetch_message(posted[1])
                     embed = self._generate_leaderboard_embed(sorted_teams, mobile=False)
                     await msg.edit(embed=embed)
             except Exception as e:
-                print(f"Failed to update PC leaderboard: {e}")
+                log.warning("Failed to update PC leaderboard: %s", e)
 
         # --- Update Mobile Leaderboard ---
-        if "leaderboard_mobile_channel_id" in settings and "leaderboard_mobile_message_id" in settings:
+        posted = settings.posted_message("leaderboard_mobile")
+        if posted:
             try:
-                channel = self.bot.get_channel(settings["leaderboard_mobile_channel_id"])
+                channel = self.bot.get_channel(posted[0])
                 if channel:
-                    msg = await channel.fetch_message(settings["leaderboard_mobile_message_id"])
+                    msg = await channel.fetch_message(posted[1])
                     embed = self._generate_leaderboard_embed(sorted_teams, mobile=True)
                     await msg.edit(embed=embed)
             except Exception as e:
-                print(f"Failed to update Mobile leaderboard: {e}")
+                log.warning("Failed to update Mobile leaderboard: %s", e)
 
     def _generate_leaderboard_embed(self, sorted_teams, mobile=False):
         title = "🏆 BUC CUP Leaderboard (Round 1)" + (" [Mobile]" if mobile else "")
@@ -180,12 +194,12 @@ class BUCSystem(commands.Cog):
 
     # --- Helper: Update Bracket ---
     async def update_bracket(self):
-        settings = await mongo_manager.get_buc_settings()
-        if not settings or "bracket_channel_id" not in settings or "bracket_message_id" not in settings:
+        settings = await settings_service.get("buc")
+        posted = settings.posted_message("bracket")
+        if not posted:
             return
 
-        channel_id = settings["bracket_channel_id"]
-        message_id = settings["bracket_message_id"]
+        channel_id, message_id = posted
         channel = self.bot.get_channel(channel_id)
         if not channel:
             return
@@ -236,12 +250,12 @@ class BUCSystem(commands.Cog):
 
     # --- Helper: Update Player Stats ---
     async def update_player_stats(self):
-        settings = await mongo_manager.get_buc_settings()
-        if not settings or "player_stats_channel_id" not in settings or "player_stats_message_id" not in settings:
+        settings = await settings_service.get("buc")
+        posted = settings.posted_message("player_stats")
+        if not posted:
             return
 
-        channel_id = settings["player_stats_channel_id"]
-        message_id = settings["player_stats_message_id"]
+        channel_id, message_id = posted
         channel = self.bot.get_channel(channel_id)
         if not channel:
             return
@@ -306,26 +320,28 @@ class BUCSystem(commands.Cog):
         sorted_players = sorted(results, key=lambda x: (x["stars"], x["avg_percent"]), reverse=True)
         
         # --- Update PC Player Stats ---
-        if "player_stats_channel_id" in settings and "player_stats_message_id" in settings:
+        posted = settings.posted_message("player_stats")
+        if posted:
             try:
-                channel = self.bot.get_channel(settings["player_stats_channel_id"])
+                channel = self.bot.get_channel(posted[0])
                 if channel:
-                    msg = await channel.fetch_message(settings["player_stats_message_id"])
+                    msg = await channel.fetch_message(posted[1])
                     embed = self._generate_player_stats_embed(sorted_players, mobile=False)
                     await msg.edit(embed=embed)
             except Exception as e:
-                print(f"Failed to update PC player stats: {e}")
+                log.warning("Failed to update PC player stats: %s", e)
 
         # --- Update Mobile Player Stats ---
-        if "player_stats_mobile_channel_id" in settings and "player_stats_mobile_message_id" in settings:
+        posted = settings.posted_message("player_stats_mobile")
+        if posted:
             try:
-                channel = self.bot.get_channel(settings["player_stats_mobile_channel_id"])
+                channel = self.bot.get_channel(posted[0])
                 if channel:
-                    msg = await channel.fetch_message(settings["player_stats_mobile_message_id"])
+                    msg = await channel.fetch_message(posted[1])
                     embed = self._generate_player_stats_embed(sorted_players, mobile=True)
                     await msg.edit(embed=embed)
             except Exception as e:
-                print(f"Failed to update Mobile player stats: {e}")
+                log.warning("Failed to update Mobile player stats: %s", e)
 
     def _generate_player_stats_embed(self, sorted_players, mobile=False):
         title = "🌟 BUC CUP Player Leaderboard" + (" [Mobile]" if mobile else "")
@@ -360,6 +376,33 @@ class BUCSystem(commands.Cog):
         embed.timestamp = datetime.datetime.now()
         return embed
 
+    # --- Helper: Qualification Odds ---
+    async def get_qualification_odds(self):
+        teams = await mongo_manager.get_buc_teams()
+        matches = await mongo_manager.get_buc_matches()
+
+        # Cached until a result (or penalty / team change) alters the Round 1 table
+        fingerprint = results_fingerprint(teams, matches)
+        if self._odds_cache and self._odds_cache[0] == fingerprint:
+            return self._odds_cache[1]
+
+        odds = await asyncio.to_thread(simulate_r1_odds, teams, matches)
+        self._odds_cache = (fingerprint, odds)
+        return odds
+
+    def _generate_odds_embed(self, odds):
+        embed = discord.Embed(title="📈 BUC CUP Qualification Odds (Round 1)", color=discord.Color.teal())
+        header = f"{'Rk':<3} {'Team':<15} {'Pts':<3} {'Top 4':>6} {'Top 2':>6}"
+        rows = []
+        for i, t in enumerate(odds["teams"]):
+            t_name = (t["name"][:13] + "..") if len(t["name"]) > 15 else t["name"]
+            rows.append(f"#{i + 1:<2} {t_name:<15} {t['points']:<3} {t['top4'] * 100:>5.1f}% {t['top2'] * 100:>5.1f}%")
+        table = "\n".join([header, "-" * len(header)] + rows)
+        embed.description = f"```text\n{table}\n```\nTop 4 qualify for Round 2 (Page Playoff) 🟢"
+        embed.set_footer(text=f"{odds['simulations']:,} simulations • {odds['remaining']} matches remaining")
+        embed.timestamp = datetime.datetime.now()
+        return embed
+
     # --- Commands ---
 
     def is_owner():
@@ -399,9 +442,7 @@ class BUCSystem(commands.Cog):
         await interaction.response.send_message(embed=embed)
         message = await interaction.original_response()
         
-        settings = await mongo_manager.get_buc_settings() or {}
-        settings.update({"leaderboard_channel_id": message.channel.id, "leaderboard_message_id": message.id})
-        await mongo_manager.save_buc_settings(settings)
+        await settings_service.update("buc", leaderboard_channel_id=message.channel.id, leaderboard_message_id=message.id)
         await self.update_leaderboard()
 
     @app_commands.command(name="buc_leaderboard_mobile", description="Post the Auto-Updating Leaderboard (Mobile View)")
@@ -411,9 +452,7 @@ class BUCSystem(commands.Cog):
         await interaction.response.send_message(embed=embed)
         message = await interaction.original_response()
         
-        settings = await mongo_manager.get_buc_settings() or {}
-        settings.update({"leaderboard_mobile_channel_id": message.channel.id, "leaderboard_mobile_message_id": message.id})
-        await mongo_manager.save_buc_settings(settings)
+        await settings_service.update("buc", leaderboard_mobile_channel_id=message.channel.id, leaderboard_mobile_message_id=message.id)
         await self.update_leaderboard()
 
     @app_commands.command(name="buc_bracket", description="Post the Auto-Updating Bracket")
@@ -423,10 +462,7 @@ class BUCSystem(commands.Cog):
         await interaction.response.send_message(embed=embed)
         message = await interaction.original_response()
         
-        # We need to merge settings, not overwrite
-        current_settings = await mongo_manager.get_buc_settings() or {}
-        current_settings.update({"bracket_channel_id": message.channel.id, "bracket_message_id": message.id})
-        await mongo_manager.save_buc_settings(current_settings)
+        await settings_service.update("buc", bracket_channel_id=message.channel.id, bracket_message_id=message.id)
         await self.update_bracket()
 
     @app_commands.command(name="buc_matchups", description="Show Matchups Schedule")
@@ -459,6 +495,17 @@ class BUCSystem(commands.Cog):
         embed = await view.get_embed(pages, sorted_days, 0)
         await interaction.response.send_message(embed=embed, view=view)
 
+    @app_commands.command(name="buc_odds", description="Projected chances of finishing Top 4 / Top 2 in Round 1")
+    async def buc_odds(self, interaction: discord.Interaction):
+        # Public command
+        if not await mongo_manager.get_buc_teams():
+            await interaction.response.send_message("No teams registered yet.", ephemeral=True)
+            return
+        await interaction.response.defer()
+
+        odds = await self.get_qualification_odds()
+        await interaction.followup.send(embed=self._generate_odds_embed(odds))
+
     @app_commands.command(name="buc_player_stats", description="Post the Player Stats Leaderboard (PC View)")
     @is_owner()
     async def buc_player_stats(self, interaction: discord.Interaction):
@@ -466,9 +513,7 @@ class BUCSystem(commands.Cog):
         await interaction.response.send_message(embed=embed)
         message = await interaction.original_response()
         
-        current_settings = await mongo_manager.get_buc_settings() or {}
-        current_settings.update({"player_stats_channel_id": message.channel.id, "player_stats_message_id": message.id})
-        await mongo_manager.save_buc_settings(current_settings)
+        await settings_service.update("buc", player_stats_channel_id=message.channel.id, player_stats_message_id=message.id)
         await self.update_player_stats()
 
     @app_commands.command(name="buc_player_stats_mobile", description="Post the Player Stats Leaderboard (Mobile View)")
@@ -478,9 +523,7 @@ class BUCSystem(commands.Cog):
         await interaction.response.send_message(embed=embed)
         message = await interaction.original_response()
         
-        current_settings = await mongo_manager.get_buc_settings() or {}
-        current_settings.update({"player_stats_mobile_channel_id": message.channel.id, "player_stats_mobile_message_id": message.id})
-        await mongo_manager.save_buc_settings(current_settings)
+        await settings_service.update("buc", player_stats_mobile_channel_id=message.channel.id, player_stats_mobile_message_id=message.id)
         await self.update_player_stats()
 
     @app_commands.command(name="buc_teams", description="View Registered Teams and Rosters")
@@ -1063,63 +1106,63 @@ class TeamStatsModal(discord.ui.Modal):
 class MatchSubmissionView(discord.ui.View):
     def __init__(self, match_data):
         super().__init__(timeout=None)
-        self.match_data = match_data
+        for action in ("team1_stats", "team2_stats", "finalize"):
+            self.add_item(BUCResultButton(action, match_data["id"]))
+
+async def get_team_players(team_name):
+    teams = await mongo_manager.get_buc_teams()
+    return next((t for t in teams if t["name"] == team_name), None)
+
+class BUCResultButton(discord.ui.DynamicItem[discord.ui.Button], template=r"buc:result:(?P<action>team1_stats|team2_stats|finalize):(?P<match_id>.+)"):
+    # The match is identified by the custom_id and read back from Mongo on
+    # every click; stats entered so far wait in the match's pending_stats
+    LABELS = {
+        "team1_stats": ("Enter Team 1 Stats", discord.ButtonStyle.primary),
+        "team2_stats": ("Enter Team 2 Stats", discord.ButtonStyle.primary),
+        "finalize": ("Finalize Result", discord.ButtonStyle.success),
+    }
+
+    def __init__(self, action, match_id):
+        label, style = self.LABELS[action]
+        super().__init__(discord.ui.Button(label=label, style=style, custom_id=f"buc:result:{action}:{match_id}"))
+        self.action = action
+        self.match_id = match_id
 
-    async def get_team_players(self, team_name):
-        teams = await mongo_manager.get_buc_teams()
-        team = next((t for t in teams if t["name"] == team_name), None)
-        if team:
-            # Lazy fetch names
-            # We need access to Cog instance to call ensure_team_player_names.
-            # But we are in a View.
-            # We can't easily access Cog instance without passing it or using interaction.client
-            # But this is a helper method, not an interaction callback.
-            # We can just duplicate logic or use a static helper in utils?
-            # Or better: do it in the callback where we have interaction.
-            return team
-        return None
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["action"], match["match_id"])
 
-    @discord.ui.button(label="Enter Team 1 Stats", style=discord.ButtonStyle.primary)
-    async def team1_stats(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Do NOT defer if sending modal
-        team = await self.get_team_players(self.match_data["team1"])
-        if not team:
-            await interaction.response.send_message("Team not found.", ephemeral=True)
+    async def callback(self, interaction: discord.Interaction):
+        if self.action == "finalize":
+            await self.finalize(interaction)
             return
-            
-        cog = interaction.client.get_cog("BUCSystem")
-        if cog:
-            team = await cog.ensure_team_player_names(team)
-            
-        await interaction.response.send_modal(TeamStatsModal(self.match_data, "team1_stats", team["players"]))
 
-    @discord.ui.button(label="Enter Team 2 Stats", style=discord.ButtonStyle.primary)
-    async def team2_stats(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Do NOT defer if sending modal
-        team = await self.get_team_players(self.match_data["team2"])
+        m = await mongo_manager.get_buc_match(self.match_id)
+        team = await get_team_players(m[self.action[:5]]) if m else None
         if not team:
             await interaction.response.send_message("Team not found.", ephemeral=True)
             return
-
+            
         cog = interaction.client.get_cog("BUCSystem")
         if cog:
             team = await cog.ensure_team_player_names(team)
             
-        await interaction.response.send_modal(TeamStatsModal(self.match_data, "team2_stats", team["players"]))
+        await interaction.response.send_modal(TeamStatsModal(self.match_id, self.action, team["players"]))
 
-    @discord.ui.button(label="Finalize Result", style=discord.ButtonStyle.success)
-    async def finalize(self, interaction: discord.Interaction, button: discord.ui.Button):
+    async def finalize(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
-        try:
-            m = self.match_data
-            if not m.get("team1_stats") or not m.get("team2_stats"):
-                await interaction.followup.send("❌ Please enter stats for BOTH teams first.", ephemeral=True)
-                return
+        def finalize_match(m):
+            # Newly entered stats win over the ones already saved (when editing a result)
+            pending = m.get("pending_stats") or {}
+            stats = {key: pending.get(key) or m.get(key) for key in ("team1_stats", "team2_stats")}
+            if not stats["team1_stats"] or not stats["team2_stats"]:
+                return None
                 
-            s1 = sum(p["stars"] for p in m["team1_stats"])
-            p1 = sum(p["percent"] for p in m["team1_stats"]) / 5.0
-            s2 = sum(p["stars"] for p in m["team2_stats"])
-            p2 = sum(p["percent"] for p in m["team2_stats"]) / 5.0
+            s1 = sum(p["stars"] for p in stats["team1_stats"])
+            p1 = sum(p["percent"] for p in stats["team1_stats"]) / 5.0
+            s2 = sum(p["stars"] for p in stats["team2_stats"])
+            p2 = sum(p["percent"] for p in stats["team2_stats"]) / 5.0
             
             winner = None
             if s1 > s2: winner = m["team1"]
@@ -1129,14 +1172,25 @@ class MatchSubmissionView(discord.ui.View):
                 elif p2 > p1: winner = m["team2"]
                 else: winner = "Tie"
                 
+            m.update(stats)
             m.update({
                 "score1": s1, "percent1": p1,
                 "score2": s2, "percent2": p2,
                 "winner": winner,
-                "completed": True
+                "completed": True,
+                "pending_stats": {}
             })
-            
-            await mongo_manager.save_buc_match(m)
+            return winner
+
+        try:
+            # Versioned, so stats entered while finalizing aren't cleared unseen
+            m, winner = await mongo_manager.update_buc_match(self.match_id, finalize_match)
+            if not m:
+                await interaction.followup.send("❌ Match not found.", ephemeral=True)
+                return
+            if winner is None:
+                await interaction.followup.send("❌ Please enter stats for BOTH teams first.", ephemeral=True)
+                return
             
             cog = interaction.client.get_cog("BUCSystem")
             if cog:
@@ -1147,14 +1201,16 @@ class MatchSubmissionView(discord.ui.View):
                 await cog.update_player_stats()
 
             await interaction.followup.send(f"✅ Match Finalized! Winner: {winner}", ephemeral=True)
+        except VersionConflict:
+            await interaction.followup.send("❌ The match was being updated by someone else. Please try again.", ephemeral=True)
         except Exception as e:
-            print(f"Error in finalize: {e}")
+            log.exception("Error in finalize")
             await interaction.followup.send(f"❌ Error finalizing match: {e}", ephemeral=True)
 
 class TeamStatsModal(discord.ui.Modal):
-    def __init__(self, match_data, stats_key, players):
+    def __init__(self, match_id, stats_key, players):
         super().__init__(title="Enter Player Stats")
-        self.match_data = match_data
+        self.match_id = match_id
         self.stats_key = stats_key
         self.players = players # List of {tag, name}
         self.inputs = []
@@ -1196,10 +1252,8 @@ class TeamStatsModal(discord.ui.Modal):
                 await interaction.response.send_message(f"❌ Invalid format for {p['name']}. Use: Stars, Percent", ephemeral=True)
                 return
         
-        self.match_data[self.stats_key] = stats
-        # We don't save to DB yet, just update the object in memory (passed by reference)
-        # Actually we should probably save partial state or just keep it in the View's match_data.
-        # The View holds match_data.
+        # Kept aside on the match until Finalize, so the stored result doesn't change yet
+        await mongo_manager.update_buc_match_field(self.match_id, f"pending_stats.{self.stats_key}", stats)
         await interaction.response.send_message("✅ Stats recorded temporarily. Click Finalize when done.", ephemeral=True)
 
 class MatchDateModal(discord.ui.Modal):
@@ -1210,8 +1264,7 @@ class MatchDateModal(discord.ui.Modal):
         self.add_item(self.date_input)
 
     async def on_submit(self, interaction: discord.Interaction):
-        matches = await mongo_manager.get_buc_matches()
-        match = next((m for m in matches if m["id"] == self.match_id), None)
+        match = await mongo_manager.get_buc_match(self.match_id)
         if match:
             match["date"] = self.date_input.value
             await mongo_manager.save_buc_match(match)
@@ -1244,6 +1297,7 @@ class DayDateModal(discord.ui.Modal):
                 # Check both int and string representation just in case
                 m_day = m.get("day")
                 if m_day == day or str(m_day) == str(day):
+                    m = TrackedDocument(m) # saves just the date
                     m["date"] = self.date_str.value
                     await mongo_manager.save_buc_match(m)
                     count += 1
@@ -1256,7 +1310,7 @@ class DayDateModal(discord.ui.Modal):
                 await interaction.followup.send(f"❌ No matches found for Day {day}. Available days: {days_found}", ephemeral=True)
                 
         except Exception as e:
-            print(f"Error in DayDateModal: {e}")
+            log.exception("Error in DayDateModal")
             await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
 
 class MatchupsView(discord.ui.View):
@@ -1,10 +1,16 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.mongo_manager import mongo_manager
+from utils.mongo_manager import mongo_manager, VersionConflict
 from utils.coc_api import coc_api
+from utils.member_cache import member_cache
+from utils.settings_service import settings_service
+from utils.tracked_document import TrackedDocument
 import datetime
 import itertools
+import logging
+
+log = logging.getLogger(__name__)
 
 # --- Constants ---
 OWNER_ID = 1272176835769405552
@@ -32,6 +38,15 @@ def is_owner():
         return True
     return app_commands.check(predicate)
 
+# --- Helpers ---
+async def find_user(interaction, user_id):
+    """The member or user to DM: from the caches if possible, otherwise one fetch_user call."""
+    guild = interaction.guild
+    user = None
+    if guild is not None:
+        user = guild.get_member(user_id) or member_cache.get(guild.id, user_id)
+    return user or interaction.client.get_user(user_id) or await interaction.client.fetch_user(user_id)
+
 # --- Views and Modals ---
 
 class BSNRegistrationView(discord.ui.View):
@@ -115,9 +130,9 @@ class BSNRegistrationModal(discord.ui.Modal, title="BSN Cup Registration"):
         await mongo_manager.save_bsn_pending_team(team_data)
         
         # 4. Notify Staff
-        settings = await mongo_manager.get_bsn_settings()
-        if settings and "approval_channel_id" in settings:
-            channel = interaction.guild.get_channel(settings["approval_channel_id"])
+        settings = await settings_service.get("bsn")
+        if settings.channel_id("approval"):
+            channel = interaction.guild.get_channel(settings.channel_id("approval"))
             if channel:
                 embed = discord.Embed(title="📝 New BSN Cup Application", color=discord.Color.orange())
                 embed.add_field(name="Team Name", value=t_name, inline=False)
@@ -169,7 +184,7 @@ class BSNApprovalView(discord.ui.View):
         await interaction.response.send_message(f"✅ Team **{team_name}** Approved!", ephemeral=True)
         
         try:
-            user = await interaction.client.fetch_user(applicant_id)
+            user = await find_user(interaction, applicant_id)
             if user:
                 await user.send(f"🎉 **Congratulations!**\nYour team **{team_name}** has been accepted into **BSN Cup Season 3: Pick & Ban Edition**!\nGood luck!")
         except Exception as e:
@@ -208,7 +223,7 @@ class BSNRejectModal(discord.ui.Modal):
         await interaction.followup.send(f"❌ Team **{self.team_name}** Rejected.", ephemeral=True)
         
         try:
-            user = await interaction.client.fetch_user(self.applicant_id)
+            user = await find_user(interaction, self.applicant_id)
             if user:
                 await user.send(f"❌ **Application Update**\nYour application for team **{self.team_name}** in BSN Cup Season 3 has been **REJECTED**.\n\n**Reason:** {self.reason.value}\n\nPlease correct the issues and re-apply if you wish.")
         except Exception as e:
@@ -411,7 +426,7 @@ class BSNEditTeamModal(discord.ui.Modal):
 class BSNSetDateModal(discord.ui.Modal):
     def __init__(self, match_data):
         super().__init__(title="Set Match Date")
-        self.match_data = match_data
+        self.match_data = TrackedDocument(match_data) # saves just the date
         self.date_input = discord.ui.TextInput(label="Date & Time", placeholder="e.g. Friday 8pm EST or 30 Nov 20:00 UTC", default=match_data.get("date_str", ""))
         self.add_item(self.date_input)
 
@@ -772,23 +787,34 @@ class BSNManageMatchesView(discord.ui.View):
 class BSNResultEntryView(discord.ui.View):
     def __init__(self, match_data):
         super().__init__(timeout=None)
-        self.match_data = match_data
+        self.add_item(BSNResultButton("team1", match_data["id"]))
+        self.add_item(BSNResultButton("team2", match_data["id"]))
+
+class BSNResultButton(discord.ui.DynamicItem[discord.ui.Button], template=r"bsn:result:(?P<team_key>team1|team2):(?P<match_id>.+)"):
+    # Only the match id lives in the custom_id; the match is read from Mongo on click
+    def __init__(self, team_key, match_id):
+        super().__init__(discord.ui.Button(
+            label=f"Enter Team {team_key[-1]} Stats",
+            style=discord.ButtonStyle.primary,
+            custom_id=f"bsn:result:{team_key}:{match_id}"
+        ))
+        self.team_key = team_key
+        self.match_id = match_id
 
-    @discord.ui.button(label="Enter Team 1 Stats", style=discord.ButtonStyle.primary)
-    async def team1_stats(self, interaction: discord.Interaction, button: discord.ui.Button):
-        team_name = self.match_data["team1"]
-        teams = await mongo_manager.get_bsn_teams()
-        team = next((t for t in teams if t["name"] == team_name), None)
-        player_names = [p["name"] for p in team["players"]] if team else ["Player 1", "Player 2", "Player 3"]
-        await interaction.response.send_modal(BSNTeamStatsModal(self.match_data, "team1", player_names))
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["team_key"], match["match_id"])
 
-    @discord.ui.button(label="Enter Team 2 Stats", style=discord.ButtonStyle.primary)
-    async def team2_stats(self, interaction: discord.Interaction, button: discord.ui.Button):
-        team_name = self.match_data["team2"]
+    async def callback(self, interaction: discord.Interaction):
+        match = await mongo_manager.get_bsn_match(self.match_id)
+        if not match:
+            await interaction.response.send_message("❌ Match not found.", ephemeral=True)
+            return
+        team_name = match[self.team_key]
         teams = await mongo_manager.get_bsn_teams()
         team = next((t for t in teams if t["name"] == team_name), None)
         player_names = [p["name"] for p in team["players"]] if team else ["Player 1", "Player 2", "Player 3"]
-        await interaction.response.send_modal(BSNTeamStatsModal(self.match_data, "team2", player_names))
+        await interaction.response.send_modal(BSNTeamStatsModal(match, self.team_key, player_names))
 
 class BSNTeamStatsModal(discord.ui.Modal):
     def __init__(self, match_data, team_key, player_names):
@@ -832,26 +858,14 @@ class BSNTeamStatsModal(discord.ui.Modal):
             await interaction.followup.send(f"❌ Error parsing stats: {e}", ephemeral=True)
             return
 
-        # Fetch latest match data to avoid race conditions
-        matches = await mongo_manager.get_bsn_matches()
-        match = next((m for m in matches if m["id"] == self.match_data["id"]), None)
-        if not match:
-            await interaction.followup.send("❌ Match not found.", ephemeral=True)
-            return
-            
-        # Update match data
-        match[f"{self.team_key}_details"] = details
-        match[f"{self.team_key}_total_stars"] = total_stars
-        match[f"{self.team_key}_total_perc"] = total_perc
-        
-        await mongo_manager.save_bsn_match(match)
-        
-        # Check if both teams have data
-        t1_details = match.get("team1_details")
-        t2_details = match.get("team2_details")
-        
-        if t1_details and t2_details:
-            # Calculate Winner
+        def record(match):
+            match[f"{self.team_key}_details"] = details
+            match[f"{self.team_key}_total_stars"] = total_stars
+            match[f"{self.team_key}_total_perc"] = total_perc
+            if not (match.get("team1_details") and match.get("team2_details")):
+                return False
+
+            # Both teams are in: calculate the winner
             s1 = match.get("team1_total_stars", 0)
             p1 = match.get("team1_total_perc", 0)
             s2 = match.get("team2_total_stars", 0)
@@ -869,8 +883,25 @@ class BSNTeamStatsModal(discord.ui.Modal):
             match["completed"] = True
             match["score1"] = f"{s1}★ ({p1}%)"
             match["score2"] = f"{s2}★ ({p2}%)"
-            
-            await mongo_manager.save_bsn_match(match)
+            return True
+
+        # Versioned read-modify-write, so the two captains submitting at the
+        # same time can't overwrite each other's stats
+        try:
+            match, completed = await mongo_manager.update_bsn_match(self.match_data["id"], record)
+        except VersionConflict:
+            await interaction.followup.send("❌ The match was being updated by someone else. Please try again.", ephemeral=True)
+            return
+        if not match:
+            await interaction.followup.send("❌ Match not found.", ephemeral=True)
+            return
+        
+        if completed:
+            t1_details = match["team1_details"]
+            t2_details = match["team2_details"]
+            s1, p1 = match.get("team1_total_stars", 0), match.get("team1_total_perc", 0)
+            s2, p2 = match.get("team2_total_stars", 0), match.get("team2_total_perc", 0)
+            winner = match["winner"]
             
             # Post Result Embed
             embed = discord.Embed(title=f"🏆 Match Result: {match['team1']} vs {match['team2']}", color=discord.Color.green())
@@ -949,6 +980,7 @@ class BSNTeamStatsModal(discord.ui.Modal):
             winner = match["winner"]
             
             if gf:
+                gf = TrackedDocument(gf)
                 gf["team2"] = winner
                 await mongo_manager.save_bsn_match(gf)
                 
@@ -1032,14 +1064,20 @@ class BSNCupSystem(commands.Cog):
         self.bot = bot
 
     async def cog_load(self):
-        print("BSN Cup System Cog Loaded")
-        self.bot.add_view(BSNRegistrationView())
-        self.bot.add_view(BSNApprovalView())
-        self.bot.add_view(BSNDashboardView())
-        self.bot.add_view(BSNManageTeamsView())
-        self.bot.add_view(BSNTeamListView())
-        self.bot.add_view(BSNManageMatchesView())
-        self.bot.add_view(BSNMatchupsView())
+        log.info("BSN Cup System Cog Loaded")
+        self._views = [
+            BSNRegistrationView(), BSNApprovalView(), BSNDashboardView(), BSNManageTeamsView(),
+            BSNTeamListView(), BSNManageMatchesView(), BSNMatchupsView(),
+        ]
+        for view in self._views:
+            self.bot.add_view(view)
+        self.bot.add_dynamic_items(BSNResultButton)
+
+    async def cog_unload(self):
+        # Persistent views outlive the cog unless stopped (e.g. when lazy_cogs unloads it)
+        for view in self._views:
+            view.stop()
+        self.bot.remove_dynamic_items(BSNResultButton)
 
     # --- Commands ---
 
@@ -1092,24 +1130,17 @@ class BSNCupSystem(commands.Cog):
     @app_commands.command(name="bsn_setup_approvals", description="Set the channel for team approvals")
     @is_owner()
     async def bsn_setup_approvals(self, interaction: discord.Interaction, channel: discord.TextChannel):
-        settings = await mongo_manager.get_bsn_settings() or {}
-        settings["approval_channel_id"] = channel.id
-        await mongo_manager.save_bsn_settings(settings)
+        await settings_service.update("bsn", approval_channel_id=channel.id)
         await interaction.response.send_message(f"✅ Approval channel set to {channel.mention}", ephemeral=True)
 
     @app_commands.command(name="bsn_setup_negotiation", description="Set Negotiation Channel and Staff Role/User")
     @is_owner()
     async def bsn_setup_negotiation(self, interaction: discord.Interaction, channel: discord.TextChannel, staff: discord.Role = None, user: discord.User = None):
-        settings = await mongo_manager.get_bsn_settings() or {}
-        settings["negotiation_channel_id"] = channel.id
-        
         ping_id = None
         if staff: ping_id = f"&{staff.id}" # Role ping
         elif user: ping_id = f"@{user.id}" # User ping
         
-        settings["negotiation_ping_id"] = ping_id
-        
-        await mongo_manager.save_bsn_settings(settings)
+        await settings_service.update("bsn", negotiation_channel_id=channel.id, negotiation_ping_id=ping_id)
         ping_str = f"<@{ping_id[1:]}>" if ping_id and ping_id.startswith("@") else f"<@&{ping_id[1:]}>" if ping_id else "None"
         await interaction.response.send_message(f"✅ Negotiation channel set to {channel.mention}. Staff Ping: {ping_str}", ephemeral=True)
 
@@ -1120,10 +1151,7 @@ class BSNCupSystem(commands.Cog):
         await interaction.response.send_message(embed=embed)
         msg = await interaction.original_response()
         
-        settings = await mongo_manager.get_bsn_settings() or {}
-        settings["team_stats_channel_id"] = msg.channel.id
-        settings["team_stats_message_id"] = msg.id
-        await mongo_manager.save_bsn_settings(settings)
+        await settings_service.update("bsn", team_stats_channel_id=msg.channel.id, team_stats_message_id=msg.id)
         await self.update_team_stats()
 
     @app_commands.command(name="bsn_team_stats_mobile", description="Post Auto-Updating Team Stats (Mobile View)")
@@ -1133,10 +1161,7 @@ class BSNCupSystem(commands.Cog):
         await interaction.response.send_message(embed=embed)
         msg = await interaction.original_response()
         
-        settings = await mongo_manager.get_bsn_settings() or {}
-        settings["team_stats_mobile_channel_id"] = msg.channel.id
-        settings["team_stats_mobile_message_id"] = msg.id
-        await mongo_manager.save_bsn_settings(settings)
+        await settings_service.update("bsn", team_stats_mobile_channel_id=msg.channel.id, team_stats_mobile_message_id=msg.id)
         await self.update_team_stats()
 
     @app_commands.command(name="bsn_bracket", description="Post Auto-Updating Bracket")
@@ -1146,10 +1171,7 @@ class BSNCupSystem(commands.Cog):
         await interaction.response.send_message(embed=embed)
         msg = await interaction.original_response()
         
-        settings = await mongo_manager.get_bsn_settings() or {}
-        settings["bracket_channel_id"] = msg.channel.id
-        settings["bracket_message_id"] = msg.id
-        await mongo_manager.save_bsn_settings(settings)
+        await settings_service.update("bsn", bracket_channel_id=msg.channel.id, bracket_message_id=msg.id)
         await self.update_bracket()
 
     @app_commands.command(name="bsn_matchups", description="View Matchups (Current Round)")
@@ -1193,10 +1215,7 @@ class BSNCupSystem(commands.Cog):
         await interaction.response.send_message(embed=embed)
         msg = await interaction.original_response()
         
-        settings = await mongo_manager.get_bsn_settings() or {}
-        settings["player_stats_channel_id"] = msg.channel.id
-        settings["player_stats_message_id"] = msg.id
-        await mongo_manager.save_bsn_settings(settings)
+        await settings_service.update("bsn", player_stats_channel_id=msg.channel.id, player_stats_message_id=msg.id)
         await self.update_player_stats()
 
     @app_commands.command(name="bsn_player_stats_mobile", description="Setup Auto-Updating Player Stats Leaderboard (Mobile View)")
@@ -1206,10 +1225,7 @@ class BSNCupSystem(commands.Cog):
         await interaction.response.send_message(embed=embed)
         msg = await interaction.original_response()
         
-        settings = await mongo_manager.get_bsn_settings() or {}
-        settings["player_stats_mobile_channel_id"] = msg.channel.id
-        settings["player_stats_mobile_message_id"] = msg.id
-        await mongo_manager.save_bsn_settings(settings)
+        await settings_service.update("bsn", player_stats_mobile_channel_id=msg.channel.id, player_stats_mobile_message_id=msg.id)
         await self.update_player_stats()
 
     async def _generate_player_stats_embed(self, matches, teams, mobile=False):
@@ -1275,36 +1291,38 @@ class BSNCupSystem(commands.Cog):
         return embed
 
     async def update_player_stats(self):
-        print("DEBUG: update_player_stats called")
-        settings = await mongo_manager.get_bsn_settings()
+        log.debug("update_player_stats called")
+        settings = await settings_service.get("bsn")
         if not settings: 
-            print("DEBUG: No player stats settings found")
+            log.debug("No player stats settings found")
             return
         
         matches = await mongo_manager.get_bsn_matches()
         teams = await mongo_manager.get_bsn_teams()
         
         # --- Update PC Player Stats ---
-        if "player_stats_channel_id" in settings and "player_stats_message_id" in settings:
+        posted = settings.posted_message("player_stats")
+        if posted:
             try:
-                channel = self.bot.get_channel(settings["player_stats_channel_id"])
+                channel = self.bot.get_channel(posted[0])
                 if channel:
-                    msg = await channel.fetch_message(settings["player_stats_message_id"])
+                    msg = await channel.fetch_message(posted[1])
                     embed = await self._generate_player_stats_embed(matches, teams, mobile=False)
                     if embed: await msg.edit(embed=embed)
             except Exception as e:
-                print(f"DEBUG: Failed to update PC player stats: {e}")
+                log.warning("Failed to update PC player stats: %s", e)
 
         # --- Update Mobile Player Stats ---
-        if "player_stats_mobile_channel_id" in settings and "player_stats_mobile_message_id" in settings:
+        posted = settings.posted_message("player_stats_mobile")
+        if posted:
             try:
-                channel = self.bot.get_channel(settings["player_stats_mobile_channel_id"])
+                channel = self.bot.get_channel(posted[0])
                 if channel:
-                    msg = await channel.fetch_message(settings["player_stats_mobile_message_id"])
+                    msg = await channel.fetch_message(posted[1])
                     embed = await self._generate_player_stats_embed(matches, teams, mobile=True)
                     if embed: await msg.edit(embed=embed)
             except Exception as e:
-                print(f"DEBUG: Failed to update Mobile player stats: {e}")
+                log.warning("Failed to update Mobile player stats: %s", e)
 
     # --- Auto-Progression Helper ---
     async def check_and_generate_next_round(self, current_round):
@@ -1315,16 +1333,16 @@ class BSNCupSystem(commands.Cog):
             return # Round not finished
             
         # Notify that round is complete, but DO NOT auto-generate
-        settings = await mongo_manager.get_bsn_settings()
-        if settings and "bracket_channel_id" in settings:
-            ch = self.bot.get_channel(settings["bracket_channel_id"])
+        settings = await settings_service.get("bsn")
+        if settings.channel_id("bracket"):
+            ch = self.bot.get_channel(settings.channel_id("bracket"))
             if ch: await ch.send(f"🚨 **Round {current_round} Complete!** Use the dashboard to generate the next round.")
 
     async def create_match_thread(self, match_data):
-        settings = await mongo_manager.get_bsn_settings()
-        if not settings or "negotiation_channel_id" not in settings: return False
+        settings = await settings_service.get("bsn")
+        if not settings.channel_id("negotiation"): return False
         
-        channel = self.bot.get_channel(settings["negotiation_channel_id"])
+        channel = self.bot.get_channel(settings.channel_id("negotiation"))
         if not channel: return False
         
         # Abbreviation Logic
@@ -1339,11 +1357,7 @@ class BSNCupSystem(commands.Cog):
         thread_name = f"{abbr1} vs {abbr2}"
         
         # Staff Ping
-        ping_id = settings.get("negotiation_ping_id")
-        ping_str = ""
-        if ping_id:
-            if ping_id.startswith("&"): ping_str = f"<@&{ping_id[1:]}>"
-            elif ping_id.startswith("@"): ping_str = f"<@{ping_id[1:]}>"
+        ping_str = settings.negotiation_ping() or ""
             
         # Captain Pings (Need to fetch teams)
         teams = await mongo_manager.get_bsn_teams()
@@ -1367,19 +1381,19 @@ class BSNCupSystem(commands.Cog):
             
             # Save thread ID to match
             match_data["thread_id"] = thread.id
-            await mongo_manager.save_bsn_match(match_data)
+            await mongo_manager.update_bsn_match_field(match_data["id"], "thread_id", thread.id)
             return True
         except Exception as e:
-            print(f"Failed to create thread for {match_data['id']}: {e}")
+            log.warning("Failed to create thread for %s: %s", match_data['id'], e)
             return False
 
     # --- Helpers ---
 
     async def update_team_stats(self):
-        print("DEBUG: update_team_stats called")
-        settings = await mongo_manager.get_bsn_settings()
+        log.debug("update_team_stats called")
+        settings = await settings_service.get("bsn")
         if not settings: 
-            print("DEBUG: No settings found")
+            log.debug("No settings found")
             return
         
         teams = await mongo_manager.get_bsn_teams()
@@ -1432,33 +1446,33 @@ class BSNCupSystem(commands.Cog):
             )
 
             # --- Update PC Team Stats ---
-            if "team_stats_channel_id" in settings and "team_stats_message_id" in settings:
+            posted = settings.posted_message("team_stats")
+            if posted:
                 try:
-                    channel = self.bot.get_channel(settings["team_stats_channel_id"])
+                    channel = self.bot.get_channel(posted[0])
                     if channel:
-                        msg = await channel.fetch_message(settings["team_stats_message_id"])
+                        msg = await channel.fetch_message(posted[1])
                         embed = self._generate_team_stats_embed(sorted_teams, teams, mobile=False)
                         await msg.edit(embed=embed)
                 except Exception as e:
-                    print(f"DEBUG: Failed to update PC team stats: {e}")
+                    log.warning("Failed to update PC team stats: %s", e)
 
             # --- Update Mobile Team Stats ---
-            if "team_stats_mobile_channel_id" in settings and "team_stats_mobile_message_id" in settings:
+            posted = settings.posted_message("team_stats_mobile")
+            if posted:
                 try:
-                    channel = self.bot.get_channel(settings["team_stats_mobile_channel_id"])
+                    channel = self.bot.get_channel(posted[0])
                     if channel:
-                        msg = await channel.fetch_message(settings["team_stats_mobile_message_id"])
+                        msg = await channel.fetch_message(posted[1])
                         embed = self._generate_team_stats_embed(sorted_teams, teams, mobile=True)
                         await msg.edit(embed=embed)
                 except Exception as e:
-                    print(f"DEBUG: Failed to update Mobile team stats: {e}")
+                    log.warning("Failed to update Mobile team stats: %s", e)
             
-            print("DEBUG: Team stats updated successfully")
+            log.debug("Team stats updated successfully")
             
-        except Exception as e:
-            print(f"DEBUG: Error in update_team_stats loop: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            log.exception("Error in update_team_stats loop")
 
     def _generate_team_stats_embed(self, sorted_teams, teams, mobile=False):
         title = "🏆 BSN Cup Team Leaderboard" + (" [Mobile]" if mobile else "")
@@ -1501,13 +1515,14 @@ class BSNCupSystem(commands.Cog):
         return embed
 
     async def update_bracket(self):
-        settings = await mongo_manager.get_bsn_settings()
-        if not settings or "bracket_channel_id" not in settings: return
+        settings = await settings_service.get("bsn")
+        posted = settings.posted_message("bracket")
+        if not posted: return
         
-        channel = self.bot.get_channel(settings["bracket_channel_id"])
+        channel = self.bot.get_channel(posted[0])
         if not channel: return
         try:
-            message = await channel.fetch_message(settings["bracket_message_id"])
+            message = await channel.fetch_message(posted[1])
         except: return
         
         matches = await mongo_manager.get_bsn_matches()
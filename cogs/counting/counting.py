@@ -2,10 +2,17 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from utils.mongo_manager import mongo_manager
+from utils.sharding import ShardedState
+
+# Sentinel for guilds known to have no counting channel
+NOT_CONFIGURED = {}
 
 class CountingCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # guild_id -> counting_channels document, write-through; saves a Mongo
+        # read on every message in every guild
+        self.channels = ShardedState(bot)
         self.milestones = {
             69: "Nice! 😎",
             100: "🎉 Century mark! Keep counting!",
@@ -51,21 +58,35 @@ class CountingCog(commands.Cog):
     @app_commands.checks.has_permissions(administrator=True)
     async def setup_counting(self, interaction: discord.Interaction):
         await mongo_manager.set_counting_channel(interaction.guild.id, interaction.channel.id)
+        self.channels.set(interaction.guild.id, {"guild_id": interaction.guild.id, "channel_id": interaction.channel.id, "current_count": 0, "last_user_id": None})
         await interaction.response.send_message(f"✅ Counting channel set to {interaction.channel.mention}. Start counting from 1!", ephemeral=True)
 
     @app_commands.command(name="disable_counting", description="Disable counting for this server.")
     @app_commands.checks.has_permissions(administrator=True)
     async def disable_counting(self, interaction: discord.Interaction):
         await mongo_manager.remove_counting_channel(interaction.guild.id)
+        self.channels.set(interaction.guild.id, NOT_CONFIGURED)
         await interaction.response.send_message("✅ Counting disabled.", ephemeral=True)
 
+    async def get_channel(self, guild_id):
+        data = self.channels.get(guild_id)
+        if data is None:
+            data = await mongo_manager.get_counting_channel(guild_id) or NOT_CONFIGURED
+            self.channels.set(guild_id, data)
+        return data
+
+    @commands.Cog.listener()
+    async def on_shard_ready(self, shard_id):
+        # A fresh session may have missed updates; reload that shard's guilds lazily
+        self.channels.clear_shard(shard_id)
+
     @commands.Cog.listener()
     async def on_message(self, message):
-        if message.author.bot:
+        if message.author.bot or message.guild is None:
             return
 
         # Check if this is a counting channel
-        data = await mongo_manager.get_counting_channel(message.guild.id)
+        data = await self.get_channel(message.guild.id)
         if not data or data['channel_id'] != message.channel.id:
             return
 
@@ -94,6 +115,8 @@ class CountingCog(commands.Cog):
             return
 
         # Success! Update DB and React
+        data['current_count'] = number
+        data['last_user_id'] = message.author.id
         await mongo_manager.update_count(message.guild.id, number, message.author.id)
         await message.add_reaction("✅")
 
@@ -6,6 +6,9 @@ from utils.mongo_manager import mongo_manager
 from utils.coc_api import coc_api
 import os
 import asyncio
+import logging
+
+log = logging.getLogger(__name__)
 
 class ClanDashboardView(discord.ui.View):
     def __init__(self):
@@ -343,7 +346,7 @@ class ClanDashboardCog(commands.Cog):
         self.bot = bot
 
     async def cog_load(self):
-        print("Clan Dashboard Cog Loaded")
+        log.info("Clan Dashboard Cog Loaded")
         self.bot.add_view(ClanDashboardView())
 
     @app_commands.command(name="clandashboard", description="Open the Clan Dashboard")
@@ -3,6 +3,7 @@ from discord.ext import commands
 from discord import app_commands
 from utils.mongo_manager import mongo_manager
 from utils.embed_utils import create_invite_embed, create_rejection_embed
+from utils.metrics import metrics
 import os
 
 class AdminCommandsCog(commands.Cog):
@@ -43,6 +44,29 @@ class AdminCommandsCog(commands.Cog):
         embed = create_rejection_embed("Blackspire Nation", member.id)
         await interaction.response.send_message(content=member.mention, embed=embed)
 
+    @app_commands.command(name="ticket_metrics", description="Show how long each step of the ticket interview takes.")
+    @app_commands.default_permissions(manage_guild=True)
+    async def ticket_metrics(self, interaction: discord.Interaction):
+        stats = metrics.snapshot("ticket.")
+        if not stats:
+            await interaction.response.send_message("No ticket activity recorded yet.", ephemeral=True)
+            return
+
+        def fmt(seconds):
+            return f"{seconds * 1000:.0f}ms" if seconds < 10 else f"{seconds:.1f}s"
+
+        lines = [f"{'Step':<26}{'n':>5}{'p50':>9}{'p95':>9}{'p99':>9}"]
+        for name, h in stats.items():
+            lines.append(f"{name[len('ticket.'):]:<26}{h['count']:>5}{fmt(h['p50']):>9}{fmt(h['p95']):>9}{fmt(h['p99']):>9}")
+
+        embed = discord.Embed(
+            title="Ticket Funnel Latency",
+            description="```\n" + "\n".join(lines)[:4000] + "\n```",
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"Last {metrics.window // 60} minutes • .coc/.mongo = time spent in that service during the step")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     @invite_player.autocomplete('clan_tag')
     async def clan_tag_autocomplete(self, interaction: discord.Interaction, current: str):
         clans = await mongo_manager.get_clans()
@@ -1,7 +1,10 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import io
 import os
+from utils.command_sync import sync_commands
+from utils.profiling import profile_loop, profiling_busy, memory_snapshots, MAX_PROFILE_SECONDS
 
 class OwnerCommandsCog(commands.Cog):
     def __init__(self, bot):
@@ -31,7 +34,7 @@ class OwnerCommandsCog(commands.Cog):
         
         await ctx.send("Syncing...")
         try:
-            await self.bot.tree.sync()
+            await sync_commands(self.bot, force=True)
             await ctx.send("✅ Slash commands synced globally.")
         except Exception as e:
             await ctx.send(f"❌ Sync failed: {e}")
@@ -45,7 +48,7 @@ class OwnerCommandsCog(commands.Cog):
         
         await interaction.response.defer(ephemeral=True)
         try:
-            await self.bot.tree.sync()
+            await sync_commands(self.bot, force=True)
             await interaction.followup.send("✅ Slash commands synced globally.")
         except Exception as e:
             await interaction.followup.send(f"❌ Sync failed: {e}")
@@ -59,10 +62,66 @@ class OwnerCommandsCog(commands.Cog):
         
         await interaction.response.defer(ephemeral=True)
         try:
-            await self.bot.tree.sync()
+            await sync_commands(self.bot, force=True)
             await interaction.followup.send("✅ Slash commands synced globally.")
         except Exception as e:
             await interaction.followup.send(f"❌ Sync failed: {e}")
 
+    @app_commands.command(name="profile", description="Profile the bot's event loop for a number of seconds (Owner only).")
+    @app_commands.describe(seconds="How long to profile for")
+    async def profile(self, interaction: discord.Interaction, seconds: app_commands.Range[int, 1, MAX_PROFILE_SECONDS] = 30):
+        owner_id = os.getenv("OWNER_ID")
+        if not owner_id or interaction.user.id != int(owner_id):
+            await interaction.response.send_message("❌ Not authorized.", ephemeral=True)
+            return
+
+        if profiling_busy():
+            await interaction.response.send_message("❌ A profile is already running.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        result = await profile_loop(seconds)
+        top = result.top()
+
+        files = [
+            discord.File(io.BytesIO(top.encode()), filename="profile_top.txt"),
+            discord.File(io.BytesIO(result.collapsed().encode()), filename="profile.folded"),
+            discord.File(io.BytesIO(result.raw()), filename="profile.pstats"),
+        ]
+        # Header plus the first functions of the cumulative table
+        preview = "\n".join(line for line in top.splitlines() if line.strip())[:1800]
+        await interaction.followup.send(
+            f"Profiled {result.seconds:.1f}s, {sum(result.samples.values())} stack samples.\n"
+            f"`profile.folded` opens in speedscope or flamegraph.pl.\n```\n{preview}\n```",
+            files=files,
+            ephemeral=True
+        )
+
+    @app_commands.command(name="memsnap", description="Diff memory allocations since the last snapshot (Owner only).")
+    @app_commands.describe(stop="Stop tracing allocations")
+    async def memsnap(self, interaction: discord.Interaction, stop: bool = False):
+        owner_id = os.getenv("OWNER_ID")
+        if not owner_id or interaction.user.id != int(owner_id):
+            await interaction.response.send_message("❌ Not authorized.", ephemeral=True)
+            return
+
+        if stop:
+            if memory_snapshots.tracing:
+                memory_snapshots.stop()
+            await interaction.response.send_message("✅ Allocation tracing stopped.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        report, started = await memory_snapshots.diff()
+        if started:
+            await interaction.followup.send("✅ Allocation tracing started and baseline taken. Run `/memsnap` again to see what grew.", ephemeral=True)
+            return
+
+        await interaction.followup.send(
+            f"```\n{report[:1900]}\n```",
+            file=discord.File(io.BytesIO(report.encode()), filename="memsnap.txt"),
+            ephemeral=True
+        )
+
 async def setup(bot):
     await bot.add_cog(OwnerCommandsCog(bot))
@@ -4,15 +4,72 @@ import discord.ui
 from utils.mongo_manager import mongo_manager
 from utils.coc_api import coc_api
 from utils.embed_utils import create_invite_embed, create_rejection_embed
+from utils.answer_buffer import answer_buffer
+from utils.ticket_sessions import ticket_sessions, snapshot_player
+from utils.ticket_readiness import ticket_readiness, find_owner
+from utils.view_registry import BoundedView, view_registry
+from utils.metrics import metrics
+from utils.sharding import owns_guild
 import os
 import asyncio
-from datetime import datetime
+import logging
+import time
+from datetime import datetime, timezone
 
 TICKET_CATEGORY_ID = 1364627200271319140
 
+log = logging.getLogger(__name__)
+
 class TicketSystemCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self._restore_task = None
+
+    async def cog_load(self):
+        self.bot.add_dynamic_items(TicketDecisionButton)
+        # Which guilds this process serves depends on the shard count, which
+        # is only known once the gateway is connected
+        self._restore_task = asyncio.create_task(self.restore_sessions(), name="ticket-session-restore")
+
+    async def cog_unload(self):
+        if self._restore_task is not None:
+            self._restore_task.cancel()
+        await ticket_sessions.flush()
+
+    async def restore_sessions(self):
+        """Re-attaches the views of interviews that were in progress before a restart."""
+        await self.bot.wait_until_ready()
+        try:
+            sessions = await ticket_sessions.load(owns_guild=lambda guild_id: owns_guild(self.bot, guild_id))
+            if not sessions:
+                return
+            for session in sessions:
+                for message_id, entry in session["views"].items():
+                    view = self.build_view(session, entry)
+                    if view:
+                        self.bot.add_view(view, message_id=int(message_id))
+            log.info("Restored %d ticket sessions.", len(sessions))
+        except Exception:
+            log.exception("Failed to restore ticket sessions")
+
+    def build_view(self, session, entry):
+        kind, index = entry["kind"], entry.get("index")
+        if kind == "continent":
+            return ContinentView(session)
+        if kind == "confirm_continent":
+            return ConfirmContinentView(session)
+        if kind == "age":
+            return AgeView(session)
+        if kind == "account_count":
+            return AccountCountView(session)
+        if kind == "player_tag":
+            return PlayerTagView(session, index)
+        if kind == "question":
+            return QuestionDoneView(session, session["questions"], index, self)
+        if kind == "clan_type":
+            return ClanTypeSelectionView(session, index, self)
+        # Approval buttons are DynamicItems and need no re-attaching
+        return None
 
     @commands.Cog.listener()
     async def on_guild_channel_create(self, channel):
@@ -22,26 +79,48 @@ class TicketSystemCog(commands.Cog):
         if channel.category_id != TICKET_CATEGORY_ID:
             return
 
-        # Wait a bit for Ticket Tool to finish its setup
-        await asyncio.sleep(3)
+        # Wait for Ticket Tool to give the opener access (or mention them)
+        wait_start = time.perf_counter()
+        owner_id = await ticket_readiness.wait_for_owner(channel)
+        metrics.observe("ticket.owner_wait", time.perf_counter() - wait_start)
+        if self.bot.get_channel(channel.id) is None:
+            return # Deleted while we were waiting
 
         # Start the interview flow
-        await self.start_interview(channel)
+        await self.start_interview(channel, owner_id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        await ticket_readiness.channel_updated(after)
 
-    async def start_interview(self, channel):
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        # Ticket closed: drop any answer still being captured there, and its session
+        ticket_readiness.cancel(channel.id)
+        view_registry.stop_group(channel.id)
+        answer_buffer.close_channel(channel.id)
+        await ticket_sessions.close(channel.id)
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if not message.author.bot:
+            answer_buffer.add(message)
+        # After the answer is captured: this may fetch members
+        await ticket_readiness.message_received(message)
+
+    @metrics.timed("ticket.start")
+    async def start_interview(self, channel, owner_id=None):
         # Identify Ticket Owner from overwrites
-        owner_id = None
-        for target, overwrite in channel.overwrites.items():
-            if isinstance(target, discord.Member) and not target.bot:
-                owner_id = target.id
-                break
+        owner_id = owner_id or await find_owner(channel)
         
+        session_data = ticket_sessions.create(channel.id, owner_id, channel.guild.id)
         embed = discord.Embed(
             title="Welcome to Blackspire Nation Recruitment",
             description="Please follow the steps below to apply for a clan.",
             color=discord.Color.gold()
         )
-        await channel.send(embed=embed, view=ContinentView(owner_id))
+        msg = await channel.send(embed=embed, view=ContinentView(session_data))
+        ticket_sessions.track_view(session_data, msg, "continent")
 
     async def ask_question(self, interaction, session_data, questions, index):
         if index >= len(questions):
@@ -52,18 +131,71 @@ class TicketSystemCog(commands.Cog):
                 ans_embed.add_field(name=item['question'], value=item['answer'], inline=False)
             
             thread = interaction.guild.get_thread(session_data["thread_id"])
-            if thread:
-                await thread.send(embed=ans_embed)
             
-            # Proceed to Clan Selection
-            await self.start_clan_selection(interaction, session_data, 0)
+            # Proceed to Clan Selection while the answers are posted
+            await asyncio.gather(
+                thread.send(embed=ans_embed) if thread else asyncio.sleep(0),
+                self.start_clan_selection(interaction, session_data, 0)
+            )
             return
 
         q = questions[index]
         embed = discord.Embed(title=f"Question {index + 1}", description=q, color=discord.Color.blue())
         embed.set_footer(text="Type your answer in the chat, then click 'Done' when finished.")
+        session_data["question_started_at"] = time.time()
         view = QuestionDoneView(session_data, questions, index, self)
-        await interaction.channel.send(embed=embed, view=view)
+        answer_buffer.open(interaction.channel.id, session_data["user_id"])
+        msg = await interaction.channel.send(embed=embed, view=view)
+        ticket_sessions.track_view(session_data, msg, "question", index)
+
+    def stats_embed(self, acc):
+        player = acc['stats']
+        weapon = player["town_hall_weapon"]
+        weapon_str = f" (Weapon: {weapon})" if weapon else ""
+        
+        stats_embed = discord.Embed(title=f"Stats for {acc['name']} ({acc['tag']})", color=discord.Color.green())
+        stats_embed.add_field(name="Town Hall", value=f"{player['town_hall']}{weapon_str}", inline=True)
+        stats_embed.add_field(name="XP Level", value=str(player['exp_level']), inline=True)
+        stats_embed.add_field(name="Trophies", value=str(player['trophies']), inline=True)
+        stats_embed.add_field(name="War Stars", value=str(player['war_stars']), inline=True)
+        
+        heroes = "\n".join([f"{name}: {level}" for name, level in player['heroes']]) if player['heroes'] else "None"
+        stats_embed.add_field(name="Heroes", value=heroes, inline=False)
+        pets = "\n".join([f"{name}: {level}" for name, level in player['pets']]) if player['pets'] else "None"
+        stats_embed.add_field(name="Pets", value=pets, inline=False)
+        
+        # Base screenshot goes in the same embed instead of a message of its own
+        if 'screenshot_url' in acc:
+            stats_embed.set_image(url=acc['screenshot_url'])
+        return stats_embed
+
+    @metrics.timed("ticket.finalize")
+    async def finalize_collection(self, interaction, session_data):
+        # Create Private Thread
+        thread = await interaction.channel.create_thread(name=f"Interview - {interaction.user.name}", type=discord.ChannelType.private_thread)
+        session_data["thread_id"] = thread.id
+        
+        # Post every account's stats in one message (up to 10 embeds each),
+        # alongside the notice in the main channel and the questions lookup
+        embeds = [self.stats_embed(acc) for acc in session_data["accounts"]]
+        proceed_embed = discord.Embed(
+            title="Details Collected",
+            description="Thank you for providing your account details. We will now proceed with a brief interview.",
+            color=discord.Color.purple()
+        )
+        results = await asyncio.gather(
+            interaction.channel.send(embed=proceed_embed),
+            mongo_manager.get_questions("join_clan"),
+            *[thread.send(embeds=embeds[i:i + 10]) for i in range(0, len(embeds), 10)]
+        )
+        
+        questions = results[1]
+        if not questions:
+            questions = ["Why do you want to join?", "Do you have Discord notifications on?"]
+        
+        session_data["answers"] = []
+        session_data["questions"] = questions
+        await self.ask_question(interaction, session_data, questions, 0)
 
     async def start_clan_selection(self, interaction, session_data, account_index):
         if account_index >= len(session_data["accounts"]):
@@ -74,10 +206,13 @@ class TicketSystemCog(commands.Cog):
         acc = session_data["accounts"][account_index]
         embed = discord.Embed(title=f"Select Clan Type for {acc['name']}", description="Please select the type of clan you are looking for.", color=discord.Color.purple())
         view = ClanTypeSelectionView(session_data, account_index, self)
-        await interaction.channel.send(embed=embed, view=view)
+        msg = await interaction.channel.send(embed=embed, view=view)
+        ticket_sessions.track_view(session_data, msg, "clan_type", account_index)
 
+    @metrics.timed("ticket.submit")
     async def submit_application(self, interaction, session_data):
         thread = interaction.guild.get_thread(session_data["thread_id"])
+        session_data["submitted_at"] = time.time()
         
         summary_embed = discord.Embed(title="Application Summary", color=discord.Color.purple())
         summary_embed.add_field(name="Continent", value=session_data["continent"])
@@ -97,11 +232,6 @@ class TicketSystemCog(commands.Cog):
                 if 'leader_id' in clan: mentions.append(f"<@{clan['leader_id']}>")
                 if 'leadership_role_id' in clan: mentions.append(f"<@&{clan['leadership_role_id']}>")
         
-        await thread.send(content=f"New Application! {' '.join(set(mentions))}", embed=summary_embed)
-        
-        # Send Approval View to Thread
-        await thread.send("Leadership Action:", view=ApprovalView(session_data, clans))
-        
         # Send Confirmation Embed to User
         confirm_embed = discord.Embed(
             title="🎉 Application Delivered! 🎉",
@@ -115,21 +245,26 @@ class TicketSystemCog(commands.Cog):
         confirm_embed.add_field(name="While You Wait", value="Check out our rules or chat with other members.", inline=False)
         confirm_embed.set_footer(text="Clash On! ⚔️")
         
-        await interaction.channel.send(embed=confirm_embed)
+        # Summary and Approval View go to the thread as one message, in parallel with the user's confirmation
+        await asyncio.gather(
+            thread.send(content=f"New Application! {' '.join(set(mentions))}", embed=summary_embed, view=ApprovalView(session_data, clans)),
+            interaction.channel.send(embed=confirm_embed)
+        )
 
-class ContinentView(discord.ui.View):
-    def __init__(self, owner_id):
-        super().__init__(timeout=None)
+class ContinentView(BoundedView):
+    def __init__(self, session_data):
+        super().__init__(group=session_data["channel_id"])
         self.continent = None
-        self.owner_id = owner_id
+        self.session_data = session_data
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if self.owner_id and interaction.user.id != self.owner_id:
+        await super().interaction_check(interaction)
+        if self.session_data.get("user_id") and interaction.user.id != self.session_data["user_id"]:
             await interaction.response.send_message("This control is not for you.", ephemeral=True)
             return False
         return True
 
-    @discord.ui.select(placeholder="Choose your Continent", options=[
+    @discord.ui.select(placeholder="Choose your Continent", custom_id="ticket:continent", options=[
         discord.SelectOption(label="Asia", value="Asia"),
         discord.SelectOption(label="North America", value="North America"),
         discord.SelectOption(label="South America", value="South America"),
@@ -137,195 +272,182 @@ class ContinentView(discord.ui.View):
         discord.SelectOption(label="Australia", value="Australia"),
         discord.SelectOption(label="Europe", value="Europe")
     ])
+    @metrics.timed("ticket.continent")
     async def select_continent(self, interaction: discord.Interaction, select: discord.ui.Select):
         if self.continent: # Prevent double selection processing
              await interaction.response.defer()
              return
 
         self.continent = select.values[0]
+        self.session_data["continent"] = self.continent
         # Disable select and show confirm button
         select.disabled = True
         await interaction.response.edit_message(view=self)
+        ticket_sessions.untrack_view(self.session_data, "continent")
+        self.stop()
         
-        confirm_view = ConfirmContinentView(self.continent, self.owner_id)
-        await interaction.followup.send(f"You selected **{self.continent}**. Confirm?", view=confirm_view, ephemeral=True)
+        confirm_view = ConfirmContinentView(self.session_data)
+        msg = await interaction.followup.send(f"You selected **{self.continent}**. Confirm?", view=confirm_view, ephemeral=True)
+        ticket_sessions.track_view(self.session_data, msg, "confirm_continent")
 
-class ConfirmContinentView(discord.ui.View):
-    def __init__(self, continent, owner_id):
-        super().__init__(timeout=None)
-        self.continent = continent
-        self.owner_id = owner_id
+class ConfirmContinentView(BoundedView):
+    def __init__(self, session_data):
+        super().__init__(group=session_data["channel_id"])
+        self.session_data = session_data
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if self.owner_id and interaction.user.id != self.owner_id:
+        await super().interaction_check(interaction)
+        if self.session_data.get("user_id") and interaction.user.id != self.session_data["user_id"]:
             await interaction.response.send_message("This control is not for you.", ephemeral=True)
             return False
         return True
 
-    @discord.ui.button(label="Confirm", style=discord.ButtonStyle.success)
+    @discord.ui.button(label="Confirm", style=discord.ButtonStyle.success, custom_id="ticket:confirm_continent")
+    @metrics.timed("ticket.confirm_continent")
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.edit_message(content="Confirmed!", view=None)
+        ticket_sessions.untrack_view(self.session_data, "confirm_continent")
+        self.stop()
         # Proceed to Age
-        await interaction.channel.send("Please select your age bracket:", view=AgeView(self.continent, self.owner_id))
+        msg = await interaction.channel.send("Please select your age bracket:", view=AgeView(self.session_data))
+        ticket_sessions.track_view(self.session_data, msg, "age")
 
-    @discord.ui.button(label="Reselect", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="Reselect", style=discord.ButtonStyle.secondary, custom_id="ticket:reselect_continent")
+    @metrics.timed("ticket.confirm_continent")
     async def reselect(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.edit_message(content="Reselecting...", view=None)
+        ticket_sessions.untrack_view(self.session_data, "confirm_continent")
+        self.stop()
         # Send ContinentView again
-        await interaction.channel.send("Choose your Continent:", view=ContinentView(self.owner_id))
+        msg = await interaction.channel.send("Choose your Continent:", view=ContinentView(self.session_data))
+        ticket_sessions.track_view(self.session_data, msg, "continent")
 
-class AgeView(discord.ui.View):
-    def __init__(self, continent, owner_id):
-        super().__init__(timeout=None)
-        self.continent = continent
-        self.owner_id = owner_id
+class AgeView(BoundedView):
+    def __init__(self, session_data):
+        super().__init__(group=session_data["channel_id"])
+        self.session_data = session_data
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if self.owner_id and interaction.user.id != self.owner_id:
+        await super().interaction_check(interaction)
+        if self.session_data.get("user_id") and interaction.user.id != self.session_data["user_id"]:
             await interaction.response.send_message("This control is not for you.", ephemeral=True)
             return False
         return True
 
-    @discord.ui.select(placeholder="Choose your Age Bracket", options=[
+    @discord.ui.select(placeholder="Choose your Age Bracket", custom_id="ticket:age", options=[
         discord.SelectOption(label="Below 17", value="<17"),
         discord.SelectOption(label="17-25", value="17-25"),
         discord.SelectOption(label="25+", value="25+")
     ])
+    @metrics.timed("ticket.age")
     async def select_age(self, interaction: discord.Interaction, select: discord.ui.Select):
-        age = select.values[0]
+        self.session_data["age"] = select.values[0]
         select.disabled = True
         await interaction.response.edit_message(view=self)
+        ticket_sessions.untrack_view(self.session_data, "age")
+        self.stop()
         
         # Proceed to Account Count
-        await interaction.channel.send("How many accounts would you like to join with?", view=AccountCountView(self.continent, age, self.owner_id))
+        msg = await interaction.channel.send("How many accounts would you like to join with?", view=AccountCountView(self.session_data))
+        ticket_sessions.track_view(self.session_data, msg, "account_count")
 
-class AccountCountView(discord.ui.View):
-    def __init__(self, continent, age, owner_id):
-        super().__init__(timeout=None)
-        self.continent = continent
-        self.age = age
-        self.owner_id = owner_id
+class AccountCountView(BoundedView):
+    def __init__(self, session_data):
+        super().__init__(group=session_data["channel_id"])
+        self.session_data = session_data
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if self.owner_id and interaction.user.id != self.owner_id:
+        await super().interaction_check(interaction)
+        if self.session_data.get("user_id") and interaction.user.id != self.session_data["user_id"]:
             await interaction.response.send_message("This control is not for you.", ephemeral=True)
             return False
         return True
 
-    @discord.ui.select(placeholder="Select Number of Accounts", options=[
+    @discord.ui.select(placeholder="Select Number of Accounts", custom_id="ticket:account_count", options=[
         discord.SelectOption(label="1 Account", value="1"),
         discord.SelectOption(label="2 Accounts", value="2"),
         discord.SelectOption(label="3 Accounts", value="3")
     ])
+    @metrics.timed("ticket.account_count")
     async def select_count(self, interaction: discord.Interaction, select: discord.ui.Select):
         count = int(select.values[0])
         select.disabled = True
         await interaction.response.edit_message(view=self)
         
-        session_data = {
-            "continent": self.continent,
-            "age": self.age,
-            "account_count": count,
-            "accounts": [],
-            "user_id": interaction.user.id
-        }
+        session_data = self.session_data
+        session_data["account_count"] = count
+        session_data["accounts"] = []
+        session_data["user_id"] = interaction.user.id
+        ticket_sessions.untrack_view(session_data, "account_count")
+        self.stop()
         await self.collect_player_details(interaction, session_data, 0)
 
     async def collect_player_details(self, interaction, session_data, index):
         if index >= session_data["account_count"]:
-            await self.finalize_collection(interaction, session_data)
+            await interaction.client.get_cog("TicketSystemCog").finalize_collection(interaction, session_data)
             return
 
         account_num = index + 1
         embed = discord.Embed(title=f"Account #{account_num} Details", description="Please enter the Player Tag for this account.", color=discord.Color.blue())
-        await interaction.channel.send(embed=embed, view=PlayerTagView(session_data, index))
-
-    async def finalize_collection(self, interaction, session_data):
-        # Create Private Thread
-        thread = await interaction.channel.create_thread(name=f"Interview - {interaction.user.name}", type=discord.ChannelType.private_thread)
-        session_data["thread_id"] = thread.id
-        
-        # Post Stats and Screenshots to Thread
-        for acc in session_data["accounts"]:
-            player = acc['stats']
-            
-            # Safe access to attributes
-            weapon = getattr(player, "town_hall_weapon", None)
-            weapon_str = f" (Weapon: {weapon})" if weapon else ""
-            
-            stats_embed = discord.Embed(title=f"Stats for {acc['name']} ({acc['tag']})", color=discord.Color.green())
-            stats_embed.add_field(name="Town Hall", value=f"{player.town_hall}{weapon_str}", inline=True)
-            stats_embed.add_field(name="XP Level", value=str(player.exp_level), inline=True)
-            stats_embed.add_field(name="Trophies", value=str(player.trophies), inline=True)
-            stats_embed.add_field(name="War Stars", value=str(player.war_stars), inline=True)
-            
-            heroes = "\n".join([f"{h.name}: {h.level}" for h in player.heroes]) if player.heroes else "None"
-            stats_embed.add_field(name="Heroes", value=heroes, inline=False)
-            
-            await thread.send(embed=stats_embed)
-            if 'screenshot_url' in acc:
-                await thread.send(f"**Base Screenshot for {acc['name']}**:\n{acc['screenshot_url']}")
-        
-        # Start Interview Questions in Main Channel
-        await interaction.channel.send("Thank you for the details. Let's proceed with a few questions.")
-        
-        questions = await mongo_manager.get_questions("join_clan")
-        if not questions:
-            questions = ["Why do you want to join?", "Do you have Discord notifications on?"]
-        
-        session_data["answers"] = []
-        session_data["answers"] = []
-        
-        cog = interaction.client.get_cog("TicketSystemCog")
-        if cog:
-            await cog.ask_question(interaction, session_data, questions, 0)
+        msg = await interaction.channel.send(embed=embed, view=PlayerTagView(session_data, index))
+        ticket_sessions.track_view(session_data, msg, "player_tag", index)
 
-class QuestionDoneView(discord.ui.View):
+class QuestionDoneView(BoundedView):
     def __init__(self, session_data, questions, index, cog_instance):
-        super().__init__(timeout=None)
+        super().__init__(group=session_data["channel_id"])
         self.session_data = session_data
         self.questions = questions
         self.index = index
         self.cog_instance = cog_instance
-        self.start_time = datetime.now()
+        self.start_time = datetime.fromtimestamp(session_data.get("question_started_at", time.time()), timezone.utc)
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        await super().interaction_check(interaction)
         if self.session_data.get("user_id") and interaction.user.id != self.session_data["user_id"]:
             await interaction.response.send_message("This control is not for you.", ephemeral=True)
             return False
         return True
 
-    @discord.ui.button(label="Done", style=discord.ButtonStyle.success)
+    @discord.ui.button(label="Done", style=discord.ButtonStyle.success, custom_id="ticket:question_done")
+    @metrics.timed("ticket.question")
     async def done(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Collect messages sent by user since start_time
-        messages = []
-        async for msg in interaction.channel.history(after=self.start_time):
-            if msg.author.id == interaction.user.id:
-                messages.append(msg.content)
+        # Messages captured by on_message since the question was asked
+        messages = answer_buffer.get(interaction.channel.id, interaction.user.id)
+        if messages is None:
+            # Not captured (bot restarted since), read them back from the channel
+            messages = []
+            async for msg in interaction.channel.history(after=self.start_time):
+                if msg.author.id == interaction.user.id:
+                    messages.append(msg.content)
         
         if not messages:
             await interaction.response.send_message("❌ You must provide an answer before clicking Done!", ephemeral=True)
             return
 
         answer = "\n".join(messages)
+        metrics.observe("ticket.answer_wait", time.time() - self.session_data.get("question_started_at", time.time()))
         self.session_data["answers"].append({"question": self.questions[self.index], "answer": answer})
+        answer_buffer.close(interaction.channel.id, interaction.user.id)
+        ticket_sessions.untrack_view(self.session_data, "question", self.index)
+        self.stop()
         
         await interaction.response.edit_message(view=None) # Remove button
         await self.cog_instance.ask_question(interaction, self.session_data, self.questions, self.index + 1)
 
-class PlayerTagView(discord.ui.View):
+class PlayerTagView(BoundedView):
     def __init__(self, session_data, index):
-        super().__init__(timeout=None)
+        super().__init__(group=session_data["channel_id"])
         self.session_data = session_data
         self.index = index
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        await super().interaction_check(interaction)
         if self.session_data.get("user_id") and interaction.user.id != self.session_data["user_id"]:
             await interaction.response.send_message("This control is not for you.", ephemeral=True)
             return False
         return True
 
-    @discord.ui.button(label="Enter Tag", style=discord.ButtonStyle.primary)
+    @discord.ui.button(label="Enter Tag", style=discord.ButtonStyle.primary, custom_id="ticket:enter_tag")
     async def enter_tag(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.send_modal(PlayerTagModal(self.session_data, self.index))
 
@@ -341,7 +463,8 @@ class PlayerTagModal(discord.ui.Modal, title="Enter Player Tag"):
         tag = self.tag.value.upper().replace("#", "")
         
         # Fetch Stats using CoC API
-        player = await coc_api.get_player(tag)
+        with metrics.span("ticket.tag_lookup"):
+            player = await coc_api.get_player(tag)
         
         if player:
             name = player.name
@@ -351,7 +474,7 @@ class PlayerTagModal(discord.ui.Modal, title="Enter Player Tag"):
                 "tag": f"#{player.tag.strip('#')}",
                 "name": name,
                 "th": th,
-                "stats": player # Store full player object (or dict representation if needed)
+                "stats": snapshot_player(player)
             }
             
             # Account Found Embed
@@ -363,6 +486,7 @@ class PlayerTagModal(discord.ui.Modal, title="Enter Player Tag"):
             found_embed.add_field(name="Next Step", value="Please upload a screenshot of your base now.")
             await interaction.response.send_message(embed=found_embed)
             
+            wait_start = time.perf_counter()
             try:
                 msg = await interaction.client.wait_for('message', check=lambda m: m.channel.id == interaction.channel.id and m.attachments and m.author.id == interaction.user.id, timeout=120)
                 account_data["screenshot_url"] = msg.attachments[0].url
@@ -382,97 +506,42 @@ class PlayerTagModal(discord.ui.Modal, title="Enter Player Tag"):
                     color=discord.Color.orange()
                 )
                 await interaction.channel.send(embed=no_ss_embed)
+            metrics.observe("ticket.screenshot_wait", time.perf_counter() - wait_start)
             
             self.session_data["accounts"].append(account_data)
+            ticket_sessions.untrack_view(self.session_data, "player_tag", self.index)
             
             # Next account
             next_index = self.index + 1
             if next_index < self.session_data["account_count"]:
                  embed = discord.Embed(title=f"Account #{next_index + 1} Details", description="Please enter the Player Tag for this account.", color=discord.Color.blue())
-                 await interaction.channel.send(embed=embed, view=PlayerTagView(self.session_data, next_index))
+                 msg = await interaction.channel.send(embed=embed, view=PlayerTagView(self.session_data, next_index))
+                 ticket_sessions.track_view(self.session_data, msg, "player_tag", next_index)
             else:
-                 await finalize_collection_standalone(interaction, self.session_data)
+                 await interaction.client.get_cog("TicketSystemCog").finalize_collection(interaction, self.session_data)
 
         else:
             await interaction.response.send_message("Invalid Tag or API Error. Please try again.", ephemeral=True)
 
-async def finalize_collection_standalone(interaction, session_data):
-    # This is a hack to bridge the gap between Modal (no cog instance) and Cog methods.
-    # Ideally we pass cog instance to View/Modal.
-    # For now, we just instantiate a dummy view to call the method if we can, or just copy logic.
-    # But wait, we can get the Cog from the bot instance if we had it.
-    # Let's just use the same logic as AccountCountView.finalize_collection but we need to re-instantiate it or move it to a standalone function.
-    # Moving to standalone function `finalize_collection_logic` is best.
-    pass # We will use the method in AccountCountView by passing the cog instance to views.
-    # Actually, I'll just make the Modal call a helper function that does what `finalize_collection` does.
-
-    # Re-implementing the logic here for simplicity in this artifact context
-    thread = await interaction.channel.create_thread(name=f"Interview - {interaction.user.name}", type=discord.ChannelType.private_thread)
-    session_data["thread_id"] = thread.id
-    
-    for acc in session_data["accounts"]:
-        player = acc['stats']
-        
-        # Safe access to attributes
-        weapon = getattr(player, "town_hall_weapon", None)
-        weapon_str = f" (Weapon: {weapon})" if weapon else ""
-        
-        stats_embed = discord.Embed(title=f"Stats for {acc['name']} ({acc['tag']})", color=discord.Color.green())
-        stats_embed.add_field(name="Town Hall", value=f"{player.town_hall}{weapon_str}", inline=True)
-        stats_embed.add_field(name="XP Level", value=str(player.exp_level), inline=True)
-        stats_embed.add_field(name="Trophies", value=str(player.trophies), inline=True)
-        stats_embed.add_field(name="War Stars", value=str(player.war_stars), inline=True)
-        
-        heroes = "\n".join([f"{h.name}: {h.level}" for h in player.heroes]) if player.heroes else "None"
-        stats_embed.add_field(name="Heroes", value=heroes, inline=False)
-        
-        # coc.py uses 'pets' or 'hero_pets' depending on version, usually 'pets' in v2
-        pets_list = getattr(player, "pets", []) or getattr(player, "hero_pets", [])
-        pets = "\n".join([f"{p.name}: {p.level}" for p in pets_list]) if pets_list else "None"
-        stats_embed.add_field(name="Pets", value=pets, inline=False)
-        
-        await thread.send(embed=stats_embed)
-        if 'screenshot_url' in acc:
-            await thread.send(f"**Base Screenshot for {acc['name']}**:\n{acc['screenshot_url']}")
-            
-    # Proceed to Questions Embed
-    proceed_embed = discord.Embed(
-        title="Details Collected",
-        description="Thank you for providing your account details. We will now proceed with a brief interview.",
-        color=discord.Color.purple()
-    )
-    await interaction.channel.send(embed=proceed_embed)
-    
-    questions = await mongo_manager.get_questions("join_clan")
-    if not questions:
-        questions = ["Why do you want to join?", "Do you have Discord notifications on?"]
-        
-    session_data["answers"] = []
-    # We need to start the question loop. We can't easily call Cog method here without the instance.
-    # I will modify the views to accept `cog_instance`.
-    # But for this artifact, I will assume the Modal has access or I will use a global/static approach.
-    # Let's use `interaction.client.get_cog("TicketSystemCog")`.
-    cog = interaction.client.get_cog("TicketSystemCog")
-    if cog:
-        await cog.ask_question(interaction, session_data, questions, 0)
-
-class ClanTypeSelectionView(discord.ui.View):
+class ClanTypeSelectionView(BoundedView):
     def __init__(self, session_data, account_index, cog_instance):
-        super().__init__(timeout=None)
+        super().__init__(group=session_data["channel_id"])
         self.session_data = session_data
         self.account_index = account_index
         self.cog_instance = cog_instance
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        await super().interaction_check(interaction)
         if self.session_data.get("user_id") and interaction.user.id != self.session_data["user_id"]:
             await interaction.response.send_message("This control is not for you.", ephemeral=True)
             return False
         return True
 
-    @discord.ui.select(placeholder="Select Clan Type", options=[
+    @discord.ui.select(placeholder="Select Clan Type", custom_id="ticket:clan_type", options=[
         discord.SelectOption(label="Regular", value="Regular"),
         discord.SelectOption(label="Cruise", value="Cruise")
     ])
+    @metrics.timed("ticket.clan_type")
     async def select_type(self, interaction: discord.Interaction, select: discord.ui.Select):
         clan_type = select.values[0]
         # Now show clans of this type
@@ -507,7 +576,7 @@ class ClanTypeSelectionView(discord.ui.View):
                                  if capital_hall == "N/A" and districts:
                                      capital_hall = str(districts[0].hall_level)
                         else:
-                            print(f"DEBUG: capital_hall_level not found. Attributes: {dir(clan_details)}")
+                            log.debug("capital_hall_level not found. Attributes: %s", dir(clan_details))
                             capital_hall = "N/A"
                         
                         # Update DB
@@ -518,20 +587,18 @@ class ClanTypeSelectionView(discord.ui.View):
                         c['war_league'] = war_league
                         c['capital_hall'] = capital_hall
                         updates_made = True
-                except Exception as e:
-                    print(f"Error fetching stats for {c['clan_tag']}: {e}")
-                    import traceback
-                    traceback.print_exc()
+                except Exception:
+                    log.exception("Error fetching stats for %s", c['clan_tag'])
         
         if updates_made:
-            print("Updated missing clan stats during selection.")
+            log.info("Updated missing clan stats during selection.")
 
         view = ClanSelectionView(self.session_data, self.account_index, valid_clans, self.cog_instance)
         await interaction.response.send_message(f"Select a {clan_type} clan for {acc['name']}:", view=view, ephemeral=True)
 
-class ClanSelectionView(discord.ui.View):
+class ClanSelectionView(BoundedView):
     def __init__(self, session_data, account_index, valid_clans, cog_instance):
-        super().__init__(timeout=None)
+        super().__init__(group=session_data["channel_id"])
         self.session_data = session_data
         self.account_index = account_index
         self.cog_instance = cog_instance
@@ -550,15 +617,20 @@ class ClanSelectionView(discord.ui.View):
         self.select_clan.options = options
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        await super().interaction_check(interaction)
         if self.session_data.get("user_id") and interaction.user.id != self.session_data["user_id"]:
             await interaction.response.send_message("This control is not for you.", ephemeral=True)
             return False
         return True
 
     @discord.ui.select(placeholder="Select Clan")
+    @metrics.timed("ticket.clan_select")
     async def select_clan(self, interaction: discord.Interaction, select: discord.ui.Select):
         clan_tag = select.values[0]
         self.session_data["accounts"][self.account_index]["selected_clan_tag"] = clan_tag
+        self.session_data["accounts"][self.account_index].pop("decision", None)
+        ticket_sessions.untrack_view(self.session_data, "clan_type", self.account_index)
+        self.stop()
         
         await interaction.response.edit_message(content=f"Selected clan: {clan_tag}", view=None)
         
@@ -568,8 +640,6 @@ class ClanSelectionView(discord.ui.View):
 class ApprovalView(discord.ui.View):
     def __init__(self, session_data, clans):
         super().__init__(timeout=None)
-        self.session_data = session_data
-        self.clans = clans
         
         # Add dynamic buttons for each account
         for i, acc in enumerate(session_data["accounts"]):
@@ -577,32 +647,55 @@ class ApprovalView(discord.ui.View):
             if clan_tag and clan_tag != "none":
                 clan = next((c for c in clans if c['clan_tag'] == clan_tag), None)
                 clan_name = clan['name'] if clan else clan_tag
+                handled = bool(acc.get("decision"))
                 
-                # Accept Button
-                accept_btn = discord.ui.Button(label=f"Accept {acc['name']} -> {clan_name}", style=discord.ButtonStyle.success, custom_id=f"accept_{i}")
-                accept_btn.callback = self.make_accept_callback(i, clan)
-                self.add_item(accept_btn)
-                
-                # Pass Button
-                pass_btn = discord.ui.Button(label=f"Pass {acc['name']}", style=discord.ButtonStyle.danger, custom_id=f"pass_{i}")
-                pass_btn.callback = self.make_pass_callback(i, clan)
-                self.add_item(pass_btn)
-
-    def make_accept_callback(self, index, clan):
-        async def callback(interaction: discord.Interaction):
-            # Permission check
-            if not self.check_permission(interaction, clan):
-                error_embed = discord.Embed(
-                    title="⚠️ Unauthorized Action ⚠️",
-                    description=f"{interaction.user.mention}, hold your horses! 🐴\nYou aren't a leader of **{clan['name']}**.\n\n**Guilty as charged!** 🛑 Please avoid messing with other clans' tickets.",
-                    color=discord.Color.red()
-                )
-                error_embed.set_footer(text="This incident has been logged. (Just kidding, but seriously, don't.)")
-                await interaction.response.send_message(embed=error_embed)
-                return
-            
-            acc = self.session_data["accounts"][index]
-            
+                self.add_item(TicketDecisionButton("accept", session_data["channel_id"], i, clan_tag, label=f"Accept {acc['name']} -> {clan_name}", disabled=handled))
+                self.add_item(TicketDecisionButton("pass", session_data["channel_id"], i, clan_tag, label=f"Pass {acc['name']}", disabled=handled))
+
+class TicketDecisionButton(discord.ui.DynamicItem[discord.ui.Button], template=r"ticket:(?P<action>accept|pass):(?P<channel_id>\d+):(?P<index>\d+):(?P<clan_tag>[^:]+)"):
+    # Everything needed to act on the click is in the custom_id; the session
+    # and clan are read from storage, so nothing is kept in the view store
+    def __init__(self, action, channel_id, index, clan_tag, label=None, disabled=False):
+        super().__init__(discord.ui.Button(
+            label=label or action.title(),
+            style=discord.ButtonStyle.success if action == "accept" else discord.ButtonStyle.danger,
+            custom_id=f"ticket:{action}:{channel_id}:{index}:{clan_tag}",
+            disabled=disabled
+        ))
+        self.action = action
+        self.channel_id = channel_id
+        self.index = index
+        self.clan_tag = clan_tag
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["action"], int(match["channel_id"]), int(match["index"]), match["clan_tag"])
+
+    @metrics.timed("ticket.approval")
+    async def callback(self, interaction: discord.Interaction):
+        session_data = await ticket_sessions.fetch(self.channel_id)
+        clans = await mongo_manager.get_clans()
+        clan = next((c for c in clans if c['clan_tag'] == self.clan_tag), None)
+        
+        # Permission check
+        if not check_permission(interaction, clan):
+            error_embed = discord.Embed(
+                title="⚠️ Unauthorized Action ⚠️",
+                description=f"{interaction.user.mention}, hold your horses! 🐴\nYou aren't a leader of **{clan['name'] if clan else self.clan_tag}**.\n\n**Guilty as charged!** 🛑 Please avoid messing with other clans' tickets.",
+                color=discord.Color.red()
+            )
+            error_embed.set_footer(text="This incident has been logged. (Just kidding, but seriously, don't.)")
+            await interaction.response.send_message(embed=error_embed)
+            return
+        
+        accounts = session_data["accounts"] if session_data else []
+        acc = accounts[self.index] if self.index < len(accounts) else None
+        if not acc or acc.get("selected_clan_tag") != self.clan_tag or acc.get("decision"):
+            await interaction.response.send_message("This application has already been handled.", ephemeral=True)
+            return
+        
+        main_channel = interaction.channel.parent
+        if self.action == "accept":
             embed = create_invite_embed(
                 clan_name=clan['name'],
                 leader_id=clan.get('leader_id'),
@@ -616,71 +709,44 @@ class ApprovalView(discord.ui.View):
             view.add_item(button)
             
             # Send to MAIN CHANNEL (not thread)
-            main_channel = interaction.channel.parent
             if main_channel:
-                await main_channel.send(content=f"Clan Invitation for <@{self.session_data['user_id']}>", embed=embed, view=view)
+                await main_channel.send(content=f"Clan Invitation for <@{session_data['user_id']}>", embed=embed, view=view)
             
             await interaction.response.send_message(f"Accepted {acc['name']}!", ephemeral=True)
-            
-            # Disable buttons for this account
-            for child in self.children:
-                if isinstance(child, discord.ui.Button) and (child.custom_id == f"accept_{index}" or child.custom_id == f"pass_{index}"):
-                    child.disabled = True
-            await interaction.message.edit(view=self)
-
-        return callback
-
-    def make_pass_callback(self, index, clan):
-        async def callback(interaction: discord.Interaction):
-            if not self.check_permission(interaction, clan):
-                error_embed = discord.Embed(
-                    title="⚠️ Unauthorized Action ⚠️",
-                    description=f"{interaction.user.mention}, hold your horses! 🐴\nYou aren't a leader of **{clan['name']}**.\n\n**Guilty as charged!** 🛑 Please avoid messing with other clans' tickets.",
-                    color=discord.Color.red()
-                )
-                error_embed.set_footer(text="This incident has been logged. (Just kidding, but seriously, don't.)")
-                await interaction.response.send_message(embed=error_embed)
-                return
-            
-            acc = self.session_data["accounts"][index]
-            
+        else:
             # Send rejection to MAIN CHANNEL
-            main_channel = interaction.channel.parent
             if main_channel:
                 # Reverted to simple message as requested
-                await main_channel.send(f"Sorry <@{self.session_data['user_id']}>, your application for {acc['name']} to {clan['name']} was passed. Please select another clan.")
+                await main_channel.send(f"Sorry <@{session_data['user_id']}>, your application for {acc['name']} to {clan['name']} was passed. Please select another clan.")
             
             # Re-trigger selection for this account
             cog = interaction.client.get_cog("TicketSystemCog")
             if cog and main_channel:
                  embed = discord.Embed(title=f"Re-Select Clan Type for {acc['name']}", description="Please select a different clan.", color=discord.Color.purple())
-                 view = ClanTypeSelectionView(self.session_data, index, cog)
-                 await main_channel.send(embed=embed, view=view)
+                 view = ClanTypeSelectionView(session_data, self.index, cog)
+                 msg = await main_channel.send(embed=embed, view=view)
+                 ticket_sessions.track_view(session_data, msg, "clan_type", self.index)
 
             await interaction.response.send_message(f"Passed {acc['name']}.", ephemeral=True)
-            
-            # Disable buttons for this account
-            for child in self.children:
-                if isinstance(child, discord.ui.Button) and (child.custom_id == f"accept_{index}" or child.custom_id == f"pass_{index}"):
-                    child.disabled = True
-            await interaction.message.edit(view=self)
-
-        return callback
-
-    def check_permission(self, interaction, clan):
-        if not clan: return False
-        user_role_ids = [r.id for r in interaction.user.roles]
-        role_id = int(clan.get('leadership_role_id', 0))
-        leader_id = int(clan.get('leader_id', 0))
-        
-        print(f"DEBUG: Checking permission for {interaction.user.name} ({interaction.user.id})")
-        print(f"DEBUG: User Roles: {user_role_ids}")
-        print(f"DEBUG: Required Role: {role_id}, Leader ID: {leader_id}")
         
-        is_authorized = role_id in user_role_ids or interaction.user.id == leader_id
-        print(f"DEBUG: Authorized: {is_authorized}")
-        
-        return is_authorized
+        # Disable buttons for this account
+        if session_data.get("submitted_at"):
+            metrics.observe("ticket.approval_wait", time.time() - session_data["submitted_at"])
+        acc["decision"] = self.action
+        ticket_sessions.save(session_data)
+        await interaction.message.edit(view=ApprovalView(session_data, clans))
+
+def check_permission(interaction, clan):
+    if not clan: return False
+    user_role_ids = [r.id for r in interaction.user.roles]
+    role_id = int(clan.get('leadership_role_id', 0))
+    leader_id = int(clan.get('leader_id', 0))
+    
+    is_authorized = role_id in user_role_ids or interaction.user.id == leader_id
+    log.debug("Permission check for %s (%s): authorized=%s", interaction.user.name, interaction.user.id, is_authorized,
+              extra={"user_roles": user_role_ids, "required_role": role_id, "leader_id": leader_id})
+    
+    return is_authorized
 
 async def setup(bot):
     await bot.add_cog(TicketSystemCog(bot))
@@ -1,47 +1,112 @@
 import discord
 from discord.ext import commands
+import asyncio
+import logging
 import os
+import sys
+import time
 from dotenv import load_dotenv
 from utils.mongo_manager import mongo_manager
+from utils.metrics import metrics
+from utils.metrics_server import metrics_server
+from utils.instrumentation import TimedCommandTree, instrument_bot
+from utils.loop_watchdog import loop_watchdog
+from utils.logging_config import setup_logging
+from utils.command_sync import sync_commands
+from utils.extension_loader import ExtensionLoader
+from utils.lazy_cogs import LazyCogs
+from utils.sharding import bot_base, shard_kwargs
+from utils.member_cache import member_cache, cache_kwargs
+from utils import runtime
+from utils.shutdown import shutdown
+from utils.settings_service import settings_service
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+DEV_GUILD_ID = os.getenv("DEV_GUILD_ID")
+FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC") == "1" or "--force-sync" in sys.argv
+TUNED_RUNTIME = runtime.tuned_runtime_enabled()
 
-class BlackspireBot(commands.Bot):
+# commands.AutoShardedBot when SHARD_COUNT is set (see utils/sharding.py)
+class BlackspireBot(bot_base()):
     def __init__(self):
         intents = discord.Intents.default()
         intents.message_content = True
         intents.members = True
-        super().__init__(command_prefix="!", intents=intents, help_command=None)
+        # No member cache or startup chunking by default (see utils/member_cache.py)
+        super().__init__(command_prefix="!", intents=intents, help_command=None, tree_cls=TimedCommandTree,
+                         **cache_kwargs(intents), **shard_kwargs())
+        self.extension_loader = ExtensionLoader(self)
+        self.lazy_cogs = LazyCogs(self)
 
     async def setup_hook(self):
+        if TUNED_RUNTIME:
+            runtime.configure_executor(asyncio.get_running_loop())
         await mongo_manager.connect()
+
+        shutdown.install(self)
+        instrument_bot(self)
+        member_cache.install(self)
+        settings_service.start_watch()
+        loop_watchdog.start()
+        if os.getenv("METRICS_PORT"):
+            try:
+                await metrics_server.start(int(os.getenv("METRICS_PORT")))
+            except Exception:
+                log.exception("Failed to start metrics endpoint")
         
-        # Load cogs
-        for root, dirs, files in os.walk("cogs"):
-            for file in files:
-                if file.endswith(".py") and not file.startswith("__"):
-                    path = os.path.join(root, file)
-                    module_path = path.replace(os.sep, ".")[:-3]
-                    try:
-                        await self.load_extension(module_path)
-                        print(f"Loaded extension: {module_path}")
-                    except Exception as e:
-                        print(f"Failed to load extension {module_path}: {e}")
-
-        await self.tree.sync()
-        print("Synced slash commands.")
+        # Load cogs; the lazy ones in cogs/manifest.json load on first use
+        lazy = self.lazy_cogs.load_manifest()
+        await self.extension_loader.load_all("cogs", exclude=lazy)
+        self.lazy_cogs.install()
+
+        # Commands are global: with the shards split over processes, only the
+        # one running shard 0 syncs them
+        shard_ids = getattr(self, "shard_ids", None)
+        if shard_ids is None or 0 in shard_ids:
+            try:
+                await sync_commands(self, guild_id=DEV_GUILD_ID, force=FORCE_COMMAND_SYNC)
+            except Exception:
+                log.exception("Failed to sync slash commands")
+
+    async def add_cog(self, cog, **kwargs):
+        start = time.perf_counter()
+        try:
+            await super().add_cog(cog, **kwargs)
+        finally:
+            self.extension_loader.record_cog_load(cog, time.perf_counter() - start)
+
+    async def invoke(self, ctx):
+        if ctx.command is None:
+            return await super().invoke(ctx)
+        start = time.perf_counter()
+        try:
+            await super().invoke(ctx)
+        finally:
+            metrics.observe(f"command.{ctx.command.qualified_name}", time.perf_counter() - start)
+
+    async def close(self):
+        # Drains in-flight work and closes every client (see utils/shutdown.py)
+        await shutdown.run(self, super().close)
 
     async def on_ready(self):
-        print(f"Logged in as {self.user} (ID: {self.user.id})")
-        print("------")
+        log.info("Logged in as %s (ID: %s)", self.user, self.user.id)
+        if TUNED_RUNTIME:
+            # Cogs, views and guild state are loaded by now
+            runtime.freeze_gc()
 
 bot = BlackspireBot()
 
 if __name__ == "__main__":
+    setup_logging()
     if not BOT_TOKEN:
-        print("Error: BOT_TOKEN not found in .env")
+        log.error("BOT_TOKEN not found in .env")
     else:
-        print(f"Owner ID from env: {os.getenv('OWNER_ID')}")
-        bot.run(BOT_TOKEN)
+        log.info("Owner ID from env: %s", os.getenv('OWNER_ID'))
+        if TUNED_RUNTIME:
+            runtime.install()
+        # Our own pipeline is on the root logger; don't let discord.py add its handler
+        bot.run(BOT_TOKEN, log_handler=None)
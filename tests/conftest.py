@@ -0,0 +1,23 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.mongo_manager import mongo_manager
+from utils.storage_backends import MemoryBackend
+
+@pytest.fixture
+def run():
+    """Runs a coroutine to completion; the suite has no async plugin."""
+    return asyncio.run
+
+@pytest.fixture
+def memory_db(run):
+    """mongo_manager connected to a fresh in-memory backend."""
+    mongo_manager.use_backend(MemoryBackend())
+    run(mongo_manager.connect())
+    yield mongo_manager.backend.db
+    mongo_manager.use_backend(MemoryBackend())
@@ -0,0 +1,65 @@
+import pytest
+
+from utils.buc_odds import simulate_r1_odds
+
+def team(name, penalty_points=0):
+    return {"name": name, "penalty_points": penalty_points}
+
+def match(id, team1, team2, winner=None, score1=0, score2=0, percent1=0, percent2=0):
+    return {"id": id, "round": 1, "team1": team1, "team2": team2, "completed": winner is not None,
+            "winner": winner, "score1": score1, "score2": score2, "percent1": percent1, "percent2": percent2}
+
+TEAMS = [team(name) for name in "ABCDEF"]
+
+def round_robin(names, finished=()):
+    """Every pairing once; pairings in `finished` are won by the first team."""
+    matches = []
+    for i, first in enumerate(names):
+        for second in names[i + 1:]:
+            winner = first if (first, second) in finished else None
+            matches.append(match(len(matches) + 1, first, second, winner, 12 if winner else 0, 9 if winner else 0,
+                                 90 if winner else 0, 80 if winner else 0))
+    return matches
+
+def by_name(odds):
+    return {t["name"]: t for t in odds["teams"]}
+
+def test_probabilities_sum_to_the_number_of_places():
+    matches = round_robin("ABCDEF", finished={("A", "B"), ("C", "D"), ("A", "E")})
+    odds = simulate_r1_odds(TEAMS, matches, simulations=3000, seed=7)
+    assert odds["simulations"] == 3000
+    assert odds["remaining"] == 12
+    assert sum(t["top4"] for t in odds["teams"]) == pytest.approx(4)
+    assert sum(t["top2"] for t in odds["teams"]) == pytest.approx(2)
+    for t in odds["teams"]:
+        assert 0 <= t["top2"] <= t["top4"] <= 1
+
+def test_the_same_seed_gives_the_same_odds():
+    matches = round_robin("ABCDEF", finished={("B", "C")})
+    first = simulate_r1_odds(TEAMS, matches, simulations=2500, seed=42)
+    second = simulate_r1_odds(TEAMS, matches, simulations=2500, seed=42)
+    assert first == second
+
+def test_a_finished_table_is_deterministic():
+    names = "ABCDEF"
+    # A beats everyone, B everyone but A, and so on: no ties anywhere
+    finished = {(first, second) for i, first in enumerate(names) for second in names[i + 1:]}
+    matches = round_robin(names, finished)
+    odds = simulate_r1_odds(TEAMS, matches, simulations=500, seed=1)
+    assert odds["remaining"] == 0
+    assert [t["name"] for t in odds["teams"]] == list(names)
+    assert [t["points"] for t in odds["teams"]] == [10, 8, 6, 4, 2, 0]
+    assert [t["top4"] for t in odds["teams"]] == [1.0, 1.0, 1.0, 1.0, 0.0, 0.0]
+    assert [t["top2"] for t in odds["teams"]] == [1.0, 1.0, 0.0, 0.0, 0.0, 0.0]
+
+def test_penalty_points_come_off_the_table():
+    names = "ABCDEF"
+    finished = {(first, second) for i, first in enumerate(names) for second in names[i + 1:]}
+    teams = [team(name, penalty_points=9 if name == "A" else 0) for name in names]
+    odds = by_name(simulate_r1_odds(teams, round_robin(names, finished), simulations=500, seed=1))
+    assert odds["A"]["points"] == 1
+    assert odds["A"]["top4"] == 0.0
+    assert odds["E"]["top4"] == 1.0
+
+def test_no_teams():
+    assert simulate_r1_odds([], [], seed=1) == {"teams": [], "simulations": 0, "remaining": 0}
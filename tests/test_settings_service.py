@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+import utils.settings_service as settings_module
+from utils.mongo_manager import mongo_manager
+from utils.settings_service import Settings, SettingsService
+
+@pytest.fixture
+def service(memory_db):
+    return SettingsService()
+
+def test_reads_are_cached_until_an_update(run, service, monkeypatch):
+    loads = []
+    get_buc_settings = mongo_manager.get_buc_settings
+
+    async def counting():
+        loads.append(1)
+        return await get_buc_settings()
+
+    monkeypatch.setitem(settings_module.LOADERS, "buc", counting)
+    assert not run(service.get("buc"))
+    assert run(service.get("buc")) is run(service.get("buc"))
+    assert len(loads) == 1
+
+    run(service.update("buc", leaderboard_channel_id=1, leaderboard_message_id=2))
+    assert run(service.get("buc")).posted_message("leaderboard") == (1, 2)
+    assert len(loads) == 2
+
+def test_update_only_sets_the_given_fields(run, service):
+    run(service.update("bsn", bracket_channel_id=1, bracket_message_id=2))
+    run(service.update("bsn", approval_channel_id=3))
+    settings = run(service.get("bsn"))
+    assert settings.posted_message("bracket") == (1, 2)
+    assert settings.channel_id("approval") == 3
+    assert settings.posted_message("team_stats") is None
+
+@pytest.mark.parametrize("kind, values", [
+    ("buc", {"leaderboard_channel_id": "1"}),
+    ("buc", {"leaderboard_channel_id": True}),
+    ("buc", {"approval_channel_id": 1}),
+    ("bsn", {"negotiation_ping_id": "everyone"}),
+    ("cwl", {"bracket_channel_id": 1}),
+])
+def test_invalid_updates_are_rejected(run, service, kind, values):
+    with pytest.raises(ValueError):
+        run(service.update(kind, **values))
+    assert run(mongo_manager.get_bsn_settings()) is None
+    assert run(mongo_manager.get_buc_settings()) is None
+
+def test_a_read_started_before_an_update_is_not_cached(run, service, monkeypatch):
+    release = None
+    get_bsn_settings = mongo_manager.get_bsn_settings
+
+    async def slow_load():
+        doc = await get_bsn_settings()
+        await release.wait()
+        return doc
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        monkeypatch.setitem(settings_module.LOADERS, "bsn", slow_load)
+        read = asyncio.create_task(service.get("bsn"))
+        await asyncio.sleep(0) # the read has loaded the old document
+        await service.update("bsn", approval_channel_id=5)
+        release.set()
+        assert (await read).channel_id("approval") is None
+        monkeypatch.setitem(settings_module.LOADERS, "bsn", get_bsn_settings)
+        return await service.get("bsn")
+
+    assert run(scenario()).channel_id("approval") == 5
+
+def test_settings_snapshot_is_read_only():
+    settings = Settings("bsn", {"negotiation_ping_id": "@7", "bracket_channel_id": 1})
+    assert settings["bracket_channel_id"] == 1
+    assert "bracket_channel_id" in settings
+    assert settings.negotiation_ping() == "<@7>"
+    assert Settings("bsn", {"negotiation_ping_id": "&8"}).negotiation_ping() == "<@&8>"
+    with pytest.raises(TypeError):
+        settings._doc["bracket_channel_id"] = 2
@@ -0,0 +1,113 @@
+import pytest
+
+from utils.storage_backends import MemoryBackend, StorageBackend
+
+@pytest.fixture
+def collection(run):
+    backend = MemoryBackend()
+    db = run(backend.connect())
+    run(backend.ensure_indexes(db))
+    return db["buc_matches"]
+
+def find(run, collection, filter):
+    return run(collection.find(filter).to_list())
+
+def test_storage_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StorageBackend()
+
+@pytest.mark.parametrize("filter, expected", [
+    ({"round": {"$eq": 1}}, ["a", "c"]),
+    ({"round": {"$ne": 1}}, ["b", "d"]),
+    ({"round": {"$in": [2, 3]}}, ["b"]),
+    ({"round": {"$nin": [1]}}, ["b", "d"]),
+    ({"round": {"$exists": False}}, ["d"]),
+    ({"round": {"$gt": 1}}, ["b"]),
+    ({"round": {"$gte": 1}}, ["a", "b", "c"]),
+    ({"round": {"$lt": 2}}, ["a", "c"]),
+    ({"round": {"$lte": 2, "$gt": 1}}, ["b"]),
+])
+def test_query_operators(run, collection, filter, expected):
+    for id, round in (("a", 1), ("b", 2), ("c", 1), ("d", None)):
+        run(collection.insert_one({"id": id} if round is None else {"id": id, "round": round}))
+    assert [d["id"] for d in find(run, collection, filter)] == expected
+
+def test_update_operators(run, collection):
+    run(collection.insert_one({"id": "m", "score": {"team1": 1}, "version": 1, "note": "x"}))
+    run(collection.update_one({"id": "m"}, {
+        "$set": {"score.team2": 2},
+        "$unset": {"note": ""},
+        "$inc": {"version": 1},
+        "$setOnInsert": {"created": True},
+    }))
+    doc = run(collection.find_one({"id": "m"}, {"_id": 0}))
+    assert doc == {"id": "m", "score": {"team1": 1, "team2": 2}, "version": 2}
+
+def test_set_on_insert_applies_on_upsert(run, collection):
+    run(collection.update_one({"id": "new"}, {"$set": {"a": 1}, "$setOnInsert": {"b": 2}}, upsert=True))
+    assert run(collection.find_one({"id": "new"}, {"_id": 0})) == {"id": "new", "a": 1, "b": 2}
+
+def test_unsupported_operators_raise_value_error(run, collection):
+    run(collection.insert_one({"id": "m", "tags": ["x"]}))
+    with pytest.raises(ValueError, match=r"\$regex"):
+        find(run, collection, {"id": {"$regex": "m"}})
+    with pytest.raises(ValueError, match=r"\$push"):
+        run(collection.update_one({"id": "m"}, {"$set": {"a": 1}, "$push": {"tags": "y"}}))
+    # Rejected before anything is applied
+    assert "a" not in run(collection.find_one({"id": "m"}))
+
+def test_upsert_find_and_delete(run, collection):
+    run(collection.update_one({"id": "m1"}, {"$set": {"round": 1}}, upsert=True))
+    run(collection.update_one({"id": "m1"}, {"$set": {"round": 2}}, upsert=True))
+    run(collection.update_one({"id": "m2"}, {"$set": {"round": 1}}, upsert=True))
+    assert [(d["id"], d["round"]) for d in find(run, collection, {})] == [("m1", 2), ("m2", 1)]
+    assert run(collection.count_documents({"round": 1})) == 1
+
+    result = run(collection.update_one({"id": "missing"}, {"$set": {"round": 1}}))
+    assert result.matched_count == 0
+    assert run(collection.find_one({"id": "missing"})) is None
+
+    assert run(collection.delete_one({"id": "m1"})).deleted_count == 1
+    assert run(collection.delete_one({"id": "m1"})).deleted_count == 0
+    assert [d["id"] for d in find(run, collection, {})] == ["m2"]
+
+def test_find_returns_copies(run, collection):
+    run(collection.insert_one({"id": "m", "score": {"team1": 1}}))
+    doc = run(collection.find_one({"id": "m"}))
+    doc["score"]["team1"] = 99
+    assert run(collection.find_one({"id": "m"}))["score"]["team1"] == 1
+
+def test_unique_index(run, collection):
+    from utils.storage_backends import DuplicateKeyError
+    run(collection.insert_one({"id": "m1"}))
+    with pytest.raises(DuplicateKeyError):
+        run(collection.insert_one({"id": "m1"}))
+    run(collection.insert_one({"id": "m2"}))
+    with pytest.raises(DuplicateKeyError):
+        run(collection.update_one({"id": "m2"}, {"$set": {"id": "m1"}}))
+    assert [d["id"] for d in find(run, collection, {})] == ["m1", "m2"]
+
+def test_null_lookup_on_an_indexed_field_matches_missing(run, collection):
+    run(collection.insert_one({"id": "m1"}))
+    run(collection.insert_one({"team1": "A"}))
+    assert [d["team1"] for d in find(run, collection, {"id": None})] == ["A"]
+
+def test_sort_orders_missing_and_mixed_types_like_mongo(run, collection):
+    for id, value in (("a", "x"), ("b", 3), ("c", None), ("d", 1.5)):
+        run(collection.insert_one({"id": id} if value is None else {"id": id, "value": value}))
+    assert [d["id"] for d in run(collection.find({}).sort("value").to_list())] == ["c", "d", "b", "a"]
+    assert [d["id"] for d in run(collection.find({}).sort("value", -1).to_list())] == ["a", "b", "d", "c"]
+
+def test_ttl_index_expires_old_documents(run):
+    from datetime import datetime, timedelta, timezone
+    from utils.storage_backends import TTL_INDEXES
+    backend = MemoryBackend()
+    db = run(backend.connect())
+    run(backend.ensure_indexes(db))
+    sessions = db["ticket_sessions"]
+    _, seconds = TTL_INDEXES["ticket_sessions"]
+    now = datetime.now(timezone.utc)
+    run(sessions.insert_one({"channel_id": 1, "updated_at": now - timedelta(seconds=seconds + 60)}))
+    run(sessions.insert_one({"channel_id": 2, "updated_at": now}))
+    run(sessions.insert_one({"channel_id": 3})) # no date: never expires
+    assert sorted(d["channel_id"] for d in find(run, sessions, {})) == [2, 3]
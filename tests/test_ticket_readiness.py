@@ -0,0 +1,142 @@
+import asyncio
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+from utils.member_cache import member_cache
+from utils.ticket_readiness import TicketReadiness, find_owner
+
+BOT_ID = 1
+
+@dataclass(frozen=True)
+class User:
+    id: int
+    bot: bool
+
+def member(id, bot=False):
+    """A cached member; only id and bot are read."""
+    result = discord.Member.__new__(discord.Member)
+    result._user = User(id, bot)
+    return result
+
+def uncached(id):
+    """How discord.py hands back the overwrite of a member it hasn't seen."""
+    return discord.Object(id, type=discord.Member)
+
+def channel(*targets, id=100):
+    guild = SimpleNamespace(id=10, me=SimpleNamespace(id=BOT_ID))
+    return SimpleNamespace(id=id, guild=guild, overwrites={target: None for target in targets})
+
+def message(channel, author, *mentions):
+    return SimpleNamespace(channel=channel, author=author, mentions=list(mentions))
+
+@pytest.fixture
+def members(monkeypatch):
+    """What member_cache.resolve knows (id -> member), and the ids it was asked for."""
+    registry = SimpleNamespace(known={}, lookups=[])
+
+    async def resolve(guild, member_id):
+        registry.lookups.append(member_id)
+        return registry.known.get(member_id)
+
+    monkeypatch.setattr(member_cache, "resolve", resolve)
+    return registry
+
+def test_find_owner_skips_bots_and_roles(run, members):
+    role = discord.Object(2, type=discord.Role)
+    assert run(find_owner(channel(role, member(3, bot=True), member(4)))) == 4
+    assert members.lookups == []
+
+def test_find_owner_resolves_uncached_overwrites(run, members):
+    members.known[5] = member(5, bot=True)
+    members.known[6] = member(6)
+    assert run(find_owner(channel(uncached(BOT_ID), uncached(5), uncached(7), uncached(6)))) == 6
+    # Our own overwrite is never fetched; one who left (7) is skipped
+    assert members.lookups == [5, 7, 6]
+
+def test_find_owner_without_an_owner(run, members):
+    assert run(find_owner(channel(member(3, bot=True)))) is None
+
+def test_an_existing_owner_is_returned_straight_away(run, members):
+    readiness = TicketReadiness(timeout=1)
+    assert run(readiness.wait_for_owner(channel(member(4)))) == 4
+    assert not readiness._pending
+
+def test_the_owner_overwrite_arriving_later(run, members):
+    readiness = TicketReadiness(timeout=1)
+    ticket = channel(member(3, bot=True))
+
+    async def scenario():
+        waiting = asyncio.create_task(readiness.wait_for_owner(ticket))
+        await asyncio.sleep(0)
+        ticket.overwrites[member(4)] = None
+        await readiness.channel_updated(ticket)
+        return await waiting
+
+    assert run(scenario()) == 4
+    assert not readiness._pending
+
+def test_a_welcome_mention_is_preferred_over_overwrites(run, members):
+    readiness = TicketReadiness(timeout=1)
+    ticket = channel()
+    ticket_tool = member(2, bot=True)
+
+    async def scenario():
+        waiting = asyncio.create_task(readiness.wait_for_owner(ticket))
+        await asyncio.sleep(0)
+        ticket.overwrites[member(4)] = None
+        await readiness.message_received(message(ticket, ticket_tool, member(3, bot=True), member(8)))
+        return await waiting
+
+    assert run(scenario()) == 8
+
+def test_a_user_message_falls_back_to_the_overwrites(run, members):
+    readiness = TicketReadiness(timeout=1)
+    ticket = channel()
+
+    async def scenario():
+        waiting = asyncio.create_task(readiness.wait_for_owner(ticket))
+        await asyncio.sleep(0)
+        ticket.overwrites[member(4)] = None
+        await readiness.message_received(message(ticket, member(9), member(8)))
+        return await waiting
+
+    assert run(scenario()) == 4
+
+def test_timeout_gives_none(run, members):
+    readiness = TicketReadiness(timeout=0.01)
+    assert run(readiness.wait_for_owner(channel())) is None
+    assert not readiness._pending
+
+def test_cancel_stops_waiting(run, members):
+    readiness = TicketReadiness(timeout=5)
+    ticket = channel()
+
+    async def scenario():
+        waiting = asyncio.create_task(readiness.wait_for_owner(ticket))
+        await asyncio.sleep(0)
+        readiness.cancel(ticket.id)
+        return await waiting
+
+    assert run(scenario()) is None
+    assert not readiness._pending
+
+def test_the_oldest_wait_gives_up_when_too_many_are_pending(run, members):
+    readiness = TicketReadiness(timeout=5, max_pending=2)
+    tickets = [channel(id=i) for i in (100, 101, 102)]
+
+    async def scenario():
+        waiting = []
+        for ticket in tickets:
+            waiting.append(asyncio.create_task(readiness.wait_for_owner(ticket)))
+            await asyncio.sleep(0)
+        first = await waiting[0]
+        for ticket in tickets[1:]:
+            readiness.cancel(ticket.id)
+        await asyncio.gather(*waiting[1:])
+        return first
+
+    assert run(scenario()) is None
+    assert not readiness._pending
@@ -0,0 +1,59 @@
+from utils.tracked_document import TrackedDocument, diff
+
+def test_clean_document_has_no_update():
+    doc = TrackedDocument({"_id": 1, "id": "m", "score": {"team1": 1}})
+    assert doc.changes() == ({}, [])
+    assert doc.update_spec() is None
+
+def test_changed_added_and_removed_fields():
+    doc = TrackedDocument({"_id": 1, "id": "m", "winner": None, "note": "x"})
+    doc["winner"] = "A"
+    doc["completed"] = True
+    del doc["note"]
+    assert doc.update_spec() == {"$set": {"winner": "A", "completed": True}, "$unset": {"note": ""}}
+
+def test_nested_changes_become_dotted_paths():
+    doc = TrackedDocument({"id": "m", "pending_stats": {"team1_stats": [1], "team2_stats": [2]}})
+    doc["pending_stats"]["team2_stats"] = [3]
+    doc["pending_stats"]["extra"] = 1
+    del doc["pending_stats"]["team1_stats"]
+    assert doc.update_spec() == {
+        "$set": {"pending_stats.team2_stats": [3], "pending_stats.extra": 1},
+        "$unset": {"pending_stats.team1_stats": ""},
+    }
+
+def test_replacing_a_dict_with_an_empty_one_sets_it():
+    doc = TrackedDocument({"pending_stats": {"team1_stats": [1]}})
+    doc["pending_stats"] = {}
+    assert doc.update_spec() == {"$set": {"pending_stats": {}}}
+
+def test_id_is_never_set():
+    doc = TrackedDocument({"_id": 1, "id": "m"})
+    doc["_id"] = 2
+    assert doc.update_spec() is None
+
+def test_mark_clean_takes_a_deep_snapshot():
+    doc = TrackedDocument({"score": {"team1": 1}})
+    doc["score"]["team1"] = 2
+    doc.mark_clean()
+    assert doc.update_spec() is None
+    doc["score"]["team1"] = 3
+    assert doc.update_spec() == {"$set": {"score.team1": 3}}
+
+def test_diff_of_lists_sets_the_whole_list():
+    assert diff({"players": [1, 2]}, {"players": [1, 3]}) == ({"players": [1, 3]}, [])
+
+def test_saving_a_tracked_match_keeps_concurrent_edits(run, memory_db):
+    from utils.mongo_manager import mongo_manager
+    run(mongo_manager.save_bsn_match({"id": "m", "date_str": None, "thread_id": None}))
+    match = run(mongo_manager.get_bsn_match("m"))
+    assert isinstance(match, TrackedDocument)
+
+    # Someone else sets the thread while this copy is being edited
+    run(mongo_manager.update_bsn_match_field("m", "thread_id", 42))
+    match["date_str"] = "Friday 8pm"
+    run(mongo_manager.save_bsn_match(match))
+
+    stored = run(mongo_manager.get_bsn_match("m"))
+    assert (stored["date_str"], stored["thread_id"]) == ("Friday 8pm", 42)
+    assert match.update_spec() is None
@@ -0,0 +1,71 @@
+import pytest
+
+from utils.metrics import metrics
+from utils.mongo_manager import mongo_manager, VersionConflict, VERSION_RETRIES
+
+def conflicts():
+    return metrics.counters().get(("mongo_version_conflicts_total", (("collection", "bsn_matches"),)), 0)
+
+def test_every_write_bumps_the_version(run, memory_db):
+    run(mongo_manager.save_bsn_match({"id": "m", "team1": "A"}))
+    run(mongo_manager.update_bsn_match_field("m", "thread_id", 1))
+    assert run(mongo_manager.get_bsn_match("m"))["version"] == 2
+
+def test_checked_save_refuses_a_stale_copy(run, memory_db):
+    run(mongo_manager.save_bsn_match({"id": "m", "team1": "A"}))
+    stale = run(mongo_manager.get_bsn_match("m"))
+    run(mongo_manager.update_bsn_match_field("m", "winner", "A"))
+
+    stale["winner"] = "B"
+    assert run(mongo_manager.save_changes("bsn_matches", "id", stale, check_version=True)) is False
+    assert run(mongo_manager.get_bsn_match("m"))["winner"] == "A"
+
+def test_checked_save_adopts_unversioned_documents(run, memory_db):
+    run(memory_db["bsn_matches"].insert_one({"id": "legacy", "team1": "A"}))
+    match = run(mongo_manager.get_bsn_match("legacy"))
+    match["winner"] = "A"
+    assert run(mongo_manager.save_changes("bsn_matches", "id", match, check_version=True)) is True
+    assert match["version"] == 1
+
+def test_update_versioned_retries_after_a_conflict(run, memory_db, monkeypatch):
+    run(mongo_manager.save_bsn_match({"id": "m", "team1_total_stars": 0}))
+    save_changes = mongo_manager.save_changes
+    attempts = []
+
+    async def conflicting_once(collection_name, key, doc, check_version=False):
+        attempts.append(dict(doc))
+        if len(attempts) == 1:
+            # Another captain's submission lands between the read and the write
+            await mongo_manager.update_bsn_match_field("m", "team2_total_stars", 7)
+        return await save_changes(collection_name, key, doc, check_version)
+
+    monkeypatch.setattr(mongo_manager, "save_changes", conflicting_once)
+    before = conflicts()
+
+    def record(match):
+        match["team1_total_stars"] = 9
+        return match.get("team2_total_stars")
+
+    match, result = run(mongo_manager.update_bsn_match("m", record))
+    assert len(attempts) == 2
+    assert conflicts() == before + 1
+    # The retry re-read the match, so the other submission is kept
+    assert result == 7
+    stored = run(mongo_manager.get_bsn_match("m"))
+    assert (stored["team1_total_stars"], stored["team2_total_stars"]) == (9, 7)
+    assert match["version"] == stored["version"]
+
+def test_update_versioned_gives_up_with_version_conflict(run, memory_db, monkeypatch):
+    run(mongo_manager.save_bsn_match({"id": "m"}))
+
+    async def always_conflicting(*args, **kwargs):
+        return False
+
+    monkeypatch.setattr(mongo_manager, "save_changes", always_conflicting)
+    calls = []
+    with pytest.raises(VersionConflict):
+        run(mongo_manager.update_bsn_match("m", calls.append))
+    assert len(calls) == VERSION_RETRIES
+
+def test_update_versioned_missing_document(run, memory_db):
+    assert run(mongo_manager.update_buc_match("nope", lambda m: 1)) == (None, None)
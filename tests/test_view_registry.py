@@ -0,0 +1,50 @@
+from collections import OrderedDict
+
+import pytest
+
+from utils.view_registry import BoundedView, ViewRegistry, view_registry
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    monkeypatch.setattr(view_registry, "_views", OrderedDict())
+
+def test_the_least_recently_used_view_is_stopped():
+    registry = ViewRegistry(max_views=2)
+    stopped = []
+
+    class View:
+        def __init__(self, name):
+            self.name = name
+
+        def stop(self):
+            stopped.append(self.name)
+
+    first, second, third = View("first"), View("second"), View("third")
+    registry.track(first)
+    registry.track(second)
+    registry.touch(first)
+    registry.track(third)
+    assert stopped == ["second"]
+    assert len(registry) == 2
+
+def test_an_interaction_marks_a_bounded_view_as_used(run, monkeypatch):
+    monkeypatch.setattr(view_registry, "max_views", 2)
+
+    async def scenario():
+        first, second = BoundedView(), BoundedView()
+        assert await first.interaction_check(None) is True
+        third = BoundedView()
+        return first, second, third
+
+    first, second, third = run(scenario())
+    assert second.is_finished()
+    assert not first.is_finished() and not third.is_finished()
+
+def test_stop_group_stops_only_that_group(run):
+    async def scenario():
+        views = [BoundedView(group=1), BoundedView(group=1), BoundedView(group=2)]
+        view_registry.stop_group(1)
+        return views
+
+    views = run(scenario())
+    assert [view.is_finished() for view in views] == [True, True, False]
@@ -0,0 +1,45 @@
+# In-memory capture of interview answers.
+# While a question is open, TicketSystemCog.on_message feeds the applicant's
+# messages in here so "Done" can build the answer without reading the
+# channel history back over REST.
+
+from collections import OrderedDict, deque
+
+MAX_MESSAGES_PER_ANSWER = 25
+MAX_OPEN_QUESTIONS = 5000
+
+class AnswerBuffer:
+    def __init__(self, max_messages=MAX_MESSAGES_PER_ANSWER, max_open=MAX_OPEN_QUESTIONS):
+        self.max_messages = max_messages
+        self.max_open = max_open
+        self._open = OrderedDict() # (channel_id, user_id) -> deque of message contents
+
+    def open(self, channel_id, user_id):
+        """Starts capturing user_id's messages in channel_id, dropping anything captured before."""
+        key = (channel_id, user_id)
+        self._open.pop(key, None)
+        self._open[key] = deque(maxlen=self.max_messages)
+        # Oldest questions fall back to a history scan if too many are open at once
+        while len(self._open) > self.max_open:
+            self._open.popitem(last=False)
+
+    def add(self, message):
+        buffer = self._open.get((message.channel.id, message.author.id))
+        if buffer is None:
+            return False
+        buffer.append(message.content)
+        return True
+
+    def get(self, channel_id, user_id):
+        """Captured messages, or None if nothing is being captured (e.g. after a restart)."""
+        buffer = self._open.get((channel_id, user_id))
+        return None if buffer is None else list(buffer)
+
+    def close(self, channel_id, user_id):
+        self._open.pop((channel_id, user_id), None)
+
+    def close_channel(self, channel_id):
+        for key in [k for k in self._open if k[0] == channel_id]:
+            del self._open[key]
+
+answer_buffer = AnswerBuffer()
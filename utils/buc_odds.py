@@ -0,0 +1,136 @@
+# Monte Carlo projection of the BUC Round 1 table.
+# Remaining fixtures are simulated from each team's results so far and the
+# simulated tables are ranked with the same order the leaderboard uses:
+# points (after penalty_points), then stars, then total percent.
+
+import hashlib
+import numpy as np
+
+DEFAULT_SIMULATIONS = 20000
+PLAYERS_PER_TEAM = 5
+MAX_STARS = PLAYERS_PER_TEAM * 3
+
+# Teams with little history are pulled towards these rates,
+# weighted as if they had already played PRIOR_MATCHES matches.
+PRIOR_MATCHES = 2
+PRIOR_STAR_RATE = 0.6
+PRIOR_PERCENT = 75.0
+PERCENT_SPREAD = 12.0
+
+CHUNK_SIZE = 2000
+
+def results_fingerprint(teams, matches):
+    """Changes whenever a Round 1 result, the team list or a penalty changes."""
+    parts = sorted(f"{t['name']}|{t.get('penalty_points', 0)}" for t in teams)
+    for m in matches:
+        if m.get("round") != 1:
+            continue
+        parts.append(f"{m['id']}|{m.get('team1')}|{m.get('team2')}|{m.get('completed')}|{m.get('winner')}|"
+                     f"{m.get('score1', 0)}|{m.get('score2', 0)}|{m.get('percent1', 0)}|{m.get('percent2', 0)}")
+    return hashlib.sha1("\n".join(sorted(parts)).encode()).hexdigest()
+
+def _draw(rng, shape, mean, sd, upper, rounded=False):
+    values = rng.standard_normal(shape, dtype=np.float32)
+    values *= sd
+    values += mean
+    if rounded:
+        np.rint(values, out=values)
+    return np.clip(values, 0, upper, out=values)
+
+def simulate_r1_odds(teams, matches, simulations=DEFAULT_SIMULATIONS, seed=None):
+    names = [t["name"] for t in teams]
+    n = len(names)
+    if n == 0:
+        return {"teams": [], "simulations": 0, "remaining": 0}
+
+    index = {name: i for i, name in enumerate(names)}
+    points = np.zeros(n)
+    stars = np.zeros(n)
+    percent = np.zeros(n)
+    played = np.zeros(n)
+    remaining = []
+
+    # Current table, same rules as BUCSystem.update_leaderboard
+    for m in matches:
+        if m.get("round") != 1:
+            continue
+        i1, i2 = index.get(m.get("team1")), index.get(m.get("team2"))
+        if not m.get("completed"):
+            if i1 is not None and i2 is not None:
+                remaining.append((i1, i2))
+            continue
+
+        for i, score_key, percent_key in ((i1, "score1", "percent1"), (i2, "score2", "percent2")):
+            if i is None:
+                continue
+            played[i] += 1
+            stars[i] += m.get(score_key, 0)
+            percent[i] += m.get(percent_key, 0)
+
+        winner = m.get("winner")
+        if winner == "Tie":
+            for i in (i1, i2):
+                if i is not None:
+                    points[i] += 1
+        elif winner in index and winner in (m.get("team1"), m.get("team2")):
+            points[index[winner]] += 2
+
+    for i, t in enumerate(teams):
+        points[i] -= t.get("penalty_points", 0)
+
+    star_rate = (stars + PRIOR_MATCHES * MAX_STARS * PRIOR_STAR_RATE) / ((played + PRIOR_MATCHES) * MAX_STARS)
+    percent_mean = (percent + PRIOR_MATCHES * PRIOR_PERCENT) / (played + PRIOR_MATCHES)
+
+    # Stars ~ Binomial(15, rate), drawn through its normal approximation (much cheaper at this size)
+    star_mean = (MAX_STARS * star_rate).astype(np.float32)
+    star_sd = np.sqrt(MAX_STARS * star_rate * (1 - star_rate)).astype(np.float32)
+    percent_mean = percent_mean.astype(np.float32)
+
+    fixtures = np.array(remaining, dtype=np.intp).reshape(-1, 2)
+    home, away = fixtures[:, 0], fixtures[:, 1]
+    r = len(fixtures)
+
+    # Fixture -> team incidence matrices turn per-match arrays into per-team totals
+    home_onehot = np.zeros((r, n), dtype=np.float32)
+    home_onehot[np.arange(r), home] = 1
+    away_onehot = np.zeros((r, n), dtype=np.float32)
+    away_onehot[np.arange(r), away] = 1
+
+    rng = np.random.default_rng(seed)
+    top4 = np.zeros(n)
+    top2 = np.zeros(n)
+
+    # Chunked so the working set stays small for large fixture lists
+    for start in range(0, simulations, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, simulations - start)
+
+        s1 = _draw(rng, (size, r), star_mean[home], star_sd[home], MAX_STARS, rounded=True)
+        s2 = _draw(rng, (size, r), star_mean[away], star_sd[away], MAX_STARS, rounded=True)
+        p1 = _draw(rng, (size, r), percent_mean[home], PERCENT_SPREAD, 100)
+        p2 = _draw(rng, (size, r), percent_mean[away], PERCENT_SPREAD, 100)
+
+        # Winner: stars first, then percent, otherwise a tie (2 / 1 / 0 points)
+        win1 = (s1 > s2) | ((s1 == s2) & (p1 > p2))
+        win2 = (s2 > s1) | ((s1 == s2) & (p2 > p1))
+        tie = ~(win1 | win2)
+        pts1 = 2 * win1.astype(np.float32) + tie
+        pts2 = 2 * win2.astype(np.float32) + tie
+
+        sim_points = points + pts1 @ home_onehot + pts2 @ away_onehot
+        sim_stars = stars + s1 @ home_onehot + s2 @ away_onehot
+        sim_percent = percent + p1 @ home_onehot + p2 @ away_onehot
+
+        # Rank every simulated table; the random key only splits exact ties
+        order = np.lexsort((rng.random((size, n)), -sim_percent, -sim_stars, -sim_points), axis=-1)
+        top4 += np.bincount(order[:, :4].ravel(), minlength=n)
+        top2 += np.bincount(order[:, :2].ravel(), minlength=n)
+
+    top4 /= simulations
+    top2 /= simulations
+
+    results = [
+        {"name": names[i], "points": int(points[i]), "top4": float(top4[i]), "top2": float(top2[i])}
+        for i in range(n)
+    ]
+    results.sort(key=lambda x: (x["top4"], x["top2"], x["points"]), reverse=True)
+    return {"teams": results, "simulations": simulations, "remaining": len(remaining)}
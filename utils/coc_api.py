@@ -1,9 +1,13 @@
 import coc
+import logging
 import os
 from dotenv import load_dotenv
+from utils.metrics import metrics
 
 load_dotenv(override=True)
 
+log = logging.getLogger(__name__)
+
 class CoCClient:
     def __init__(self):
         self.client = coc.Client()
@@ -19,13 +23,13 @@ class CoCClient:
                 try:
                     await self.client.login_with_tokens(self.token.strip())
                     self._is_logged_in = True
-                    print("Logged in to CoC API via coc.py")
+                    log.info("Logged in to CoC API via coc.py")
                 except coc.InvalidCredentials:
-                    print("Invalid CoC API Token.")
+                    log.error("Invalid CoC API Token.")
                 except Exception as e:
-                    print(f"Failed to login to CoC API: {e}")
+                    log.error("Failed to login to CoC API: %s", e)
             else:
-                print("No CoC API Token found.")
+                log.error("No CoC API Token found.")
 
     async def get_player(self, tag):
         await self.ensure_login()
@@ -33,13 +37,14 @@ class CoCClient:
             return None
 
         try:
-            player = await self.client.get_player(tag)
+            with metrics.io_timer("coc", "coc.get_player"):
+                player = await self.client.get_player(tag)
             return player
         except coc.NotFound:
-            print(f"Player {tag} not found.")
+            log.info("Player %s not found.", tag)
             return None
         except Exception as e:
-            print(f"Error fetching player {tag}: {e}")
+            log.warning("Error fetching player %s: %s", tag, e)
             return None
 
     async def get_clan(self, tag):
@@ -48,16 +53,20 @@ class CoCClient:
             return None
 
         try:
-            clan = await self.client.get_clan(tag)
+            with metrics.io_timer("coc", "coc.get_clan"):
+                clan = await self.client.get_clan(tag)
             return clan
         except coc.NotFound:
-            print(f"Clan {tag} not found.")
+            log.info("Clan %s not found.", tag)
             return None
         except Exception as e:
-            print(f"Error fetching clan {tag}: {e}")
+            log.warning("Error fetching clan %s: %s", tag, e)
             return None
 
     async def close(self):
-        await self.client.close()
+        # coc.Client has no HTTP session to close before the first login
+        if self._is_logged_in:
+            await self.client.close()
+            self._is_logged_in = False
 
 coc_api = CoCClient()
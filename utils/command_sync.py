@@ -0,0 +1,65 @@
+# Slash command sync that only talks to Discord when the tree changed.
+# The payload discord.py would upload is hashed and the hash stored in Mongo
+# (bot_meta) per application and scope, so restarts with an unchanged tree
+# skip the global bulk upsert (slow, and rate limited per day).
+#
+#   DEV_GUILD_ID=<id>         sync to that guild only (instant, for development)
+#   FORCE_COMMAND_SYNC=1      sync even if the hash matches (or run with --force-sync)
+
+import hashlib
+import json
+import logging
+import discord
+from utils.mongo_manager import mongo_manager
+
+log = logging.getLogger(__name__)
+
+def tree_hash(tree, guild=None, lazy_cogs=None):
+    """A stable hash of the commands tree.sync(guild=guild) would upload.
+
+    Commands of lazy extensions are represented by lazy_cogs.fingerprint()
+    instead, so the hash doesn't depend on which of them happen to be loaded.
+    """
+    commands = tree.get_commands(guild=guild)
+    if lazy_cogs is not None:
+        commands = [c for c in commands if not lazy_cogs.owns_command(c)]
+    payload = [command.to_dict(tree) for command in commands]
+    payload.sort(key=lambda c: (c.get("type", 1), c["name"]))
+    if lazy_cogs is not None:
+        payload.append({"lazy": lazy_cogs.fingerprint()})
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def sync_scope(bot, guild_id=None):
+    return f"{bot.application_id}:guild:{guild_id}" if guild_id else f"{bot.application_id}:global"
+
+async def sync_commands(bot, guild_id=None, force=False):
+    """Syncs bot.tree (globally, or to guild_id) if it changed since the last sync. Returns whether it synced."""
+    guild = discord.Object(id=int(guild_id)) if guild_id else None
+    if guild is not None:
+        bot.tree.copy_global_to(guild=guild)
+
+    lazy_cogs = getattr(bot, "lazy_cogs", None)
+    digest = tree_hash(bot.tree, guild, lazy_cogs)
+    scope = sync_scope(bot, guild_id)
+    if not force:
+        try:
+            stored = await mongo_manager.get_command_sync_hash(scope)
+        except Exception as e:
+            log.warning("Could not read the stored command hash: %s", e)
+            stored = None
+        if stored == digest:
+            log.info("Slash commands unchanged (%s), skipping sync.", digest[:12])
+            return False
+
+    if lazy_cogs is not None:
+        # The upload replaces the whole command list, so lazy commands must be in the tree
+        await lazy_cogs.load_all()
+        if guild is not None:
+            bot.tree.copy_global_to(guild=guild)
+    await bot.tree.sync(guild=guild)
+    try:
+        await mongo_manager.save_command_sync_hash(scope, digest)
+    except Exception as e:
+        log.warning("Could not store the command hash: %s", e)
+    log.info("Synced slash commands to %s (%s).", f"guild {guild_id}" if guild else "all guilds", digest[:12])
+    return True
@@ -0,0 +1,163 @@
+# Startup loader for the extensions under cogs/.
+# 1. The third-party modules the extensions (and the utils they use) import
+#    are found by parsing the files and imported concurrently in worker
+#    threads, so one slow import (numpy, coc, motor) no longer holds up the
+#    rest. Project modules are left to the loop thread: they create
+#    loop-bound singletons at import time.
+# 2. Extensions are loaded in waves: an extension may declare
+#    DEPENDS_ON = ["cogs.x.y"] at module level; everything whose
+#    dependencies are loaded goes in the same wave, concurrently, so slow
+#    cog_load()s (Mongo reads, view registration) overlap.
+#
+# Per extension it records the dependency import time, the module exec time
+# and the cog_load time (wall clock, so it includes waiting on other cogs in
+# the same wave), logs a report and exposes them as
+# startup_extension_seconds{extension, phase}.
+
+import ast
+import asyncio
+import importlib
+import logging
+import os
+import sys
+import time
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def discover(root="cogs"):
+    """Module paths of every extension file under root, in a stable order."""
+    modules = []
+    for dirpath, _, files in os.walk(root):
+        for file in files:
+            if file.endswith(".py") and not file.startswith("__"):
+                modules.append(os.path.join(dirpath, file).replace(os.sep, ".")[:-3])
+    return sorted(modules)
+
+def module_file(name):
+    """The source file of a project module, or None for anything else."""
+    path = os.path.join(PROJECT_ROOT, *name.split("."))
+    for candidate in (path + ".py", os.path.join(path, "__init__.py")):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def parse_module(path):
+    """(absolute imports, DEPENDS_ON) of a source file."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    imports = set()
+    depends_on = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            imports.add(node.module)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "DEPENDS_ON" for t in node.targets):
+            depends_on = list(ast.literal_eval(node.value))
+    return imports, depends_on
+
+def external_imports(path, seen=None):
+    """Third-party / stdlib modules imported by path and, recursively, the project modules it imports."""
+    seen = set() if seen is None else seen
+    imports, _ = parse_module(path)
+    external = set()
+    for name in imports:
+        source = module_file(name)
+        if source is None:
+            external.add(name)
+        elif source not in seen:
+            seen.add(source)
+            external |= external_imports(source, seen)
+    return external
+
+class ExtensionLoader:
+    def __init__(self, bot):
+        self.bot = bot
+        self.timings = {} # extension -> {"import": s, "exec": s, "cog_load": s}
+        self.failed = {}
+        self.elapsed = 0.0
+
+    def record_cog_load(self, cog, seconds):
+        """Called from BlackspireBot.add_cog."""
+        extension = type(cog).__module__
+        if extension in self.timings:
+            self.timings[extension]["cog_load"] += seconds
+
+    async def load_all(self, root="cogs", exclude=()):
+        start = time.perf_counter()
+        extensions = [name for name in discover(root) if name not in exclude]
+        depends_on = {}
+        for name in extensions:
+            self.timings[name] = {"import": 0.0, "exec": 0.0, "cog_load": 0.0}
+            depends_on[name] = parse_module(module_file(name))[1]
+
+        await self.preimport(extensions)
+
+        loaded = set()
+        pending = list(extensions)
+        while pending:
+            wave = [name for name in pending if all(dep in loaded for dep in depends_on[name])]
+            if not wave:
+                for name in pending:
+                    self.failed[name] = f"unmet DEPENDS_ON: {[d for d in depends_on[name] if d not in loaded]}"
+                    log.error("Failed to load extension %s: %s", name, self.failed[name])
+                break
+            await asyncio.gather(*(self.load(name) for name in wave))
+            loaded.update(name for name in wave if name not in self.failed)
+            pending = [name for name in pending if name not in wave]
+
+        self.elapsed = time.perf_counter() - start
+        self.publish()
+        log.info("Extension startup timing:\n%s", self.report())
+
+    async def preimport(self, extensions):
+        owner = {} # external module -> first extension that needs it
+        for name in extensions:
+            for module in sorted(external_imports(module_file(name))):
+                if module not in sys.modules:
+                    owner.setdefault(module, name)
+
+        async def import_one(module):
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(importlib.import_module, module)
+            except Exception as e:
+                # load_extension reports it properly if the extension really needs it
+                log.debug("Pre-import of %s failed: %s", module, e)
+            self.timings[owner[module]]["import"] += time.perf_counter() - started
+
+        await asyncio.gather(*(import_one(module) for module in owner))
+
+    async def load(self, name):
+        started = time.perf_counter()
+        try:
+            await self.bot.load_extension(name)
+            log.info("Loaded extension: %s", name)
+        except Exception as e:
+            self.failed[name] = str(e)
+            log.exception("Failed to load extension %s", name)
+        timing = self.timings[name]
+        # Module exec is synchronous and runs before setup() first awaits,
+        # so the rest of the wall time is setup / cog_load
+        timing["exec"] = max(0.0, time.perf_counter() - started - timing["cog_load"])
+
+    def publish(self):
+        metrics.gauge("startup_seconds", lambda: self.elapsed)
+        for name, timing in self.timings.items():
+            for phase in timing:
+                metrics.gauge("startup_extension_seconds", lambda t=timing, p=phase: t[p], extension=name, phase=phase)
+
+    def report(self):
+        def ms(seconds):
+            return f"{seconds * 1000:.0f}ms"
+
+        lines = [f"{'extension':<40}{'import':>9}{'exec':>9}{'cog_load':>10}"]
+        for name, t in sorted(self.timings.items(), key=lambda item: -sum(item[1].values())):
+            status = "  FAILED" if name in self.failed else ""
+            lines.append(f"{name:<40}{ms(t['import']):>9}{ms(t['exec']):>9}{ms(t['cog_load']):>10}{status}")
+        lines.append(f"total {ms(self.elapsed)}")
+        return "\n".join(lines)
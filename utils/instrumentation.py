@@ -0,0 +1,140 @@
+# Latency metrics for the discord.py side of the bot.
+#   command.<name>   slash / context menu commands (TimedCommandTree) and prefix commands
+#   view.<View>      component callbacks, per view class (or DynamicItem class)
+#   rest.<METHOD>.<route>  Discord REST calls, by route template
+# plus the gateway latency gauge (per shard when sharded) and
+# gateway_events_total{shard, event}. The view, REST and gateway hooks wrap
+# discord.py internals (View._scheduled_task, ViewStore.schedule_dynamic_item_call,
+# HTTPClient.request, DiscordWebSocket.from_client) that have been stable
+# throughout 2.x. If one of them is missing in the installed discord.py that
+# hook is skipped with a warning and the bot runs without those metrics.
+
+import functools
+import logging
+import math
+import time
+import discord
+from discord import app_commands
+from discord.gateway import DiscordWebSocket
+from discord.ui import view as ui_view
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+def _has_hook(owner, name, metric):
+    if hasattr(owner, name):
+        return True
+    log.warning("%s.%s is missing in this discord.py; %s metrics are disabled",
+                getattr(owner, "__name__", type(owner).__name__), name, metric)
+    return False
+
+class TimedCommandTree(app_commands.CommandTree):
+    async def _call(self, interaction):
+        start = time.perf_counter()
+        try:
+            lazy_cogs = getattr(self.client, "lazy_cogs", None)
+            if lazy_cogs is not None:
+                # Commands of a lazy extension that isn't loaded yet
+                await lazy_cogs.ensure_for(interaction.data.get("name"))
+            await super()._call(interaction)
+        finally:
+            command = interaction.command
+            name = command.qualified_name if command is not None else "unknown"
+            metrics.observe(f"command.{name}", time.perf_counter() - start)
+
+def instrument_http(http):
+    """Times every REST call made through http (the bot's discord.http.HTTPClient)."""
+    if not _has_hook(http, "request", "REST"):
+        return
+    request = http.request
+
+    @functools.wraps(request)
+    async def timed_request(route, **kwargs):
+        with metrics.timer(f"rest.{route.method}.{route.path}"):
+            return await request(route, **kwargs)
+
+    http.request = timed_request
+
+def instrument_views():
+    """Times every view and DynamicItem callback."""
+    if getattr(discord.ui.View, "_metrics_instrumented", False):
+        return
+    discord.ui.View._metrics_instrumented = True
+
+    if _has_hook(discord.ui.View, "_scheduled_task", "view callback"):
+        _instrument_view_callbacks()
+    if (_has_hook(ui_view, "ViewStore", "dynamic item")
+            and _has_hook(ui_view.ViewStore, "schedule_dynamic_item_call", "dynamic item")):
+        _instrument_dynamic_items()
+
+def _instrument_view_callbacks():
+    scheduled_task = discord.ui.View._scheduled_task
+
+    @functools.wraps(scheduled_task)
+    async def timed_scheduled_task(self, item, interaction):
+        with metrics.timer(f"view.{type(self).__name__}"):
+            return await scheduled_task(self, item, interaction)
+
+    discord.ui.View._scheduled_task = timed_scheduled_task
+
+def _instrument_dynamic_items():
+    store = ui_view.ViewStore
+    dynamic_item_call = store.schedule_dynamic_item_call
+
+    @functools.wraps(dynamic_item_call)
+    async def timed_dynamic_item_call(self, component_type, factory, interaction, custom_id, match):
+        with metrics.timer(f"view.{factory.__name__}"):
+            return await dynamic_item_call(self, component_type, factory, interaction, custom_id, match)
+
+    store.schedule_dynamic_item_call = timed_dynamic_item_call
+
+def instrument_gateway():
+    """Counts gateway events per shard and event type."""
+    if getattr(DiscordWebSocket, "_metrics_instrumented", False):
+        return
+    DiscordWebSocket._metrics_instrumented = True
+    if not _has_hook(DiscordWebSocket, "from_client", "gateway event"):
+        return
+
+    from_client = DiscordWebSocket.from_client.__func__
+
+    @functools.wraps(from_client)
+    async def counting_from_client(cls, client, **kwargs):
+        # Every (re)connect builds a new socket; _dispatch is set on it before
+        # the first event is read
+        ws = await from_client(cls, client, **kwargs)
+        dispatch = getattr(ws, "_dispatch", None)
+        if dispatch is None:
+            log.warning("DiscordWebSocket._dispatch is missing in this discord.py; gateway event metrics are disabled")
+            return ws
+        shard = str(ws.shard_id or 0)
+
+        def counting_dispatch(event, *args, **kw):
+            if event == "socket_event_type":
+                metrics.inc("gateway_events_total", shard=shard, event=args[0])
+            return dispatch(event, *args, **kw)
+
+        ws._dispatch = counting_dispatch
+        return ws
+
+    DiscordWebSocket.from_client = classmethod(counting_from_client)
+
+def gateway_latency(latency):
+    # NaN until the first heartbeat is acknowledged
+    return 0.0 if math.isnan(latency) or math.isinf(latency) else latency
+
+def shard_latency(bot, shard_id):
+    shard = bot.get_shard(shard_id)
+    return gateway_latency(shard.latency) if shard is not None else 0.0
+
+def instrument_bot(bot):
+    instrument_http(bot.http)
+    instrument_views()
+    instrument_gateway()
+    metrics.gauge("gateway_latency_seconds", lambda: gateway_latency(bot.latency))
+    if isinstance(bot, discord.AutoShardedClient):
+        # Shard ids are only known once the shards start connecting
+        async def on_shard_connect(shard_id):
+            metrics.gauge("gateway_latency_seconds", lambda: shard_latency(bot, shard_id), shard=str(shard_id))
+
+        bot.add_listener(on_shard_connect)
@@ -0,0 +1,210 @@
+# On-demand activation of extensions listed as lazy in cogs/manifest.json.
+#
+#   "cogs.BUC CUP.buc_system": {"lazy": true, "prefixes": ["buc_", "buc:"]}
+#
+# A lazy extension isn't loaded at startup. Its slash commands stay registered
+# with Discord; the first interaction whose command name or component
+# custom_id starts with one of its prefixes loads it, then the interaction is
+# dispatched as usual. Extensions idle for LAZY_COG_IDLE_MINUTES are unloaded
+# again (their cog_unload must stop their persistent views). Any component or
+# modal of a view defined in the extension counts as use, and an extension
+# isn't unloaded while a view of it that the prefixes can't bring back (e.g.
+# an ephemeral panel with generated custom_ids, or an open modal) is live.
+#
+# Command sync has to see the full tree, so sync_commands() loads every lazy
+# extension before it uploads, and hashes lazy extensions by their source
+# (fingerprint()) rather than by their commands.
+#
+# Opt-in with LAZY_COGS=1; by default everything loads eagerly, as before.
+# Activation hooks discord.py's ViewStore (dispatch_view / dispatch_modal and
+# its _views / _modals); if a discord.py version lacks any of them, the lazy
+# extensions are loaded eagerly instead.
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import discord
+from utils.extension_loader import module_file
+
+log = logging.getLogger(__name__)
+
+MANIFEST_PATH = os.path.join("cogs", "manifest.json")
+IDLE_MINUTES = float(os.getenv("LAZY_COG_IDLE_MINUTES", "30"))
+REAP_INTERVAL = 60
+# The ViewStore internals activation relies on
+VIEW_STORE_ATTRS = ("dispatch_view", "dispatch_modal", "_views", "_modals")
+
+class LazyCogs:
+    def __init__(self, bot, manifest_path=MANIFEST_PATH, idle_minutes=IDLE_MINUTES):
+        self.bot = bot
+        self.manifest_path = manifest_path
+        self.idle_seconds = idle_minutes * 60
+        self.enabled = os.getenv("LAZY_COGS", "0") == "1"
+        self.extensions = {} # extension -> tuple of prefixes
+        self.last_used = {}
+        self._locks = {}
+        self._reaper = None
+        self._tasks = set()
+
+    def load_manifest(self):
+        """Reads the manifest; returns the extensions that should not be loaded at startup."""
+        self.extensions = {}
+        if not self.enabled or not os.path.isfile(self.manifest_path):
+            return set()
+        store = getattr(getattr(self.bot, "_connection", None), "_view_store", None)
+        missing = [attr for attr in VIEW_STORE_ATTRS if not hasattr(store, attr)]
+        if missing:
+            log.warning("discord.py's ViewStore has no %s; loading lazy extensions eagerly", ", ".join(missing))
+            return set()
+        with open(self.manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        for name, entry in manifest.items():
+            if entry.get("lazy") and module_file(name):
+                self.extensions[name] = tuple(entry.get("prefixes", []))
+        return set(self.extensions)
+
+    def owner_of(self, identifier):
+        """The lazy extension a command name or custom_id belongs to, if any."""
+        if not identifier:
+            return None
+        for name, prefixes in self.extensions.items():
+            if identifier.startswith(prefixes):
+                return name
+        return None
+
+    def owner_of_view(self, view):
+        """The lazy extension that defines a view or modal class, if any."""
+        module = type(view).__module__
+        return module if module in self.extensions else None
+
+    def _recoverable(self, view, name):
+        """Whether lazy activation brings the view back after an unload: every
+        item is a link or has one of the extension's custom_id prefixes."""
+        if isinstance(view, discord.ui.Modal):
+            return False
+        prefixes = self.extensions[name]
+        for item in view.children:
+            custom_id = getattr(item, "custom_id", None)
+            if not getattr(item, "url", None) and not (custom_id and custom_id.startswith(prefixes)):
+                return False
+        return True
+
+    def live_views(self, name):
+        """Views and modals of the extension still in the view store that an unload would break."""
+        store = self.bot._connection._view_store
+        views = {item.view for items in store._views.values() for item in items.values() if item.view is not None}
+        views.update(store._modals.values())
+        return [
+            view for view in views
+            if self.owner_of_view(view) == name and not view.is_finished() and not self._recoverable(view, name)
+        ]
+
+    def _touch_view(self, view):
+        name = self.owner_of_view(view) if view is not None else None
+        if name is not None:
+            self.last_used[name] = time.monotonic()
+
+    def is_loaded(self, name):
+        return name in self.bot.extensions
+
+    async def ensure_loaded(self, name):
+        self.last_used[name] = time.monotonic()
+        if self.is_loaded(name):
+            return True
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            if self.is_loaded(name):
+                return True
+            start = time.perf_counter()
+            try:
+                await self.bot.load_extension(name)
+            except Exception:
+                log.exception("Failed to activate lazy extension %s", name)
+                return False
+            log.info("Activated lazy extension %s in %.0fms", name, (time.perf_counter() - start) * 1000)
+            return True
+
+    async def ensure_for(self, identifier):
+        name = self.owner_of(identifier)
+        if name is not None:
+            await self.ensure_loaded(name)
+
+    async def load_all(self):
+        for name in self.extensions:
+            await self.ensure_loaded(name)
+
+    def fingerprint(self):
+        """Changes whenever the manifest or a lazy extension's source changes."""
+        digest = hashlib.sha256()
+        for name in sorted(self.extensions):
+            digest.update(name.encode())
+            digest.update(repr(self.extensions[name]).encode())
+            with open(module_file(name), "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def owns_command(self, command):
+        return getattr(command, "module", None) in self.extensions
+
+    def install(self):
+        """Hooks component dispatch and starts the idle reaper. Call from setup_hook."""
+        if not self.extensions:
+            return
+        store = self.bot._connection._view_store
+        dispatch_view = store.dispatch_view
+        dispatch_modal = store.dispatch_modal
+
+        def lazy_dispatch_view(component_type, custom_id, interaction):
+            name = self.owner_of(custom_id)
+            if name is None:
+                # Generated custom_ids: the view the item belongs to tells
+                message_id = interaction.message.id if interaction.message is not None else None
+                key = (component_type, custom_id)
+                item = store._views.get(message_id, {}).get(key) or store._views.get(None, {}).get(key)
+                self._touch_view(item.view if item is not None else None)
+                return dispatch_view(component_type, custom_id, interaction)
+            if self.is_loaded(name):
+                self.last_used[name] = time.monotonic()
+                return dispatch_view(component_type, custom_id, interaction)
+
+            async def activate_and_dispatch():
+                if await self.ensure_loaded(name):
+                    dispatch_view(component_type, custom_id, interaction)
+
+            task = asyncio.create_task(activate_and_dispatch())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        def lazy_dispatch_modal(custom_id, interaction, *args):
+            self._touch_view(store._modals.get(custom_id))
+            return dispatch_modal(custom_id, interaction, *args)
+
+        store.dispatch_view = lazy_dispatch_view
+        store.dispatch_modal = lazy_dispatch_modal
+        self._reaper = asyncio.create_task(self._reap_idle())
+
+    def stop(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+
+    async def _reap_idle(self):
+        while True:
+            await asyncio.sleep(REAP_INTERVAL)
+            now = time.monotonic()
+            for name in list(self.extensions):
+                if not self.is_loaded(name) or now - self.last_used.get(name, now) < self.idle_seconds:
+                    continue
+                live = self.live_views(name)
+                if live:
+                    log.debug("Keeping idle lazy extension %s loaded: %d views still live", name, len(live))
+                    continue
+                async with self._locks.setdefault(name, asyncio.Lock()):
+                    try:
+                        await self.bot.unload_extension(name)
+                        log.info("Unloaded idle lazy extension %s", name)
+                    except Exception:
+                        log.exception("Failed to unload lazy extension %s", name)
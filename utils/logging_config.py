@@ -0,0 +1,141 @@
+# Logging for the whole bot.
+# Loggers hand records to a QueueHandler; a QueueListener thread formats them
+# as JSON lines and does the actual writing, so a log call on the event loop
+# only costs a queue put. Modules log through logging.getLogger(__name__).
+#
+#   LOG_LEVEL=INFO                                    default level
+#   LOG_LEVELS=cogs.tickets=DEBUG,discord.gateway=WARNING   per-module levels
+#   LOG_SAMPLE=cogs.tickets.ticket_system=100         keep 1 in 100 DEBUG records
+#   LOG_FILE=logs/bot.log                             also write to a rotating file
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 5
+
+# LogRecord attributes that aren't user-supplied `extra` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+def parse_mapping(value):
+    """'a=1,b=2' -> {'a': '1', 'b': '2'}"""
+    mapping = {}
+    for part in (value or "").split(","):
+        name, sep, setting = part.partition("=")
+        if sep and name.strip():
+            mapping[name.strip()] = setting.strip()
+    return mapping
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class SamplingFilter(logging.Filter):
+    """Keeps 1 in N DEBUG records of a logger (and its children); other levels always pass."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates # logger name -> N
+        self._counts = {}
+
+    def _rate(self, name):
+        while name:
+            if name in self.rates:
+                return name, self.rates[name]
+            name = name.rpartition(".")[0]
+        return None, 1
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or not self.rates:
+            return True
+        key, rate = self._rate(record.name)
+        if rate <= 1:
+            return True
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        return count % rate == 0
+
+class LoopSafeQueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() formats the record (tracebacks included) on the
+    # calling thread. Only the message is merged here, since its args may
+    # change later; everything else is left for the listener thread.
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+_listener = None
+_lock = threading.Lock()
+
+def setup_logging():
+    """Installs the queue pipeline on the root logger. Safe to call more than once."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(JsonFormatter())
+        handlers = [console]
+        if os.getenv("LOG_FILE"):
+            handlers.append(rotating_file_handler(os.getenv("LOG_FILE")))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = LoopSafeQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter({name: int(rate) for name, rate in parse_mapping(os.getenv("LOG_SAMPLE")).items()}))
+
+        root = logging.getLogger()
+        root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        for name, level in parse_mapping(os.getenv("LOG_LEVELS")).items():
+            logging.getLogger(name).setLevel(level.upper())
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return _listener
+
+def rotating_file_handler(path, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+def add_handler(handler):
+    """Adds an output (e.g. a dedicated file) to the listener thread."""
+    listener = setup_logging()
+    listener.handlers = listener.handlers + (handler,)
+
+def stop_logging():
+    """Flushes whatever is still queued. Called at exit and on shutdown."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
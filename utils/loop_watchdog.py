@@ -0,0 +1,139 @@
+# Event-loop lag watchdog.
+# A heartbeat task measures how late the loop wakes up (loop.lag). A watcher
+# thread notices when the heartbeat stops, i.e. something is blocking the
+# loop right now, and logs the loop thread's stack at that moment, which names
+# the offending handler. Once lag crosses the threshold, asyncio debug mode is
+# switched on for a while, so asyncio also reports every callback slower than
+# the threshold.
+#
+# Reports go to the log, also copied to a rotating file (LOOP_WATCHDOG_LOG),
+# and the metrics registry:
+#   loop.lag                                  histogram
+#   event_loop_lag_current_seconds            gauge
+#   loop_stalls_total / loop_blocked_total{where=...}  counters
+
+import asyncio
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from utils.metrics import metrics
+from utils.logging_config import add_handler, rotating_file_handler
+
+LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))
+HEARTBEAT_INTERVAL = 0.25
+DEBUG_DURATION = 60
+LOG_PATH = os.getenv("LOOP_WATCHDOG_LOG", "logs/loop_watchdog.log")
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+log = logging.getLogger(__name__)
+_log_handler = None
+
+def setup_log(path=LOG_PATH):
+    global _log_handler
+    if _log_handler is not None:
+        return
+    _log_handler = rotating_file_handler(path, LOG_MAX_BYTES, LOG_BACKUPS)
+    # asyncio logs the slow callbacks in debug mode
+    _log_handler.addFilter(lambda record: record.name in (__name__, "asyncio"))
+    add_handler(_log_handler)
+
+def blocking_site(frame):
+    """file:function of the innermost frame in our own code (else the innermost frame)."""
+    innermost = frame
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(PROJECT_ROOT) and "site-packages" not in filename:
+            return f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return f"{os.path.basename(innermost.f_code.co_filename)}:{innermost.f_code.co_name}"
+
+class LoopWatchdog:
+    def __init__(self, threshold=LAG_THRESHOLD, interval=HEARTBEAT_INTERVAL, debug_duration=DEBUG_DURATION):
+        self.threshold = threshold
+        self.interval = interval
+        self.debug_duration = debug_duration
+        self.lag = 0.0
+        self._loop = None
+        self._loop_thread = None
+        self._beat = 0.0
+        self._task = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._debug_off = None
+
+    def start(self):
+        """Starts watching the running loop."""
+        if self._task is not None:
+            return
+        setup_log()
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        metrics.gauge("event_loop_lag_current_seconds", lambda: self.lag)
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._debug_off is not None:
+            self._debug_off.cancel()
+            self._disable_debug()
+
+    async def _heartbeat(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            self.lag = max(0.0, self._beat - start - self.interval)
+            metrics.observe("loop.lag", self.lag)
+            if self.lag > self.threshold:
+                self._on_stall()
+
+    def _on_stall(self):
+        metrics.inc("loop_stalls_total")
+        if self._debug_off is None:
+            log.warning("Event loop lag %.3fs above %.3fs; enabling asyncio slow callback reports for %ss",
+                        self.lag, self.threshold, self.debug_duration)
+            self._loop.slow_callback_duration = self.threshold
+            self._loop.set_debug(True)
+        else:
+            self._debug_off.cancel()
+        self._debug_off = self._loop.call_later(self.debug_duration, self._disable_debug)
+
+    def _disable_debug(self):
+        self._debug_off = None
+        self._loop.set_debug(False)
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stopped.wait(self.interval / 2):
+            beat = self._beat
+            blocked_for = time.monotonic() - beat - self.interval
+            if blocked_for <= self.threshold or beat == reported_beat:
+                continue
+            reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            task = asyncio.current_task(self._loop)
+            where = blocking_site(frame)
+            log.warning("Event loop blocked for %.3fs at %s", blocked_for, where, extra={
+                "where": where,
+                "task": task.get_name() if task else None,
+                "stack": "".join(traceback.format_stack(frame)),
+            })
+            self._loop.call_soon_threadsafe(functools.partial(metrics.inc, "loop_blocked_total", where=where))
+
+loop_watchdog = LoopWatchdog()
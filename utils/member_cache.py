@@ -0,0 +1,98 @@
+# Member caching policy.
+# The bot doesn't need every member of every guild: interactions and messages
+# carry the full member (roles included), and the few places that look a
+# member up by id (ticket owners) can fetch it. So by default discord.py keeps
+# no member cache and doesn't chunk guilds at startup, and a small LRU holds
+# the members recently seen in interactions and messages.
+#
+#   MEMBER_CACHE_FLAGS=none | all | joined,voice   discord.MemberCacheFlags (default none)
+#   CHUNK_GUILDS=1                                 chunk every guild before on_ready
+#   MEMBER_LRU_SIZE=5000
+
+import logging
+import os
+from collections import OrderedDict
+import discord
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+MEMBER_LRU_SIZE = int(os.getenv("MEMBER_LRU_SIZE", "5000"))
+
+def member_cache_flags(intents):
+    setting = os.getenv("MEMBER_CACHE_FLAGS", "none").strip().lower()
+    if setting == "all":
+        return discord.MemberCacheFlags.from_intents(intents)
+    flags = discord.MemberCacheFlags.none()
+    for name in setting.split(","):
+        name = name.strip()
+        if name and name != "none":
+            setattr(flags, name, True)
+    return flags
+
+def cache_kwargs(intents):
+    """Keyword arguments for the bot constructor."""
+    return {
+        "member_cache_flags": member_cache_flags(intents),
+        "chunk_guilds_at_startup": os.getenv("CHUNK_GUILDS") == "1",
+    }
+
+class MemberLRU:
+    def __init__(self, max_size=MEMBER_LRU_SIZE):
+        self.max_size = max_size
+        self._members = OrderedDict() # (guild_id, member_id) -> discord.Member
+
+    def __len__(self):
+        return len(self._members)
+
+    def remember(self, member):
+        if not isinstance(member, discord.Member):
+            return
+        key = (member.guild.id, member.id)
+        self._members[key] = member
+        self._members.move_to_end(key)
+        while len(self._members) > self.max_size:
+            self._members.popitem(last=False)
+
+    def forget(self, guild_id, member_id):
+        self._members.pop((guild_id, member_id), None)
+
+    def get(self, guild_id, member_id):
+        """A recently seen member, without any request."""
+        key = (guild_id, member_id)
+        member = self._members.get(key)
+        if member is not None:
+            self._members.move_to_end(key)
+        return member
+
+    async def resolve(self, guild, member_id):
+        """The member, fetched from Discord if it isn't cached anywhere; None if they left."""
+        member = guild.get_member(member_id) or self.get(guild.id, member_id)
+        if member is not None:
+            metrics.inc("member_cache_requests_total", result="hit")
+            return member
+        metrics.inc("member_cache_requests_total", result="miss")
+        try:
+            member = await guild.fetch_member(member_id)
+        except discord.NotFound:
+            return None
+        self.remember(member)
+        return member
+
+    def install(self, bot):
+        """Feeds the LRU from incoming interactions and messages."""
+        async def on_interaction(interaction):
+            self.remember(interaction.user)
+
+        async def on_message(message):
+            self.remember(message.author)
+
+        async def on_raw_member_remove(payload):
+            self.forget(payload.guild_id, payload.user.id)
+
+        bot.add_listener(on_interaction)
+        bot.add_listener(on_message)
+        bot.add_listener(on_raw_member_remove)
+        metrics.gauge("member_lru_size", lambda: len(self))
+
+member_cache = MemberLRU()
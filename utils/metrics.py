@@ -0,0 +1,162 @@
+# In-process latency metrics.
+# Histograms keep the samples of the last METRICS_WINDOW seconds, so the
+# percentiles describe what is happening now (e.g. during a recruitment rush)
+# rather than since startup.
+#
+#   with metrics.span("ticket.age"):     # times a step of a flow (or @metrics.timed)
+#       ...                              # CoC / Mongo time inside it is recorded
+#                                        # as ticket.age.coc / ticket.age.mongo
+#
+# I/O wrappers (coc_api, the Mongo timing proxy) report through io_timer(),
+# which also attributes the time to whatever span is current in the task.
+#
+# Histograms also keep cumulative bucket counts, and the registry holds
+# counters and gauges, for the Prometheus exporter in utils/metrics_server.py.
+
+import bisect
+import contextlib
+import contextvars
+import functools
+import os
+import time
+from collections import defaultdict, deque
+
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "900"))
+MAX_SAMPLES = 10000
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class SlidingHistogram:
+    def __init__(self, window=METRICS_WINDOW, max_samples=MAX_SAMPLES):
+        self.window = window
+        self._samples = deque(maxlen=max_samples) # (monotonic time, value)
+        # Since startup, for Prometheus
+        self.count = 0
+        self.sum = 0.0
+        self.bucket_counts = [0] * (len(BUCKETS) + 1) # last one is +Inf
+
+    def observe(self, value):
+        self._samples.append((time.monotonic(), value))
+        self.count += 1
+        self.sum += value
+        self.bucket_counts[bisect.bisect_left(BUCKETS, value)] += 1
+
+    def _trim(self):
+        cutoff = time.monotonic() - self.window
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    def summary(self):
+        self._trim()
+        values = sorted(v for _, v in self._samples)
+        return {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1] if values else 0.0,
+        }
+
+class Span:
+    __slots__ = ("name", "io")
+
+    def __init__(self, name):
+        self.name = name
+        self.io = defaultdict(float) # kind ("coc", "mongo") -> seconds
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+class MetricsRegistry:
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self._histograms = {}
+        self._counters = {} # (name, labels) -> value
+        self._gauges = {} # (name, labels) -> callable returning the current value
+
+    def histogram(self, name):
+        if name not in self._histograms:
+            self._histograms[name] = SlidingHistogram(self.window)
+        return self._histograms[name]
+
+    def observe(self, name, seconds):
+        self.histogram(name).observe(seconds)
+
+    def histograms(self):
+        return dict(self._histograms)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def counters(self):
+        return dict(self._counters)
+
+    def gauge(self, name, func, **labels):
+        """Registers func as the source of a gauge; it is called whenever the metrics are read."""
+        self._gauges[(name, tuple(sorted(labels.items())))] = func
+
+    def gauges(self):
+        values = {}
+        for key, func in list(self._gauges.items()):
+            try:
+                values[key] = float(func())
+            except Exception:
+                continue
+        return values
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def span(self, name):
+        span = Span(name)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+            self.observe(name, time.perf_counter() - start)
+            for kind, seconds in span.io.items():
+                self.observe(f"{name}.{kind}", seconds)
+
+    def timed(self, name):
+        """Decorator running an async function (e.g. a view callback) inside span(name)."""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record_io(self, kind, name, seconds):
+        """Records a call to an external service as `name`, counted towards the current span's `kind`."""
+        self.observe(name, seconds)
+        span = _current_span.get()
+        if span is not None:
+            span.io[kind] += seconds
+
+    @contextlib.contextmanager
+    def io_timer(self, kind, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_io(kind, name, time.perf_counter() - start)
+
+    def snapshot(self, prefix=""):
+        """name -> {count, p50, p95, p99, max} in seconds, for histograms starting with prefix."""
+        return {name: h.summary() for name, h in sorted(self._histograms.items()) if name.startswith(prefix)}
+
+metrics = MetricsRegistry()
@@ -0,0 +1,130 @@
+# Local HTTP endpoint for the metrics registry.
+# Started from BlackspireBot.setup_hook when METRICS_PORT is set; binds to
+# localhost only (METRICS_HOST to override).
+#
+#   curl localhost:9100/stats?prefix=ticket.     # windowed percentiles as JSON
+#   curl localhost:9100/metrics                  # Prometheus text format
+#
+# CoC API calls only export latency (coc_request_seconds): coc.py's own
+# response cache keeps no hit / miss counts, so there is no CoC cache hit rate.
+#
+# Prometheus scrape config:
+#   - job_name: blackspire
+#     static_configs: [{targets: ["localhost:9100"]}]
+
+import logging
+import os
+from aiohttp import web
+from utils.metrics import metrics, BUCKETS
+
+log = logging.getLogger(__name__)
+
+PROMETHEUS_PREFIX = "blackspire_"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Dotted histogram names -> Prometheus metric, with labels taken from the
+# remaining segments of the name. Anything else is a flow span.
+HISTOGRAM_FAMILIES = [
+    ("mongo.", "mongo_operation_seconds", ("collection", "operation")),
+    ("mongo_command.", "mongo_command_seconds", ("command",)),
+    ("mongo_pool.wait", "mongo_pool_wait_seconds", ()),
+    ("coc.", "coc_request_seconds", ("endpoint",)),
+    ("command.", "command_seconds", ("command",)),
+    ("view.", "view_callback_seconds", ("view",)),
+    ("rest.", "discord_rest_seconds", ("method", "route")),
+    ("loop.lag", "event_loop_lag_seconds", ()),
+    ("gc.", "gc_pause_seconds", ("generation",)),
+]
+SPAN_FAMILY = ("span_seconds", ("span",))
+
+# "# HELP" text, for the families where the name alone could mislead
+HELP = {
+    "coc_request_seconds": "CoC API request latency per endpoint. coc.py's response cache "
+                           "keeps no hit counters, so no CoC cache hit rate is exported.",
+}
+
+def histogram_family(name):
+    for prefix, family, labels in HISTOGRAM_FAMILIES:
+        if not name.startswith(prefix):
+            continue
+        rest = name[len(prefix):]
+        if not labels:
+            if not rest:
+                return family, ()
+            continue
+        values = rest.split(".", len(labels) - 1)
+        if len(values) == len(labels):
+            return family, tuple(zip(labels, values))
+    return SPAN_FAMILY[0], ((SPAN_FAMILY[1][0], name),)
+
+def escape_help(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render_prometheus(registry):
+    families = {} # metric name -> (type, [lines])
+
+    for name, hist in sorted(registry.histograms().items()):
+        family, labels = histogram_family(name)
+        family = PROMETHEUS_PREFIX + family
+        lines = families.setdefault(family, ("histogram", []))[1]
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), hist.bucket_counts):
+            cumulative += count
+            lines.append(f"{family}_bucket{format_labels(labels + (('le', str(bound)),))} {cumulative}")
+        lines.append(f"{family}_sum{format_labels(labels)} {format_value(hist.sum)}")
+        lines.append(f"{family}_count{format_labels(labels)} {hist.count}")
+
+    for (name, labels), value in sorted(registry.counters().items()):
+        family = PROMETHEUS_PREFIX + name
+        families.setdefault(family, ("counter", []))[1].append(f"{family}{format_labels(labels)} {format_value(value)}")
+
+    for (name, labels), value in sorted(registry.gauges().items()):
+        family = PROMETHEUS_PREFIX + name
+        families.setdefault(family, ("gauge", []))[1].append(f"{family}{format_labels(labels)} {format_value(value)}")
+
+    out = []
+    for family, (kind, lines) in families.items():
+        help_text = HELP.get(family[len(PROMETHEUS_PREFIX):])
+        if help_text:
+            out.append(f"# HELP {family} {escape_help(help_text)}")
+        out.append(f"# TYPE {family} {kind}")
+        out.extend(lines)
+    return "\n".join(out) + "\n"
+
+class MetricsServer:
+    def __init__(self):
+        self.runner = None
+
+    async def start(self, port, host=None):
+        host = host or os.getenv("METRICS_HOST", "127.0.0.1")
+        app = web.Application()
+        app.router.add_get("/stats", self.stats)
+        app.router.add_get("/metrics", self.prometheus)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        log.info("Metrics endpoint listening on http://%s:%s", host, port)
+
+    async def stats(self, request):
+        return web.json_response(metrics.snapshot(request.query.get("prefix", "")))
+
+    async def prometheus(self, request):
+        return web.Response(text=render_prometheus(metrics), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+metrics_server = MetricsServer()
@@ -1,27 +1,126 @@
+import asyncio
+import logging
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+import random
+from datetime import datetime, timezone
 from dotenv import load_dotenv
+from utils.storage_backends import get_backend, TimedDatabase
+from utils.tracked_document import TrackedDocument
+from utils.metrics import metrics
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
+# Match documents carry a version, bumped by every write, for optimistic
+# concurrency (update_versioned)
+VERSION_FIELD = "version"
+VERSION_RETRIES = 5
+
+class VersionConflict(Exception):
+    """A document kept changing under update_versioned until it gave up."""
+
 class MongoManager:
-    def __init__(self):
+    def __init__(self, backend=None):
         self.uri = os.getenv("MONGO_URI")
         self.db_name = os.getenv("MONGO_DB_NAME")
+        self.backend = backend or get_backend(self.uri, self.db_name)
+        self.client = None
+        self.db = None
+        self._connect_lock = None
+
+    def use_backend(self, backend):
+        """Swaps the storage backend; the next call connects through it."""
+        self.backend.close()
+        self.backend = backend
         self.client = None
         self.db = None
+        self._connect_lock = None
 
     async def connect(self):
-        if not self.uri:
-            print("Error: MONGO_URI not found in environment variables.")
-            return
-        
+        # Every method connects on first use, so concurrent first calls at
+        # startup would each build a client; only the first one does now
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.db is None:
+                await self._connect()
+
+    async def create_indexes(self):
+        """Creates the unique and TTL indexes; a one-off step on MongoDB."""
+        if self.db is None:
+            await self.connect()
+        if self.db is not None:
+            await self.backend.create_indexes(self.db)
+
+    async def _connect(self):
         try:
-            self.client = AsyncIOMotorClient(self.uri)
-            self.db = self.client[self.db_name]
-            print(f"Connected to MongoDB: {self.db_name}")
-        except Exception as e:
-            print(f"Failed to connect to MongoDB: {e}")
+            db = await self.backend.connect()
+            if db is None:
+                return
+            await self.backend.ensure_indexes(db)
+            self.client = self.backend.client
+            self.db = TimedDatabase(db)
+            log.info("Connected to %s: %s", self.backend.name, self.db_name)
+        except Exception:
+            log.exception("Failed to connect to %s", self.backend.name)
+            self.backend.close() # don't leak a half set up client into the next attempt
+
+    async def close(self):
+        """Closes the client's connection pool; the next call reconnects."""
+        self.backend.close()
+        self.client = None
+        self.db = None
+        self._connect_lock = None
+
+    async def save_changes(self, collection_name, key, doc, check_version=False):
+        """Writes only the changed fields of a TrackedDocument and bumps its version.
+
+        With check_version the write only happens if nobody else saved the
+        document since it was loaded; returns False if someone did.
+        """
+        spec = doc.update_spec()
+        if spec is None:
+            return True
+        spec.get("$set", {}).pop(VERSION_FIELD, None)
+        spec.get("$unset", {}).pop(VERSION_FIELD, None)
+        spec = {op: fields for op, fields in spec.items() if fields}
+        spec["$inc"] = {VERSION_FIELD: 1}
+        filter = {key: doc[key]}
+        if check_version:
+            # None also matches documents written before they were versioned
+            filter[VERSION_FIELD] = doc.get(VERSION_FIELD)
+        if self.db is None:
+            await self.connect()
+        # return_document=True is ReturnDocument.AFTER
+        saved = await self.db[collection_name].find_one_and_update(filter, spec, projection={VERSION_FIELD: 1}, return_document=True)
+        if saved is None:
+            return False
+        doc[VERSION_FIELD] = saved[VERSION_FIELD]
+        doc.mark_clean()
+        return True
+
+    async def update_versioned(self, collection_name, key, value, mutate, retries=VERSION_RETRIES):
+        """Read-modify-write without lost updates.
+
+        Loads the document, calls mutate(doc) and saves the changes if the
+        version is still the one that was read; on a conflict it starts over
+        from a fresh read, so mutate must only depend on the document.
+        Returns (doc, what mutate returned), or (None, None) if there's no such document.
+        """
+        if self.db is None:
+            await self.connect()
+        for attempt in range(retries):
+            found = await self.db[collection_name].find_one({key: value})
+            if found is None:
+                return None, None
+            doc = TrackedDocument(found)
+            result = mutate(doc)
+            if await self.save_changes(collection_name, key, doc, check_version=True):
+                return doc, result
+            metrics.inc("mongo_version_conflicts_total", collection=collection_name)
+            await asyncio.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+        raise VersionConflict(f"{collection_name} {key}={value!r} kept changing, gave up after {retries} attempts")
 
     async def get_collection(self, collection_name):
         if self.db is None:
@@ -139,12 +238,14 @@ class MongoManager:
         await collection.delete_one({"name": team_name})
 
     async def save_buc_match(self, match_data):
+        if isinstance(match_data, TrackedDocument):
+            return await self.save_changes("buc_matches", "id", match_data)
         if self.db is None:
             await self.connect()
         collection = self.db["buc_matches"]
         await collection.update_one(
             {"id": match_data["id"]},
-            {"$set": match_data},
+            {"$set": {k: v for k, v in match_data.items() if k != VERSION_FIELD}, "$inc": {VERSION_FIELD: 1}},
             upsert=True
         )
 
@@ -158,6 +259,26 @@ class MongoManager:
             matches.append(match)
         return matches
 
+    async def update_buc_match(self, match_id, mutate):
+        """update_versioned() for a match; see there."""
+        return await self.update_versioned("buc_matches", "id", match_id, mutate)
+
+    async def get_buc_match(self, match_id):
+        if self.db is None:
+            await self.connect()
+        collection = self.db["buc_matches"]
+        match = await collection.find_one({"id": match_id})
+        return TrackedDocument(match) if match is not None else None
+
+    async def update_buc_match_field(self, match_id, field, value):
+        if self.db is None:
+            await self.connect()
+        collection = self.db["buc_matches"]
+        await collection.update_one(
+            {"id": match_id},
+            {"$set": {field: value}, "$inc": {VERSION_FIELD: 1}}
+        )
+
     async def delete_buc_match(self, match_id):
         if self.db is None:
             await self.connect()
@@ -229,12 +350,14 @@ class MongoManager:
         await collection.delete_one({"name": team_name})
 
     async def save_bsn_match(self, match_data):
+        if isinstance(match_data, TrackedDocument):
+            return await self.save_changes("bsn_matches", "id", match_data)
         if self.db is None:
             await self.connect()
         collection = self.db["bsn_matches"]
         await collection.update_one(
             {"id": match_data["id"]},
-            {"$set": match_data},
+            {"$set": {k: v for k, v in match_data.items() if k != VERSION_FIELD}, "$inc": {VERSION_FIELD: 1}},
             upsert=True
         )
 
@@ -248,6 +371,26 @@ class MongoManager:
             matches.append(match)
         return matches
 
+    async def update_bsn_match(self, match_id, mutate):
+        """update_versioned() for a match; see there."""
+        return await self.update_versioned("bsn_matches", "id", match_id, mutate)
+
+    async def get_bsn_match(self, match_id):
+        if self.db is None:
+            await self.connect()
+        collection = self.db["bsn_matches"]
+        match = await collection.find_one({"id": match_id})
+        return TrackedDocument(match) if match is not None else None
+
+    async def update_bsn_match_field(self, match_id, field, value):
+        if self.db is None:
+            await self.connect()
+        collection = self.db["bsn_matches"]
+        await collection.update_one(
+            {"id": match_id},
+            {"$set": {field: value}, "$inc": {VERSION_FIELD: 1}}
+        )
+
     async def delete_bsn_match(self, match_id):
         if self.db is None:
             await self.connect()
@@ -270,4 +413,54 @@ class MongoManager:
         collection = self.db["bsn_settings"]
         return await collection.find_one({"type": "general"})
 
+    async def save_ticket_session(self, session):
+        if self.db is None:
+            await self.connect()
+        collection = self.db["ticket_sessions"]
+        # updated_at drives the TTL index, so abandoned tickets expire on their own
+        await collection.update_one(
+            {"channel_id": session["channel_id"]},
+            {"$set": {**session, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+    async def get_ticket_session(self, channel_id):
+        if self.db is None:
+            await self.connect()
+        collection = self.db["ticket_sessions"]
+        return await collection.find_one({"channel_id": channel_id})
+
+    async def get_ticket_sessions(self):
+        if self.db is None:
+            await self.connect()
+        collection = self.db["ticket_sessions"]
+        cursor = collection.find({})
+        sessions = []
+        async for session in cursor:
+            sessions.append(session)
+        return sessions
+
+    async def delete_ticket_session(self, channel_id):
+        if self.db is None:
+            await self.connect()
+        collection = self.db["ticket_sessions"]
+        await collection.delete_one({"channel_id": channel_id})
+
+    async def get_command_sync_hash(self, scope):
+        if self.db is None:
+            await self.connect()
+        collection = self.db["bot_meta"]
+        doc = await collection.find_one({"key": f"command_sync:{scope}"})
+        return doc["hash"] if doc else None
+
+    async def save_command_sync_hash(self, scope, digest):
+        if self.db is None:
+            await self.connect()
+        collection = self.db["bot_meta"]
+        await collection.update_one(
+            {"key": f"command_sync:{scope}"},
+            {"$set": {"hash": digest, "synced_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
 mongo_manager = MongoManager()
@@ -0,0 +1,120 @@
+# pymongo event listeners for the Motor client, as metrics:
+#   mongo_command.<name>        driver-level latency per command (mongo_command_seconds{command})
+#   mongo_commands_total{command, result}
+#   mongo_pool.wait             time spent waiting for a pooled connection (mongo_pool_wait_seconds)
+#   mongo_pool_checkouts_total{result}   ok, or the failure reason (timeout, connectionError, ...)
+#   mongo_pool_connections / mongo_pool_checked_out   gauges
+#   mongo_server_up             1 after a successful heartbeat, 0 after a failed one
+#
+# The listeners run on Motor's worker threads, so every update is handed to
+# the event loop, which owns the metrics registry.
+
+import logging
+from pymongo import monitoring
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+class MongoMonitor:
+    def __init__(self, loop):
+        self.loop = loop
+        self.connections = 0
+        self.checked_out = 0
+        self.server_up = None # unknown until the first heartbeat
+        metrics.gauge("mongo_pool_connections", lambda: self.connections)
+        metrics.gauge("mongo_pool_checked_out", lambda: self.checked_out)
+        metrics.gauge("mongo_server_up", lambda: 1 if self.server_up else 0)
+
+    def listeners(self):
+        """For AsyncIOMotorClient(event_listeners=...)."""
+        return [CommandMetrics(self), PoolMetrics(self), HeartbeatMetrics(self)]
+
+    def on_loop(self, func, *args):
+        try:
+            self.loop.call_soon_threadsafe(func, *args)
+        except RuntimeError:
+            pass # loop closed during shutdown
+
+    def count(self, attr, delta):
+        setattr(self, attr, getattr(self, attr) + delta)
+
+    def set_server_up(self, up, address, error=None):
+        # Failed heartbeats repeat every half second; only log the transitions
+        if up and self.server_up is False:
+            log.info("Mongo server %s reachable again", address)
+        elif not up and self.server_up is not False:
+            log.warning("Mongo server %s unreachable: %s", address, error)
+        self.server_up = up
+
+    def command_done(self, name, seconds, result):
+        metrics.observe(f"mongo_command.{name}", seconds)
+        metrics.inc("mongo_commands_total", command=name, result=result)
+
+    def checkout_done(self, seconds, result):
+        if seconds is not None:
+            metrics.observe("mongo_pool.wait", seconds)
+        metrics.inc("mongo_pool_checkouts_total", result=result)
+
+class CommandMetrics(monitoring.CommandListener):
+    def __init__(self, monitor):
+        self.monitor = monitor
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.monitor.on_loop(self.monitor.command_done, event.command_name, event.duration_micros / 1e6, "ok")
+
+    def failed(self, event):
+        self.monitor.on_loop(self.monitor.command_done, event.command_name, event.duration_micros / 1e6, "error")
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    def __init__(self, monitor):
+        self.monitor = monitor
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        log.warning("Mongo connection pool for %s cleared", event.address)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.monitor.on_loop(self.monitor.count, "connections", 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.monitor.on_loop(self.monitor.count, "connections", -1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.monitor.on_loop(self.monitor.checkout_done, event.duration, event.reason)
+
+    def connection_checked_out(self, event):
+        self.monitor.on_loop(self.monitor.count, "checked_out", 1)
+        self.monitor.on_loop(self.monitor.checkout_done, event.duration, "ok")
+
+    def connection_checked_in(self, event):
+        self.monitor.on_loop(self.monitor.count, "checked_out", -1)
+
+class HeartbeatMetrics(monitoring.ServerHeartbeatListener):
+    def __init__(self, monitor):
+        self.monitor = monitor
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.monitor.on_loop(self.monitor.set_server_up, True, event.connection_id)
+
+    def failed(self, event):
+        self.monitor.on_loop(self.monitor.set_server_up, False, event.connection_id, event.reply)
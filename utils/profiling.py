@@ -0,0 +1,126 @@
+# On-demand profiling of the live bot (OwnerCommandsCog /profile, /memsnap).
+#
+# profile_loop() runs cProfile on the event loop thread for N seconds, which
+# covers every coroutine step and callback the loop runs in that window, while
+# a sampler thread records the loop thread's stack every SAMPLE_INTERVAL. The
+# samples are written in the collapsed-stack format ("a;b;c count") that
+# flamegraph.pl / speedscope / inferno read directly.
+#
+# MemorySnapshots diffs tracemalloc snapshots: the first call starts tracing
+# and takes the baseline, each later call reports what grew since the last.
+
+import asyncio
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+SAMPLE_INTERVAL = 0.005
+MAX_PROFILE_SECONDS = 120
+TOP_FUNCTIONS = 40
+TRACEMALLOC_FRAMES = 10
+
+class ProfileResult:
+    def __init__(self, stats, samples, seconds):
+        self.stats = stats # pstats.Stats
+        self.samples = samples # Counter of collapsed stacks
+        self.seconds = seconds
+
+    def top(self, limit=TOP_FUNCTIONS):
+        out = io.StringIO()
+        self.stats.stream = out
+        self.stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return out.getvalue()
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def raw(self):
+        """The profile in the .pstats format read by pstats / snakeviz."""
+        return marshal.dumps(self.stats.stats)
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def collapse(frame):
+    stack = []
+    while frame is not None:
+        stack.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+def sample_stacks(thread_id, stop, interval=SAMPLE_INTERVAL):
+    samples = Counter()
+    while not stop.wait(interval):
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            samples[collapse(frame)] += 1
+    return samples
+
+_profile_lock = asyncio.Lock()
+
+def profiling_busy():
+    return _profile_lock.locked()
+
+async def profile_loop(seconds):
+    """Profiles everything the running event loop does for the next `seconds`."""
+    seconds = max(1, min(seconds, MAX_PROFILE_SECONDS))
+    async with _profile_lock:
+        stop = threading.Event()
+        sampler = asyncio.get_running_loop().run_in_executor(None, sample_stacks, threading.get_ident(), stop)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+            stop.set()
+        samples = await sampler
+        return ProfileResult(pstats.Stats(profiler), samples, time.perf_counter() - start)
+
+class MemorySnapshots:
+    def __init__(self, frames=TRACEMALLOC_FRAMES):
+        self.frames = frames
+        self._last = None
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    async def diff(self, limit=25):
+        """Returns (report, started): started is True when this call began tracing and only took the baseline."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._last = await asyncio.to_thread(tracemalloc.take_snapshot)
+            return None, True
+
+        snapshot = await asyncio.to_thread(tracemalloc.take_snapshot)
+        previous, self._last = self._last, snapshot
+        report = await asyncio.to_thread(self._report, snapshot, previous, limit)
+        return report, False
+
+    def _report(self, snapshot, previous, limit):
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"Traced: {current / 1024 / 1024:.1f} MiB (peak {peak / 1024 / 1024:.1f} MiB)", ""]
+        if previous is not None:
+            lines.append(f"Top {limit} differences since the last snapshot:")
+            for stat in snapshot.compare_to(previous, "lineno")[:limit]:
+                lines.append(str(stat))
+            lines.append("")
+        lines.append(f"Top {limit} allocation sites:")
+        for stat in snapshot.statistics("lineno")[:limit]:
+            lines.append(str(stat))
+        return "\n".join(lines)
+
+    def stop(self):
+        self._last = None
+        tracemalloc.stop()
+
+memory_snapshots = MemorySnapshots()
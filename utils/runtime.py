@@ -0,0 +1,83 @@
+# Opt-in event loop and GC tuning for the long-running bot process.
+# Enabled with TUNED_RUNTIME=1 (or --tuned-runtime); each part can be
+# adjusted on its own:
+#
+#   UVLOOP=0                     keep the stock asyncio loop even if uvloop is installed
+#   EXECUTOR_WORKERS=32          default executor size (asyncio.to_thread, run_in_executor)
+#   GC_THRESHOLDS=50000,20,20    gc.set_threshold; fewer, cheaper young collections
+#
+# After startup, freeze_gc() moves everything allocated so far (modules,
+# cogs, cached documents) into the permanent generation, so the full
+# collections no longer walk it. GC pauses are recorded as
+# gc_pause_seconds{generation}.
+
+import asyncio
+import gc
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+EXECUTOR_WORKERS = 32
+GC_THRESHOLDS = (50000, 20, 20)
+
+_gc_started = None
+_frozen = False
+
+def tuned_runtime_enabled():
+    return os.getenv("TUNED_RUNTIME") == "1" or "--tuned-runtime" in sys.argv
+
+def install_event_loop():
+    """Makes uvloop the loop policy when it is installed; returns the loop in use."""
+    if os.getenv("UVLOOP", "1") == "0":
+        return "asyncio"
+    try:
+        import uvloop
+    except ImportError:
+        return "asyncio"
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return "uvloop"
+
+def configure_executor(loop, workers=None):
+    workers = workers or int(os.getenv("EXECUTOR_WORKERS", EXECUTOR_WORKERS))
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=workers, thread_name_prefix="blackspire-executor"))
+    return workers
+
+def _record_gc_pause(phase, info):
+    global _gc_started
+    if phase == "start":
+        _gc_started = time.perf_counter()
+    elif _gc_started is not None:
+        metrics.observe(f"gc.{info['generation']}", time.perf_counter() - _gc_started)
+        _gc_started = None
+
+def tune_gc(thresholds=None):
+    if thresholds is None:
+        setting = os.getenv("GC_THRESHOLDS")
+        thresholds = tuple(int(t) for t in setting.split(",")) if setting else GC_THRESHOLDS
+    gc.set_threshold(*thresholds)
+    if _record_gc_pause not in gc.callbacks:
+        gc.callbacks.append(_record_gc_pause)
+    return thresholds
+
+def freeze_gc():
+    """Moves every object alive now into the permanent generation. Once, after startup."""
+    global _frozen
+    if _frozen:
+        return
+    _frozen = True
+    gc.collect()
+    gc.freeze()
+    metrics.gauge("gc_frozen_objects", gc.get_freeze_count)
+    log.info("Froze %d objects after startup", gc.get_freeze_count())
+
+def install():
+    """The part of the tuning that has to happen before the loop exists."""
+    loop_name = install_event_loop()
+    thresholds = tune_gc()
+    log.info("Tuned runtime: %s loop, gc thresholds %s", loop_name, thresholds)
+    return loop_name
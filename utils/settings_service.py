@@ -0,0 +1,181 @@
+# In-memory copies of the buc_settings and bsn_settings documents. Every
+# leaderboard / bracket / stats refresh starts by reading its settings, and
+# they only change when an admin runs a setup command, so after the first
+# read they come from memory:
+#
+#   settings = await settings_service.get("buc")        # a read-only Settings
+#   posted = settings.posted_message("leaderboard")     # (channel_id, message_id) or None
+#   await settings_service.update("buc", leaderboard_channel_id=..., leaderboard_message_id=...)
+#
+# update() validates the fields, writes them through to Mongo and drops the
+# cached copy, so the next get() reads the new document. With several bot
+# processes (SHARD_IDS), SETTINGS_WATCH=1 also drops it when another process
+# writes, through a change stream (needs a replica set).
+#
+# settings_cache_requests_total{kind, result}: hit / miss
+
+import asyncio
+import logging
+import os
+import re
+from types import MappingProxyType
+from utils.metrics import metrics
+from utils.mongo_manager import mongo_manager
+
+log = logging.getLogger(__name__)
+
+WATCH_ENABLED = os.getenv("SETTINGS_WATCH") == "1"
+WATCH_RETRY_DELAY = 5
+
+# Auto-updating messages (<name>_channel_id + <name>_message_id) and plain channels per kind
+POSTED_MESSAGES = {
+    "buc": ("leaderboard", "leaderboard_mobile", "bracket", "player_stats", "player_stats_mobile"),
+    "bsn": ("team_stats", "team_stats_mobile", "bracket", "player_stats", "player_stats_mobile"),
+}
+CHANNELS = {
+    "buc": (),
+    "bsn": ("approval", "negotiation"),
+}
+COLLECTIONS = {"buc": "buc_settings", "bsn": "bsn_settings"}
+LOADERS = {"buc": mongo_manager.get_buc_settings, "bsn": mongo_manager.get_bsn_settings}
+SAVERS = {"buc": mongo_manager.save_buc_settings, "bsn": mongo_manager.save_bsn_settings}
+
+# "&<role id>" or "@<user id>", or None for no ping
+PING_PATTERN = re.compile(r"[&@]\d+")
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+def _is_ping(value):
+    return value is None or (isinstance(value, str) and PING_PATTERN.fullmatch(value) is not None)
+
+def fields(kind):
+    """Field name -> validator for a kind of settings."""
+    result = {}
+    for name in POSTED_MESSAGES[kind]:
+        result[f"{name}_channel_id"] = _is_id
+        result[f"{name}_message_id"] = _is_id
+    for name in CHANNELS[kind]:
+        result[f"{name}_channel_id"] = _is_id
+    if kind == "bsn":
+        result["negotiation_ping_id"] = _is_ping
+    return result
+
+FIELDS = {kind: fields(kind) for kind in COLLECTIONS}
+
+def validate(kind, values):
+    if kind not in FIELDS:
+        raise ValueError(f"Unknown settings kind {kind!r}")
+    for name, value in values.items():
+        check = FIELDS[kind].get(name)
+        if check is None:
+            raise ValueError(f"Unknown {kind} setting {name!r}")
+        if not check(value):
+            raise ValueError(f"Invalid value for {kind} setting {name!r}: {value!r}")
+
+class Settings:
+    """A read-only snapshot of a settings document; also reads like the dict."""
+
+    def __init__(self, kind, doc=None):
+        self.kind = kind
+        self._doc = MappingProxyType(dict(doc or {}))
+
+    def __bool__(self):
+        return bool(self._doc)
+
+    def __contains__(self, name):
+        return name in self._doc
+
+    def __getitem__(self, name):
+        return self._doc[name]
+
+    def get(self, name, default=None):
+        return self._doc.get(name, default)
+
+    def channel_id(self, name):
+        """The <name>_channel_id setting, or None if it isn't set."""
+        value = self._doc.get(f"{name}_channel_id")
+        return value if _is_id(value) else None
+
+    def posted_message(self, name):
+        """(channel_id, message_id) of an auto-updating message, or None if it isn't posted."""
+        channel_id = self.channel_id(name)
+        message_id = self._doc.get(f"{name}_message_id")
+        if channel_id is None or not _is_id(message_id):
+            return None
+        return channel_id, message_id
+
+    def negotiation_ping(self):
+        """The negotiation staff ping as a mention, or None."""
+        ping = self._doc.get("negotiation_ping_id")
+        if not ping or not _is_ping(ping):
+            return None
+        return f"<@{ping[1:]}>" if ping.startswith("@") else f"<@&{ping[1:]}>"
+
+class SettingsService:
+    def __init__(self):
+        self._cache = {}
+        # Bumped on invalidation, so a read that started before it isn't cached
+        self._generation = {kind: 0 for kind in COLLECTIONS}
+        self._watch_task = None
+
+    async def get(self, kind):
+        cached = self._cache.get(kind)
+        if cached is not None:
+            metrics.inc("settings_cache_requests_total", kind=kind, result="hit")
+            return cached
+        metrics.inc("settings_cache_requests_total", kind=kind, result="miss")
+        generation = self._generation[kind]
+        settings = Settings(kind, await LOADERS[kind]())
+        if generation == self._generation[kind]:
+            self._cache[kind] = settings
+        return settings
+
+    async def update(self, kind, **values):
+        """Validates and saves the given fields; the others are left as they are."""
+        validate(kind, values)
+        try:
+            await SAVERS[kind](values)
+        finally:
+            self.invalidate(kind)
+
+    def invalidate(self, kind=None):
+        for k in ([kind] if kind else list(COLLECTIONS)):
+            self._cache.pop(k, None)
+            self._generation[k] += 1
+
+    def start_watch(self):
+        """Drops cached settings when any process changes them. Needs a replica set."""
+        if not WATCH_ENABLED or self._watch_task is not None:
+            return
+        self._watch_task = asyncio.create_task(self._watch(), name="settings-watch")
+
+    def stop(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def _watch(self):
+        kinds = {collection: kind for kind, collection in COLLECTIONS.items()}
+        pipeline = [{"$match": {"ns.coll": {"$in": list(kinds)}}}]
+        while True:
+            try:
+                if mongo_manager.db is None:
+                    await mongo_manager.connect()
+                watch = getattr(mongo_manager.db, "watch", None)
+                if watch is None:
+                    log.info("%s has no change streams; settings are only refreshed by this process", mongo_manager.backend.name)
+                    return
+                async with watch(pipeline) as stream:
+                    # Changes made before the stream opened were missed
+                    self.invalidate()
+                    async for change in stream:
+                        self.invalidate(kinds.get(change["ns"]["coll"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Settings change stream failed; retrying in %ds", WATCH_RETRY_DELAY)
+                self.invalidate()
+                await asyncio.sleep(WATCH_RETRY_DELAY)
+
+settings_service = SettingsService()
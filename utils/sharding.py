@@ -0,0 +1,79 @@
+# Optional auto-sharding.
+#   SHARD_COUNT=auto | <n>     run as AutoShardedBot (auto: Discord's recommended count)
+#   SHARD_IDS=0,1              only run these shards in this process (needs SHARD_COUNT=<n>)
+# Unset, the bot is a plain commands.Bot on one connection, as before.
+#
+# Discord routes a guild to shard (guild_id >> 22) % shard_count, and every
+# event and interaction for it arrives on that shard. Per-guild in-memory state
+# is therefore kept per shard (ShardedState), which also stays correct when
+# the shards are spread over several processes.
+
+import os
+from collections import defaultdict
+from discord.ext import commands
+
+def sharding_enabled():
+    return bool(os.getenv("SHARD_COUNT"))
+
+def bot_base():
+    return commands.AutoShardedBot if sharding_enabled() else commands.Bot
+
+def shard_kwargs():
+    """Keyword arguments for the bot constructor."""
+    count = os.getenv("SHARD_COUNT", "").strip().lower()
+    if not count or count == "auto":
+        return {}
+    kwargs = {"shard_count": int(count)}
+    if os.getenv("SHARD_IDS"):
+        kwargs["shard_ids"] = [int(i) for i in os.getenv("SHARD_IDS").split(",") if i.strip()]
+    return kwargs
+
+def shard_count(bot):
+    return bot.shard_count or 1
+
+def shard_for(guild_id, count):
+    return (guild_id >> 22) % count
+
+def owned_shards(bot):
+    shard_ids = getattr(bot, "shard_ids", None)
+    if shard_ids:
+        return set(shard_ids)
+    if bot.shard_id is not None:
+        return {bot.shard_id}
+    return set(range(shard_count(bot)))
+
+def owns_guild(bot, guild_id):
+    """Whether this process runs the shard guild_id lives on."""
+    return shard_for(guild_id, shard_count(bot)) in owned_shards(bot)
+
+class ShardedState:
+    """Per-guild in-memory state, partitioned by the guild's shard.
+
+    A shard that reconnects with a new session may have missed events, so its
+    partition can be dropped on its own (clear_shard) without touching the rest.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._partitions = defaultdict(dict) # shard_id -> {guild_id: value}
+
+    def _partition(self, guild_id):
+        return self._partitions[shard_for(guild_id, shard_count(self.bot))]
+
+    def __contains__(self, guild_id):
+        return guild_id in self._partition(guild_id)
+
+    def get(self, guild_id, default=None):
+        return self._partition(guild_id).get(guild_id, default)
+
+    def set(self, guild_id, value):
+        self._partition(guild_id)[guild_id] = value
+
+    def pop(self, guild_id, default=None):
+        return self._partition(guild_id).pop(guild_id, default)
+
+    def clear_shard(self, shard_id):
+        self._partitions.pop(shard_id, None)
+
+    def sizes(self):
+        return {shard_id: len(partition) for shard_id, partition in self._partitions.items()}
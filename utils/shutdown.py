@@ -0,0 +1,135 @@
+# Graceful shutdown. BlackspireBot.close() runs ShutdownCoordinator.run(),
+# and SIGTERM / SIGINT call close(). In order:
+#   1. new interactions are dropped (the INTERACTION_CREATE parser is gated)
+#   2. in-flight work is drained: event handlers, view / modal / dynamic item
+#      callbacks and app commands, i.e. the tasks discord.py names for them
+#   3. write-behind ticket sessions are flushed
+#   4. background tasks stop and a final metrics summary is logged
+#   5. the Discord connection, the coc.py session and the Mongo pool close
+#   6. the logging queue is flushed
+# Steps 2 and 3 share SHUTDOWN_DEADLINE seconds (default 10), the last
+# FLUSH_RESERVE of them kept for the flush; whatever is still running after
+# that is left to be cancelled and the rest goes ahead.
+
+import asyncio
+import logging
+import os
+import signal
+import time
+from utils.coc_api import coc_api
+from utils.logging_config import stop_logging
+from utils.loop_watchdog import loop_watchdog
+from utils.metrics import metrics
+from utils.metrics_server import metrics_server, format_labels
+from utils.mongo_manager import mongo_manager
+from utils.settings_service import settings_service
+from utils.ticket_sessions import ticket_sessions
+
+log = logging.getLogger(__name__)
+
+SHUTDOWN_DEADLINE = float(os.getenv("SHUTDOWN_DEADLINE", "10"))
+# Part of the deadline kept for the flush, however long the drain takes
+FLUSH_RESERVE = 2.0
+
+# Names discord.py gives the tasks that run our code for an event
+WORK_TASK_PREFIXES = (
+    "discord.py: ",
+    "discord-ui-view-dispatch-",
+    "discord-ui-dynamic-item-",
+    "discord-ui-modal-dispatch-",
+    "CommandTree-invoker",
+)
+
+def in_flight_tasks():
+    current = asyncio.current_task()
+    return [
+        task for task in asyncio.all_tasks()
+        if task is not current and not task.done() and task.get_name().startswith(WORK_TASK_PREFIXES)
+    ]
+
+class ShutdownCoordinator:
+    def __init__(self, deadline=SHUTDOWN_DEADLINE):
+        self.deadline = deadline
+        self.accepting = True
+        self._done = None
+
+    def install(self, bot):
+        """Gates interactions and hooks the signals. Call from setup_hook."""
+        parsers = bot._connection.parsers
+        parse_interaction_create = parsers["INTERACTION_CREATE"]
+
+        def gated_interaction_create(data):
+            if not self.accepting:
+                metrics.inc("interactions_dropped_total", reason="shutdown")
+                return
+            parse_interaction_create(data)
+
+        parsers["INTERACTION_CREATE"] = gated_interaction_create
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.request, bot, sig)
+            except (NotImplementedError, RuntimeError):
+                # Windows: SIGINT still raises KeyboardInterrupt, which closes the bot
+                pass
+
+    def request(self, bot, sig):
+        log.info("Received %s, shutting down", signal.Signals(sig).name)
+        asyncio.ensure_future(bot.close())
+
+    async def run(self, bot, close_discord):
+        """Runs the shutdown once; later calls wait for the first one."""
+        if self._done is not None:
+            return await asyncio.shield(self._done)
+        self._done = asyncio.get_running_loop().create_future()
+        try:
+            await self._run(bot, close_discord)
+        finally:
+            self._done.set_result(None)
+
+    async def _run(self, bot, close_discord):
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        self.accepting = False
+
+        await self.drain(deadline - min(FLUSH_RESERVE, self.deadline / 2))
+        try:
+            await asyncio.wait_for(ticket_sessions.flush(), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            log.warning("Shutdown deadline reached before the ticket sessions were saved")
+
+        lazy_cogs = getattr(bot, "lazy_cogs", None)
+        if lazy_cogs is not None:
+            lazy_cogs.stop()
+        loop_watchdog.stop()
+        settings_service.stop()
+        await metrics_server.stop()
+        counters = {name + format_labels(labels): value for (name, labels), value in metrics.counters().items()}
+        log.info("Final metrics", extra={"histograms": metrics.snapshot(), "counters": counters})
+
+        for name, close in (
+            ("Discord connection", close_discord),
+            ("CoC API session", coc_api.close),
+            ("Mongo client", mongo_manager.close),
+        ):
+            try:
+                await close()
+            except Exception:
+                log.exception("Failed to close %s", name)
+
+        log.info("Shutdown finished in %.2fs", time.perf_counter() - start)
+        stop_logging()
+
+    async def drain(self, deadline):
+        """Waits for in-flight work until the deadline (a loop.time())."""
+        tasks = in_flight_tasks()
+        if not tasks:
+            return
+        log.info("Waiting for %d in-flight tasks", len(tasks))
+        _, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline - asyncio.get_running_loop().time()))
+        if pending:
+            log.warning("Shutdown deadline of %gs reached; %d tasks still running", self.deadline, len(pending))
+
+shutdown = ShutdownCoordinator()
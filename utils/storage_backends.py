@@ -0,0 +1,582 @@
+# Storage backends behind MongoManager.
+# MONGO_BACKEND=motor (default) talks to a real MongoDB through Motor,
+# MONGO_BACKEND=memory keeps everything in process so the bot, load tests
+# and benchmarks can run without a database.
+#
+# The memory backend always has the indexes below. On MongoDB they change the
+# schema (unique keys, documents expiring), so they're only created when
+# asked for, once: start with MONGO_CREATE_INDEXES=1, or call
+# mongo_manager.create_indexes().
+
+import abc
+import asyncio
+import importlib.util
+import itertools
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+# Lookup keys MongoManager filters on. Every collection is keyed on one field
+# and upserted by it, so these are unique.
+INDEXES = {
+    "questions": [("ticket_type", True)],
+    "clans": [("clan_tag", True)],
+    "counting_channels": [("guild_id", True)],
+    "buc_teams": [("name", True)],
+    "buc_matches": [("id", True)],
+    "buc_settings": [("type", True)],
+    "bsn_teams": [("name", True)],
+    "bsn_pending_teams": [("name", True)],
+    "bsn_matches": [("id", True)],
+    "bsn_settings": [("type", True)],
+    "ticket_sessions": [("channel_id", True)],
+    "bot_meta": [("key", True)],
+}
+
+# Collections whose documents expire: collection -> (datetime field, seconds)
+TTL_INDEXES = {
+    "ticket_sessions": ("updated_at", int(os.getenv("TICKET_SESSION_TTL_DAYS", "14")) * 86400),
+}
+
+class StorageBackend(abc.ABC):
+    name = "base"
+
+    def __init__(self):
+        self.client = None
+
+    @abc.abstractmethod
+    async def connect(self):
+        """Returns a database object supporting db[collection_name]."""
+
+    def fatal_errors(self):
+        # Errors that mean the store itself is unusable, not just one index
+        return ()
+
+    async def ensure_indexes(self, db):
+        """Indexes the store needs on every connect; none by default."""
+
+    async def create_indexes(self, db):
+        """Creates INDEXES and TTL_INDEXES."""
+        for collection_name, fields in INDEXES.items():
+            for field, unique in fields:
+                try:
+                    await db[collection_name].create_index(field, unique=unique)
+                except self.fatal_errors():
+                    raise
+                except Exception as e:
+                    log.warning("Failed to create index %s.%s: %s", collection_name, field, e)
+        for collection_name, (field, seconds) in TTL_INDEXES.items():
+            try:
+                await db[collection_name].create_index(field, expireAfterSeconds=seconds)
+            except self.fatal_errors():
+                raise
+            except Exception as e:
+                log.warning("Failed to create TTL index %s.%s: %s", collection_name, field, e)
+
+    def close(self):
+        pass
+
+# --- Motor ---
+
+# Client settings: environment variable -> (client option, default). They
+# take precedence over the same options in MONGO_URI.
+MOTOR_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", 50),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", 2),
+    "MONGO_MAX_IDLE_MS": ("maxIdleTimeMS", 300000),
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", 5000),
+    "MONGO_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", 5000),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", 10000),
+    "MONGO_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", None),
+}
+# Wire compressors in order of preference, with the module each one needs
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+def motor_client_options():
+    options = {}
+    for env, (option, default) in MOTOR_OPTIONS.items():
+        value = int(os.getenv(env)) if os.getenv(env) else default
+        if value is not None:
+            options[option] = value
+    # MONGO_COMPRESSORS=zstd,snappy,zlib by default; the ones not installed are skipped
+    wanted = [c.strip() for c in os.getenv("MONGO_COMPRESSORS", ",".join(COMPRESSOR_MODULES)).split(",") if c.strip()]
+    compressors = [c for c in wanted if importlib.util.find_spec(COMPRESSOR_MODULES.get(c, c)) is not None]
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
+class MotorBackend(StorageBackend):
+    name = "MongoDB"
+
+    def __init__(self, uri, db_name):
+        super().__init__()
+        self.uri = uri
+        self.db_name = db_name
+        self.monitor = None
+
+    async def connect(self):
+        if not self.uri:
+            log.error("MONGO_URI not found in environment variables.")
+            return None
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils.mongo_monitoring import MongoMonitor
+        options = motor_client_options()
+        self.monitor = MongoMonitor(asyncio.get_running_loop())
+        self.client = AsyncIOMotorClient(self.uri, event_listeners=self.monitor.listeners(), **options)
+        log.info("Mongo client options: %s", options)
+        return self.client[self.db_name]
+
+    def fatal_errors(self):
+        from pymongo.errors import ConnectionFailure
+        return (ConnectionFailure,)
+
+    async def ensure_indexes(self, db):
+        # Unique and TTL indexes change what the database accepts and keeps,
+        # so they're an explicit step here rather than part of every connect
+        if os.getenv("MONGO_CREATE_INDEXES") == "1":
+            await self.create_indexes(db)
+
+    async def create_indexes(self, db):
+        try:
+            await super().create_indexes(db)
+        except self.fatal_errors() as e:
+            # Unreachable server: leave it to the first real query to report
+            log.warning("Skipped index creation: %s", e)
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+
+# --- In memory ---
+
+try:
+    from pymongo.errors import DuplicateKeyError
+except ImportError:
+    class DuplicateKeyError(Exception):
+        pass
+
+_MISSING = object()
+
+def _clone(value):
+    # Documents are plain dicts/lists of immutable scalars, which makes this
+    # several times cheaper than copy.deepcopy on the hot read path
+    if isinstance(value, dict):
+        return {k: _clone(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clone(v) for v in value]
+    return value
+
+def _get_path(doc, path):
+    for part in path.split("."):
+        if not isinstance(doc, dict) or part not in doc:
+            return _MISSING
+        doc = doc[part]
+    return doc
+
+def _set_path(doc, path, value):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+def _unset_path(doc, path):
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(last, None)
+
+def _hashable(value):
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+def _sort_key(value):
+    # Mongo sorts across types in BSON order: null (and missing fields) first,
+    # then numbers, strings, objects, arrays, binary, ObjectId, booleans, dates
+    if value is _MISSING or value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (7, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, dict):
+        return (3, repr(value))
+    if isinstance(value, (list, tuple)):
+        return (4, repr(value))
+    if isinstance(value, bytes):
+        return (5, value)
+    if isinstance(value, datetime):
+        return (8, value.timestamp() if value.tzinfo else value.replace(tzinfo=timezone.utc).timestamp())
+    return (6, str(value))
+
+QUERY_OPERATORS = {"$eq", "$ne", "$in", "$nin", "$exists", "$gt", "$gte", "$lt", "$lte"}
+UPDATE_OPERATORS = {"$set", "$unset", "$inc", "$setOnInsert"}
+
+def _compare(value, op, operand):
+    if op not in QUERY_OPERATORS:
+        raise ValueError(f"Query operator {op} is not supported by the memory backend")
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if value is _MISSING or value is None:
+        return False
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    if op == "$lt":
+        return value < operand
+    return value <= operand # $lte
+
+def _matches(doc, filter):
+    for key, condition in filter.items():
+        value = _get_path(doc, key)
+        if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif (None if value is _MISSING else value) != condition:
+            return False
+    return True
+
+def _apply_update(doc, update, inserting):
+    for op in update:
+        if op not in UPDATE_OPERATORS:
+            raise ValueError(f"Update operator {op} is not supported by the memory backend")
+    for op, fields in update.items():
+        for path, value in fields.items():
+            if op == "$set" or (op == "$setOnInsert" and inserting):
+                _set_path(doc, path, _clone(value))
+            elif op == "$unset":
+                _unset_path(doc, path)
+            elif op == "$inc":
+                current = _get_path(doc, path)
+                _set_path(doc, path, (0 if current is _MISSING else current) + value)
+
+def _project(doc, projection):
+    doc = _clone(doc)
+    if not projection:
+        return doc
+    included = {k for k, v in projection.items() if v}
+    if included:
+        keep = included | ({"_id"} if projection.get("_id", 1) else set())
+        return {k: v for k, v in doc.items() if k in keep}
+    return {k: v for k, v in doc.items() if k not in projection}
+
+class UpdateResult:
+    def __init__(self, matched_count=0, modified_count=0, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+
+class DeleteResult:
+    def __init__(self, deleted_count=0):
+        self.deleted_count = deleted_count
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+class MemoryCursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def sort(self, key, direction=1):
+        self._docs.sort(key=lambda d: _sort_key(_get_path(d, key)), reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        if count:
+            self._docs = self._docs[:count]
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self._docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length=None):
+        return self._docs[:length] if length else list(self._docs)
+
+# mongod's TTL monitor also only runs once a minute
+TTL_SWEEP_INTERVAL = 60
+
+class MemoryCollection:
+    def __init__(self, name):
+        self.name = name
+        self._docs = {} # _id -> document, in insertion order
+        self._indexes = {} # field -> {value: set(_id)}
+        self._unique = set()
+        self._order = {} # _id -> insertion sequence, so find() keeps Mongo's natural order
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._ttl = None # (field, seconds)
+        self._next_sweep = 0
+
+    async def create_index(self, keys, unique=False, expireAfterSeconds=None, **kwargs):
+        field = keys if isinstance(keys, str) else keys[0][0]
+        if expireAfterSeconds is not None:
+            self._ttl = (field, expireAfterSeconds)
+        index = {}
+        for _id, doc in self._docs.items():
+            index.setdefault(_hashable(_get_path(doc, field)), set()).add(_id)
+        if unique and any(len(ids) > 1 for ids in index.values()):
+            raise DuplicateKeyError(f"{self.name}.{field} has duplicate values")
+        self._indexes[field] = index
+        if unique:
+            self._unique.add(field)
+        return f"{field}_1"
+
+    def _candidates(self, filter):
+        # Narrow through _id or an index on a plain equality key, otherwise scan
+        _id = filter.get("_id", _MISSING)
+        if _id is not _MISSING and not isinstance(_id, dict):
+            return [_id] if _hashable(_id) in self._docs else []
+        for field, condition in filter.items():
+            if field in self._indexes and not isinstance(condition, dict):
+                index = self._indexes[field]
+                ids = index.get(_hashable(condition), set())
+                if condition is None:
+                    # {field: None} also matches documents without the field
+                    ids = ids | index.get(_MISSING, set())
+                return list(ids)
+        return self._docs
+
+    def _expire(self):
+        if self._ttl is None or time.monotonic() < self._next_sweep:
+            return
+        self._next_sweep = time.monotonic() + TTL_SWEEP_INTERVAL
+        field, seconds = self._ttl
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=seconds)
+        for _id, doc in list(self._docs.items()):
+            value = _get_path(doc, field)
+            if isinstance(value, datetime) and (value if value.tzinfo else value.replace(tzinfo=timezone.utc)) < cutoff:
+                self._remove(_id)
+
+    def _match_ids(self, filter, limit=None):
+        self._expire()
+        if not filter:
+            ids = list(self._docs)
+            return ids[:limit] if limit else ids
+        result = []
+        for _id in self._candidates(filter):
+            if _matches(self._docs[_id], filter):
+                result.append(_id)
+                if limit and len(result) >= limit:
+                    break
+        return result
+
+    def _check_unique(self, _id, doc):
+        for field in self._unique:
+            owners = self._indexes[field].get(_hashable(_get_path(doc, field)), ())
+            if any(owner != _id for owner in owners):
+                raise DuplicateKeyError(f"{self.name}.{field} duplicate key: {_get_path(doc, field)!r}")
+
+    def _store(self, _id, old, new):
+        self._check_unique(_id, new)
+        for field, index in self._indexes.items():
+            if old is not None:
+                index.get(_hashable(_get_path(old, field)), set()).discard(_id)
+            index.setdefault(_hashable(_get_path(new, field)), set()).add(_id)
+        if old is None:
+            self._order[_id] = next(self._seq)
+        self._docs[_id] = new
+
+    def _remove(self, _id):
+        old = self._docs.pop(_id)
+        del self._order[_id]
+        for field, index in self._indexes.items():
+            index.get(_hashable(_get_path(old, field)), set()).discard(_id)
+
+    async def find_one(self, filter=None, projection=None):
+        ids = self._match_ids(filter or {}, limit=1)
+        return _project(self._docs[ids[0]], projection) if ids else None
+
+    def find(self, filter=None, projection=None):
+        ids = sorted(self._match_ids(filter or {}), key=self._order.__getitem__)
+        return MemoryCursor([_project(self._docs[i], projection) for i in ids])
+
+    async def count_documents(self, filter):
+        return len(self._match_ids(filter))
+
+    async def insert_one(self, document):
+        doc = _clone(document)
+        _id = doc.setdefault("_id", next(self._ids))
+        if _id in self._docs:
+            raise DuplicateKeyError(f"{self.name} duplicate _id: {_id!r}")
+        self._store(_id, None, doc)
+        document.setdefault("_id", _id)
+        return InsertOneResult(_id)
+
+    async def update_one(self, filter, update, upsert=False):
+        ids = self._match_ids(filter, limit=1)
+        if ids:
+            old = self._docs[ids[0]]
+            new = _clone(old)
+            _apply_update(new, update, inserting=False)
+            self._store(ids[0], old, new)
+            return UpdateResult(1, int(new != old))
+        if not upsert:
+            return UpdateResult()
+
+        new = {k: _clone(v) for k, v in filter.items() if not k.startswith("$") and not isinstance(v, dict)}
+        _apply_update(new, update, inserting=True)
+        _id = new.setdefault("_id", next(self._ids))
+        self._store(_id, None, new)
+        return UpdateResult(upserted_id=_id)
+
+    async def find_one_and_update(self, filter, update, projection=None, upsert=False, return_document=False):
+        """return_document=True (pymongo's ReturnDocument.AFTER) returns the updated document."""
+        ids = self._match_ids(filter, limit=1)
+        if ids:
+            old = self._docs[ids[0]]
+            new = _clone(old)
+            _apply_update(new, update, inserting=False)
+            self._store(ids[0], old, new)
+            return _project(new if return_document else old, projection)
+        if not upsert:
+            return None
+        result = await self.update_one(filter, update, upsert=True)
+        return _project(self._docs[result.upserted_id], projection) if return_document else None
+
+    async def delete_one(self, filter):
+        ids = self._match_ids(filter, limit=1)
+        if not ids:
+            return DeleteResult()
+        self._remove(ids[0])
+        return DeleteResult(1)
+
+    async def delete_many(self, filter):
+        count = 0
+        for _id in self._match_ids(filter):
+            await self.delete_one({"_id": _id})
+            count += 1
+        return DeleteResult(count)
+
+class MemoryDatabase:
+    def __init__(self):
+        self._collections = {}
+
+    def __getitem__(self, name):
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(name)
+        return self._collections[name]
+
+    async def list_collection_names(self):
+        return list(self._collections)
+
+class MemoryBackend(StorageBackend):
+    name = "in-memory store"
+
+    def __init__(self):
+        super().__init__()
+        self.db = MemoryDatabase()
+
+    async def connect(self):
+        return self.db
+
+    async def ensure_indexes(self, db):
+        await self.create_indexes(db)
+
+# --- Timing ---
+
+# Collection methods that are awaited directly; find() is timed through its cursor
+TIMED_OPERATIONS = {"find_one", "count_documents", "insert_one", "update_one", "find_one_and_update", "delete_one", "delete_many"}
+
+class TimedCursor:
+    def __init__(self, cursor, name):
+        self._cursor = cursor
+        self._name = name
+        self._elapsed = 0.0
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, *args, **kwargs):
+        self._cursor = self._cursor.limit(*args, **kwargs)
+        return self
+
+    def __aiter__(self):
+        self._cursor = self._cursor.__aiter__()
+        return self
+
+    async def __anext__(self):
+        start = time.perf_counter()
+        try:
+            doc = await self._cursor.__anext__()
+        except StopAsyncIteration:
+            # One sample for the whole iteration
+            metrics.record_io("mongo", self._name, self._elapsed + time.perf_counter() - start)
+            raise
+        self._elapsed += time.perf_counter() - start
+        return doc
+
+    async def to_list(self, length=None):
+        with metrics.io_timer("mongo", self._name):
+            return await self._cursor.to_list(length)
+
+class TimedCollection:
+    """Records the latency of every operation as mongo.<collection>.<operation>."""
+
+    def __init__(self, collection, name):
+        self._collection = collection
+        self._name = name
+
+    def find(self, *args, **kwargs):
+        return TimedCursor(self._collection.find(*args, **kwargs), f"mongo.{self._name}.find")
+
+    def __getattr__(self, attr):
+        value = getattr(self._collection, attr)
+        if attr not in TIMED_OPERATIONS:
+            return value
+
+        async def timed(*args, **kwargs):
+            with metrics.io_timer("mongo", f"mongo.{self._name}.{attr}"):
+                return await value(*args, **kwargs)
+        return timed
+
+class TimedDatabase:
+    def __init__(self, db):
+        self._db = db
+
+    def __getitem__(self, name):
+        return TimedCollection(self._db[name], name)
+
+    def __getattr__(self, attr):
+        return getattr(self._db, attr)
+
+# --- Selection ---
+
+BACKENDS = {
+    "motor": lambda uri, db_name: MotorBackend(uri, db_name),
+    "memory": lambda uri, db_name: MemoryBackend(),
+}
+
+def get_backend(uri=None, db_name=None):
+    name = os.getenv("MONGO_BACKEND", "motor").lower()
+    if name not in BACKENDS:
+        log.warning("Unknown MONGO_BACKEND '%s', falling back to motor.", name)
+        name = "motor"
+    return BACKENDS[name](uri, db_name)
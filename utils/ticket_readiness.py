@@ -0,0 +1,88 @@
+# Works out when a freshly created ticket channel is ready for the interview.
+# Ticket Tool creates the channel first and adds the opener's overwrite (and
+# its welcome message) afterwards, so instead of sleeping a fixed time we wait
+# for on_guild_channel_update / on_message to reveal the owner.
+
+import asyncio
+from collections import OrderedDict
+import discord
+from utils.member_cache import member_cache
+
+READY_TIMEOUT = 30
+MAX_PENDING = 500
+
+async def find_owner(channel):
+    """The first non-bot member with an overwrite on channel, if any."""
+    for target, overwrite in channel.overwrites.items():
+        if isinstance(target, discord.Member):
+            if not target.bot:
+                return target.id
+        elif isinstance(target, discord.Object) and target.type is discord.Member:
+            # Without a full member cache, overwrites of members discord.py
+            # hasn't seen come back as discord.Object; only the member itself
+            # tells whether it's Ticket Tool's own overwrite, so fetch it
+            if target.id == channel.guild.me.id:
+                continue
+            member = await member_cache.resolve(channel.guild, target.id)
+            if member is not None and not member.bot:
+                return member.id
+    return None
+
+class TicketReadiness:
+    def __init__(self, timeout=READY_TIMEOUT, max_pending=MAX_PENDING):
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self._pending = OrderedDict() # channel_id -> future resolving to the owner id
+
+    async def wait_for_owner(self, channel):
+        """Returns the ticket owner's id as soon as it is known, or None after the timeout."""
+        owner_id = await find_owner(channel)
+        if owner_id:
+            return owner_id
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[channel.id] = future
+        # Oldest tickets give up waiting if too many are pending at once
+        while len(self._pending) > self.max_pending:
+            _, oldest = self._pending.popitem(last=False)
+            self._resolve(oldest, None)
+        try:
+            owner_id = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            owner_id = None
+        finally:
+            if self._pending.get(channel.id) is future:
+                del self._pending[channel.id]
+        return owner_id or await find_owner(channel)
+
+    def _resolve(self, future, owner_id):
+        if not future.done():
+            future.set_result(owner_id)
+
+    async def channel_updated(self, channel):
+        future = self._pending.get(channel.id)
+        if future is None:
+            return
+        owner_id = await find_owner(channel)
+        if owner_id:
+            self._resolve(future, owner_id)
+
+    async def message_received(self, message):
+        future = self._pending.get(message.channel.id)
+        if future is None:
+            return
+        owner_id = None
+        if message.author.bot:
+            # Ticket Tool's welcome message mentions whoever opened the ticket
+            owner_id = next((m.id for m in message.mentions if not m.bot), None)
+        if not owner_id:
+            owner_id = await find_owner(message.channel)
+        if owner_id:
+            self._resolve(future, owner_id)
+
+    def cancel(self, channel_id):
+        future = self._pending.pop(channel_id, None)
+        if future is not None:
+            self._resolve(future, None)
+
+ticket_readiness = TicketReadiness()
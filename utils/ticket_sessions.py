@@ -0,0 +1,131 @@
+# Ticket interview sessions.
+# One session per ticket channel, holding only plain data (CoC players are
+# reduced to snapshot_player() dicts), so every open ticket costs the same
+# small amount of memory and the whole session can live in Mongo. The views
+# of an interview are recorded in session["views"] by message id, which lets
+# TicketSystemCog re-attach them after a restart.
+#
+# Writes are batched: save() marks a session dirty and one flush writes all
+# dirty sessions SAVE_DELAY seconds later.
+#
+# Sessions record their guild_id, so a process running only some of the
+# shards restores only the sessions of its own guilds (load(owns_guild=...)).
+
+import asyncio
+import logging
+from utils.mongo_manager import mongo_manager
+
+SAVE_DELAY = 2.0
+
+log = logging.getLogger(__name__)
+
+def snapshot_player(player):
+    """The parts of a coc.Player the ticket flow shows, as plain data."""
+    # coc.py uses 'pets' or 'hero_pets' depending on version
+    pets = getattr(player, "pets", None) or getattr(player, "hero_pets", None) or []
+    return {
+        "tag": f"#{player.tag.strip('#')}",
+        "name": player.name,
+        "town_hall": player.town_hall,
+        "town_hall_weapon": getattr(player, "town_hall_weapon", None),
+        "exp_level": player.exp_level,
+        "trophies": player.trophies,
+        "war_stars": player.war_stars,
+        "heroes": [[h.name, h.level] for h in player.heroes or []],
+        "pets": [[p.name, p.level] for p in pets],
+    }
+
+class TicketSessionStore:
+    def __init__(self, save_delay=SAVE_DELAY):
+        self.save_delay = save_delay
+        self._sessions = {} # ticket channel_id -> session
+        self._dirty = set()
+        self._flush_task = None
+
+    def create(self, channel_id, user_id, guild_id=None):
+        session = {
+            "channel_id": channel_id,
+            "guild_id": guild_id,
+            "user_id": user_id,
+            "accounts": [],
+            "answers": [],
+            "views": {}, # str(message_id) -> {"kind": ..., "index": ..., ...}
+        }
+        self._sessions[channel_id] = session
+        self.save(session)
+        return session
+
+    def get(self, channel_id):
+        return self._sessions.get(channel_id)
+
+    async def fetch(self, channel_id):
+        """Like get(), but falls back to Mongo for a session that isn't in memory."""
+        session = self._sessions.get(channel_id)
+        if session is None:
+            session = await mongo_manager.get_ticket_session(channel_id)
+            if session is not None:
+                session.pop("_id", None)
+                session.pop("updated_at", None)
+                self._sessions[channel_id] = session
+        return session
+
+    def all(self):
+        return list(self._sessions.values())
+
+    def track_view(self, session, message, kind, index=None, **state):
+        """Records that message carries the view for this step of the interview."""
+        if message is None:
+            return
+        session["views"][str(message.id)] = {"kind": kind, "index": index, **state}
+        self.save(session)
+
+    def untrack_view(self, session, kind, index=None):
+        """Forgets every view of kind (and index) once its step is done."""
+        for message_id, entry in list(session["views"].items()):
+            if entry["kind"] == kind and (index is None or entry["index"] == index):
+                del session["views"][message_id]
+        self.save(session)
+
+    def save(self, session):
+        self._dirty.add(session["channel_id"])
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        while self._dirty:
+            await asyncio.sleep(self.save_delay)
+            await self.flush()
+
+    async def flush(self):
+        dirty, self._dirty = self._dirty, set()
+        for channel_id in dirty:
+            session = self._sessions.get(channel_id)
+            if session is None:
+                continue
+            try:
+                await mongo_manager.save_ticket_session(session)
+            except Exception as e:
+                log.warning("Failed to save ticket session %s: %s", channel_id, e)
+                self._dirty.add(channel_id)
+
+    async def load(self, owns_guild=None):
+        """Reads the stored sessions back into memory, e.g. on startup.
+
+        owns_guild(guild_id) limits it to the guilds this process serves;
+        sessions saved before guild_id was recorded are always loaded.
+        """
+        for session in await mongo_manager.get_ticket_sessions():
+            guild_id = session.get("guild_id")
+            if owns_guild is not None and guild_id is not None and not owns_guild(guild_id):
+                continue
+            session.pop("_id", None)
+            session.pop("updated_at", None)
+            self._sessions[session["channel_id"]] = session
+        return self.all()
+
+    async def close(self, channel_id):
+        self._dirty.discard(channel_id)
+        if self._sessions.pop(channel_id, None) is not None:
+            await mongo_manager.delete_ticket_session(channel_id)
+
+ticket_sessions = TicketSessionStore()
@@ -0,0 +1,51 @@
+# Documents that remember what they looked like when loaded, so saving one
+# writes only what changed: a $set per changed field (nested dicts become
+# dotted paths) and an $unset per removed one. Besides the smaller write,
+# fields changed by someone else in the meantime aren't overwritten.
+#
+#   match = await mongo_manager.get_bsn_match(match_id)   # a TrackedDocument
+#   match["date_str"] = "Friday 8pm"
+#   await mongo_manager.save_bsn_match(match)             # $set {"date_str": ...} only
+
+import copy
+
+def diff(old, new, prefix=""):
+    """($set fields, $unset paths) that turn old into new."""
+    set_fields = {}
+    unset = []
+    for key, value in new.items():
+        path = f"{prefix}{key}"
+        if key not in old:
+            set_fields[path] = value
+        elif old[key] != value:
+            if isinstance(old[key], dict) and isinstance(value, dict) and value:
+                nested_set, nested_unset = diff(old[key], value, f"{path}.")
+                set_fields.update(nested_set)
+                unset.extend(nested_unset)
+            else:
+                set_fields[path] = value
+    unset.extend(f"{prefix}{key}" for key in old if key not in new)
+    return set_fields, unset
+
+class TrackedDocument(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mark_clean()
+
+    def mark_clean(self):
+        """Takes the current contents as the stored state, e.g. after a save."""
+        self._original = copy.deepcopy(dict(self))
+
+    def changes(self):
+        return diff(self._original, self)
+
+    def update_spec(self):
+        """The update document for the changes, or None if there are none."""
+        set_fields, unset = self.changes()
+        set_fields.pop("_id", None)
+        spec = {}
+        if set_fields:
+            spec["$set"] = set_fields
+        if unset:
+            spec["$unset"] = {path: "" for path in unset}
+        return spec or None
@@ -0,0 +1,58 @@
+# Keeps discord.py's view store from growing without bound.
+# Views created with timeout=None stay registered for as long as the process
+# runs. Controls that must outlive a restart (approvals, result entry) are
+# DynamicItems, which carry their state in the custom_id and are not stored
+# per message. The remaining stateful views derive from BoundedView and are
+# kept in an LRU here; the least recently used ones are stopped, which
+# unregisters them, once MAX_TRACKED_VIEWS is exceeded.
+
+from collections import OrderedDict
+import discord
+
+MAX_TRACKED_VIEWS = 2000
+
+class ViewRegistry:
+    def __init__(self, max_views=MAX_TRACKED_VIEWS):
+        self.max_views = max_views
+        self._views = OrderedDict() # view -> group (e.g. ticket channel id)
+
+    def __len__(self):
+        return len(self._views)
+
+    def track(self, view, group=None):
+        self._views[view] = group
+        self._views.move_to_end(view)
+        while len(self._views) > self.max_views:
+            oldest, _ = self._views.popitem(last=False)
+            oldest.stop()
+
+    def touch(self, view):
+        if view in self._views:
+            self._views.move_to_end(view)
+
+    def discard(self, view):
+        self._views.pop(view, None)
+
+    def stop_group(self, group):
+        """Stops every view belonging to group, e.g. when its ticket is closed."""
+        for view in [v for v, g in self._views.items() if g == group]:
+            view.stop()
+
+view_registry = ViewRegistry()
+
+class BoundedView(discord.ui.View):
+    """A stateful view that view_registry stops once it is evicted from the LRU."""
+
+    def __init__(self, *, timeout=None, group=None):
+        super().__init__(timeout=timeout)
+        view_registry.track(self, group)
+
+    async def interaction_check(self, interaction):
+        # Runs before every item callback; subclasses that override it call
+        # super() first so the view counts as used
+        view_registry.touch(self)
+        return True
+
+    def stop(self):
+        view_registry.discard(self)
+        super().stop()